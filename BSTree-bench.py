@@ -0,0 +1,211 @@
+# coding: utf-8
+
+# # BSTree Benchmarks
+#
+# Timing comparisons for the trees in `BSTree.py`. Run this file directly (`python BSTree-bench.py`) to print each table; pass one or more section names (e.g., `python BSTree-bench.py balance`) to run only those.
+#
+# Note that importing `BSTree` also runs its test cells.
+
+# In[1]:
+
+
+import itertools
+import sys
+import timeit
+import tracemalloc
+
+import random
+
+from BSTree import ArenaTree, AVLTree, BSTree
+
+
+def best_of(stmt, setup, repeat=3):
+    """Returns the fastest of `repeat` single runs of `stmt`, in seconds.
+    `setup` is called before every run and its result passed to `stmt`."""
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        t = timeit.default_timer()
+        stmt(arg)
+        times.append(timeit.default_timer() - t)
+    return min(times)
+
+
+def filled(cls, keys):
+    t = cls()
+    for k in keys:
+        t[k] = k
+    return t
+
+
+# ## Balance
+#
+# Inserting `n` keys in sorted, reverse-sorted and random order into a `BSTree`, an `AVLTree` and an `ArenaTree`, then looking each of them up: the time taken by each, and the height of the resulting tree. (An unbalanced tree built from sorted keys is a single branch, which takes O(n<sup>2</sup>) time to build; those cases are skipped for `n` above `max_unbalanced`.)
+
+# In[2]:
+
+
+def bench_balance(sizes=(500, 10**4, 10**5), max_unbalanced=10**4):
+    print('{:>8} {:>8} {:>8} {:>12} {:>12} {:>8}'.format(
+        'n', 'order', 'tree', 'insert', 'lookup', 'height'))
+    for n in sizes:
+        for order in ('sorted', 'reverse', 'random'):
+            keys = list(range(n))
+            if order == 'reverse':
+                keys.reverse()
+            elif order == 'random':
+                random.shuffle(keys)
+
+            def lookup(t):
+                for k in keys:
+                    t[k]
+
+            for cls in (BSTree, AVLTree, ArenaTree):
+                if cls is BSTree and order != 'random' and n > max_unbalanced:
+                    row = '{:>34}'.format('skipped')
+                else:
+                    t_ins = best_of(lambda cls: filled(cls, keys), lambda: cls)
+                    t = filled(cls, keys)
+                    t_get = best_of(lookup, lambda: t)
+                    row = '{:>12.5f} {:>12.5f} {:>8}'.format(t_ins, t_get, t.height())
+                print('{:>8} {:>8} {:>8} {}'.format(n, order, cls.__name__, row))
+
+
+# ## Full scans
+#
+# Iterating over all the items of a randomly built `n`-key tree with the recursive generators `BSTree` used to chain together with `yield from` (one per level of the tree, each of which every item is passed up through), versus the stack-based `items()`.
+
+# In[3]:
+
+
+def recursive_items(t):
+    def iter_rec(node):
+        if node:
+            yield from iter_rec(node.left)
+            yield (node.key, node.val)
+            yield from iter_rec(node.right)
+    return iter_rec(t.root)
+
+
+def bench_scan(sizes=(10**3, 10**4, 10**5, 10**6)):
+    print('{:>8} {:>8} {:>12} {:>12} {:>8}'.format('n', 'height', 'recursive', 'stack', 'speedup'))
+    for n in sizes:
+        keys = list(range(n))
+        random.shuffle(keys)
+        t = filled(BSTree, keys)
+        t_rec = best_of(lambda t: sum(1 for _ in recursive_items(t)), lambda: t)
+        t_it  = best_of(lambda t: sum(1 for _ in t.items()), lambda: t)
+        print('{:>8} {:>8} {:>12.5f} {:>12.5f} {:>7.1f}x'.format(n, t.height(), t_rec, t_it, t_rec / t_it))
+
+
+# ## Memory per entry
+#
+# The memory allocated (as measured by `tracemalloc`) by a `dict`, and by each kind of tree, to hold `n` entries whose keys and values already exist, inserted in random order --- i.e., the cost of the structure alone. `DictNodeTree` is a `BSTree` whose nodes have a per-instance `__dict__`, as they did before `BSTree.Node` gained `__slots__`.
+
+# In[4]:
+
+
+class DictNodeTree(BSTree):
+    class Node(BSTree.Node):
+        pass
+
+
+def bench_memory(sizes=(10**4, 10**5, 10**6)):
+    print('{:>8} {:>14} {:>12} {:>10}'.format('n', 'structure', 'total', 'per entry'))
+    for n in sizes:
+        keys = list(range(n))
+        random.shuffle(keys)
+        for cls in (dict, DictNodeTree, BSTree, AVLTree, ArenaTree):
+            tracemalloc.start()
+            t = cls()
+            for k in keys:
+                t[k] = k
+            mem = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del t
+            print('{:>8} {:>14} {:>9.1f} MB {:>8.1f} B'.format(n, cls.__name__, mem / 2**20, mem / n))
+
+
+# ## Order statistics
+#
+# `k` queries each of the rank of a key, the `k`-th smallest key, and the keys in a range of 10 keys, on an `n`-key `AVLTree`: answered by an in-order walk over the keys (stopping as soon as it has the answer), versus with `rank`, `select` and `irange`.
+
+# In[5]:
+
+
+def bench_order(sizes=(10**3, 10**4, 10**5), k=100):
+    print('{:>8} {:>8} {:>12} {:>12}'.format('n', 'query', 'walk', 'augmented'))
+    for n in sizes:
+        t = filled(AVLTree, random.sample(range(n), n))
+        probes = [random.randrange(n) for _ in range(k)]
+
+        def walk_rank(t):
+            for p in probes:
+                sum(1 for _ in itertools.takewhile(lambda key: key < p, t))
+
+        def walk_select(t):
+            for p in probes:
+                next(itertools.islice(t, p, None))
+
+        def walk_range(t):
+            for p in probes:
+                list(itertools.takewhile(lambda key: key < p + 10,
+                                         itertools.dropwhile(lambda key: key < p, t)))
+
+        for query, walk, augmented in (
+                ('rank', walk_rank, lambda t: [t.rank(p) for p in probes]),
+                ('select', walk_select, lambda t: [t.select(p) for p in probes]),
+                ('irange', walk_range, lambda t: [list(t.irange(p, p + 10)) for p in probes])):
+            t_walk = best_of(walk, lambda: t)
+            t_aug  = best_of(augmented, lambda: t)
+            print('{:>8} {:>8} {:>12.5f} {:>12.5f}'.format(n, query, t_walk, t_aug))
+
+
+# ## Bulk construction
+#
+# Building a tree from `n` sorted pairs by setting each key versus with `from_sorted` (setting each key of a `BSTree` is O(n<sup>2</sup>), and skipped for `n` above `max_unbalanced`), and setting a sorted batch of `n // 2` pairs (half of them new keys) in an `n`-key `AVLTree` one key at a time versus with `update`.
+
+# In[6]:
+
+
+def bench_bulk(sizes=(10**3, 10**4, 10**5), max_unbalanced=10**4):
+    print('{:>8} {:>20} {:>12} {:>12}'.format('n', 'operation', 'per key', 'bulk'))
+    for n in sizes:
+        pairs = [(k, k) for k in range(n)]
+        for cls in (BSTree, AVLTree):
+            if cls is BSTree and n > max_unbalanced:
+                t_each = float('nan')
+            else:
+                t_each = best_of(lambda cls: filled(cls, range(n)), lambda: cls)
+            t_bulk = best_of(lambda cls: cls.from_sorted(pairs), lambda: cls)
+            print('{:>8} {:>20} {:>12.5f} {:>12.5f}'.format(
+                n, cls.__name__ + '.from_sorted', t_each, t_bulk))
+
+        keys = random.sample(range(2*n), n)
+        batch = sorted((k, -k) for k in random.sample(range(2*n), n // 2))
+
+        def set_each(t):
+            for k, v in batch:
+                t[k] = v
+
+        t_each = best_of(set_each, lambda: filled(AVLTree, keys))
+        t_bulk = best_of(lambda t: t.update(batch), lambda: filled(AVLTree, keys))
+        print('{:>8} {:>20} {:>12.5f} {:>12.5f}'.format(n, 'AVLTree.update', t_each, t_bulk))
+
+
+# In[ ]:
+
+
+BENCHMARKS = {
+    'balance': bench_balance,
+    'scan': bench_scan,
+    'memory': bench_memory,
+    'order': bench_order,
+    'bulk': bench_bulk,
+}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or BENCHMARKS:
+        print('==', name)
+        BENCHMARKS[name]()
+        print()
@@ -40,170 +40,365 @@
 # In[1]:
 
 
+import operator
+
+_get_key  = operator.attrgetter('key')
+_get_val  = operator.attrgetter('val')
+_get_item = operator.attrgetter('key', 'val')
+
 class BSTree:
     class Node:
+        __slots__ = ('key', 'val', 'left', 'right', 'size')
+
         def __init__(self, key, val, left=None, right=None):
             self.key = key
             self.val = val
             self.left = left
             self.right = right
+            # the number of nodes in the subtree rooted at this node
+            self.size = 1 + (left.size if left else 0) + (right.size if right else 0)
             
+    # True if the tree keeps itself balanced (so that its height is O(log n))
+    balanced = False
+
     def __init__(self):
         self.size = 0
         self.root = None
         
-    def __getitem__(self, key):
-        # YOUR CODE HERE
-        def get_rec(node):
-            if not node:
-                raise KeyError
-            elif key < node.key:
-                return get_rec(node.left)
+    def _find(self, key):
+        """Returns the node holding key, or None if there is none."""
+        node = self.root
+        while node:
+            if key < node.key:
+                node = node.left
             elif key > node.key:
-                return get_rec(node.right)
-            elif key == node.key:
-                return node.val
+                node = node.right
             else:
-                raise KeyError
-        return get_rec(self.root)
-        #raise NotImplementedError()
+                return node
+        return None
+
+    def _replace_child(self, parent, old, new):
+        """Puts new in place of old, a child of parent (or the root, if parent
+        is None)."""
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def _retrace(self, path, delta):
+        """Updates the nodes on path (a list of nodes from the root down) after
+        a node has been added (delta=1) or removed (delta=-1) beneath them."""
+        for node in path:
+            node.size += delta
+
+    @staticmethod
+    def _update(node):
+        left, right = node.left, node.right
+        node.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+
+    def __getitem__(self, key):
+        # YOUR CODE HERE
+        node = self._find(key)
+        if node is None:
+            raise KeyError(key)
+        return node.val
     
     def __setitem__(self, key, val):
         # YOUR CODE HERE
-        def set_rec(node):
-            if not node:
-                return BSTree.Node(key, val)
-            elif key == node.key:
-                node.val = val
-                return node
-            elif key < node.key:
-                node.left = set_rec(node.left)
-                return node
+        path = []
+        node = self.root
+        while node:
+            path.append(node)
+            if key < node.key:
+                node = node.left
             elif key > node.key:
-                node.right = set_rec(node.right)
-                return node
-
-        self.root = set_rec(self.root)
+                node = node.right
+            else:
+                node.val = val
+                return
+        node = self.Node(key, val)
+        if not path:
+            self.root = node
+        elif key < path[-1].key:
+            path[-1].left = node
+        else:
+            path[-1].right = node
         self.size += 1
-       # raise NotImplementedError()
+        self._retrace(path, 1)
         
     def __delitem__(self, key):
         # YOUR CODE HERE
-        #raise NotImplementedError()
-        def delitem_rec(node):
-            if node.key < key:
-                node.right = delitem_rec(node.right)
-                return node
-            elif node.key > key:
-                node.left = delitem_rec(node.left)
-                return node
-            elif node.key == key:
-                if not node.left and not node.right:
-                    return None
-                elif node.left and not node.right:
-                    return node.left
-                elif not node.left and node.right:
-                    return node.right
-                else:
-                    t = node.left
-                    if not t.right:
-                        node.left = t.left
-                        node.val = t.val
-                        node.key = t.key
-                    else:
-                        n = t
-                        while n.right.right:
-                            n = n.right
-                        t = n.right
-                        n.right = t.left
-                        node.val = t.val
-                        node.key = t.key
-                    return node
+        path = []
+        node = self.root
+        while node:
+            if key < node.key:
+                path.append(node)
+                node = node.left
+            elif key > node.key:
+                path.append(node)
+                node = node.right
             else:
-                raise KeyError
-        self.root = delitem_rec(self.root)
+                break
+        else:
+            raise KeyError(key)
+        if node.left and node.right:
+            # replace the key/value with those of the in-order predecessor,
+            # and remove the predecessor's node instead
+            path.append(node)
+            pred = node.left
+            while pred.right:
+                path.append(pred)
+                pred = pred.right
+            node.key = pred.key
+            node.val = pred.val
+            node = pred
+        self._replace_child(path[-1] if path else None, node, node.left or node.right)
         self.size -= 1
+        self._retrace(path, -1)
         
     def __contains__(self, key):
         # YOUR CODE HERE
-        
-        def find(t):
-            if not t:
-                return False
-            elif t.key == key:
-                return True
-            elif t.key > key:
-                return find(t.left)
-            elif t.key < key:
-                return find(t.right)
-
-        return find(self.root)
-       # raise NotImplementedError()
+        return self._find(key) is not None
     
     def __len__(self):
         return self.size
+
+    def _nodes(self):
+        """Yields the nodes of the tree in order of their keys, keeping the
+        path of nodes still to be visited on an explicit stack."""
+        stack = []
+        node = self.root
+        while True:
+            while node:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            yield node
+            node = node.right
     
     def __iter__(self):
         # YOUR CODE HERE
-       # raise NotImplementedError()
-        
-        def iter_rec(node):
-            if node:
-                # for x in iter_rec(node.left):
-                # yield x
-                yield from iter_rec(node.left)
-                yield node.key
-                # for x in iter_rec(node.right):
-                # yield x
-                yield from iter_rec(node.right)
-
-        return iter_rec(self.root)
+        return map(_get_key, self._nodes())
         
     def keys(self):
         # YOUR CODE HERE
-        #raise NotImplementedError()
-        def iter_rec(node):
-            if node:
-                # for x in iter_rec(node.left):
-                # yield x
-                yield from iter_rec(node.left)
-                yield node.key
-                # for x in iter_rec(node.right):
-                # yield x
-                yield from iter_rec(node.right)
-
-        return iter_rec(self.root)
+        return map(_get_key, self._nodes())
 
     def values(self):
         # YOUR CODE HERE
-        #raise NotImplementedError()
-        def iter_rec(node):
-            if node:
-                # for x in iter_rec(node.left):
-                # yield x
-                yield from iter_rec(node.left)
-                yield node.val
-                # for x in iter_rec(node.right):
-                # yield x
-                yield from iter_rec(node.right)
-
-        return iter_rec(self.root)
+        return map(_get_val, self._nodes())
 
     def items(self):
         # YOUR CODE HERE
-        #raise NotImplementedError()
-        def iter_rec(node):
-            if node:
-                # for x in iter_rec(node.left):
-                # yield x
-                yield from iter_rec(node.left)
-                yield (node.key, node.val)
-                # for x in iter_rec(node.right):
-                # yield x
-                yield from iter_rec(node.right)
-
-        return iter_rec(self.root)
-        
+        return map(_get_item, self._nodes())
+
+    ### bulk construction ###
+
+    @staticmethod
+    def _sorted_pairs(items):
+        """Returns a list of the (key, value) pairs in items, which must be
+        sorted by key; of pairs with equal keys, only the last is kept."""
+        pairs = []
+        for key, val in items:
+            if pairs:
+                last = pairs[-1][0]
+                if not last < key:
+                    if key < last:
+                        raise ValueError('items must be sorted by key')
+                    pairs[-1] = (key, val)
+                    continue
+            pairs.append((key, val))
+        return pairs
+
+    def _build(self, nodes):
+        """Links nodes (a list sorted by key) into a perfectly balanced tree,
+        which replaces the contents of this one."""
+        def build_rec(lo, hi):
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = nodes[mid]
+            node.left = build_rec(lo, mid)
+            node.right = build_rec(mid+1, hi)
+            self._update(node)
+            return node
+
+        self.root = build_rec(0, len(nodes))
+        self.size = len(nodes)
+
+    @classmethod
+    def from_sorted(cls, items):
+        """Returns a new, perfectly balanced tree holding the (key, value)
+        pairs in items, which must be sorted by key, in O(n) time."""
+        tree = cls()
+        tree._build([tree.Node(key, val) for key, val in cls._sorted_pairs(items)])
+        return tree
+
+    def update(self, items):
+        """Sets the (key, value) pairs in items, which must be sorted by key.
+        The batch is merged with the keys already in the tree in a single
+        pass, and the tree rebuilt (balanced) from the result, in O(n + m)
+        time --- except, in a balanced tree, for a batch small enough that it
+        is quicker to set its keys one at a time, in O(m log n) time."""
+        batch = self._sorted_pairs(items)
+        if self.balanced and len(batch) * self.size.bit_length() < self.size:
+            for key, val in batch:
+                self[key] = val
+            return
+        merged = []
+        nodes = self._nodes()
+        node = next(nodes, None)
+        for key, val in batch:
+            while node is not None and node.key < key:
+                merged.append(node)
+                node = next(nodes, None)
+            if node is not None and not key < node.key:
+                node.val = val
+                merged.append(node)
+                node = next(nodes, None)
+            else:
+                merged.append(self.Node(key, val))
+        if node is not None:
+            merged.append(node)
+            merged.extend(nodes)
+        self._build(merged)
+
+    ### order statistics ###
+
+    def rank(self, key):
+        """Returns the number of keys in the tree less than key (which need
+        not itself be in the tree)."""
+        rank = 0
+        node = self.root
+        while node:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                rank += 1 + (node.left.size if node.left else 0)
+                node = node.right
+            else:
+                return rank + (node.left.size if node.left else 0)
+        return rank
+
+    def select(self, k):
+        """Returns the k-th smallest key in the tree (counting from 0, or from
+        -1 backwards from the largest)."""
+        if k < 0:
+            k += self.size
+        if not 0 <= k < self.size:
+            raise IndexError('tree index out of range')
+        node = self.root
+        while True:
+            left = node.left.size if node.left else 0
+            if k < left:
+                node = node.left
+            elif k > left:
+                k -= left + 1
+                node = node.right
+            else:
+                return node.key
+
+    def floor(self, key):
+        """Returns the largest key in the tree less than or equal to key."""
+        best = None
+        node = self.root
+        while node:
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                best = node
+                node = node.right
+            else:
+                return node.key
+        if best is None:
+            raise KeyError(key)
+        return best.key
+
+    def ceiling(self, key):
+        """Returns the smallest key in the tree greater than or equal to key."""
+        best = None
+        node = self.root
+        while node:
+            if key < node.key:
+                best = node
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                return node.key
+        if best is None:
+            raise KeyError(key)
+        return best.key
+
+    def min_key(self):
+        """Returns the smallest key in the tree."""
+        node = self.root
+        if not node:
+            raise KeyError('min_key(): tree is empty')
+        while node.left:
+            node = node.left
+        return node.key
+
+    def max_key(self):
+        """Returns the largest key in the tree."""
+        node = self.root
+        if not node:
+            raise KeyError('max_key(): tree is empty')
+        while node.right:
+            node = node.right
+        return node.key
+
+    def irange(self, lo=None, hi=None, reverse=False):
+        """Returns an iterator over the keys k in the tree with lo <= k < hi
+        (where a bound of None leaves that end of the range open), in
+        ascending order, or descending if reverse is true. Only the branches
+        of the tree that may hold such keys are visited."""
+        if reverse:
+            return self._irange_reversed(lo, hi)
+        return self._irange(lo, hi)
+
+    def _irange(self, lo, hi):
+        stack = []
+        node = self.root
+        while True:
+            # descend leftwards, skipping over nodes (and left subtrees) < lo
+            while node:
+                if lo is not None and node.key < lo:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if hi is not None and not node.key < hi:
+                return
+            yield node.key
+            node = node.right
+
+    def _irange_reversed(self, lo, hi):
+        stack = []
+        node = self.root
+        while True:
+            # descend rightwards, skipping over nodes (and right subtrees) >= hi
+            while node:
+                if hi is not None and not node.key < hi:
+                    node = node.left
+                else:
+                    stack.append(node)
+                    node = node.right
+            if not stack:
+                return
+            node = stack.pop()
+            if lo is not None and node.key < lo:
+                return
+            yield node.key
+            node = node.left
+
     def pprint(self, width=64):
         """Attempts to pretty-print this tree's contents."""
         height = self.height()
@@ -229,12 +424,337 @@ class BSTree:
     
     def height(self):
         """Returns the height of the longest branch of the tree."""
-        def height_rec(t):
-            if not t:
-                return 0
+        height = 0
+        level = [self.root] if self.root else []
+        while level:
+            height += 1
+            level = [c for n in level for c in (n.left, n.right) if c]
+        return height
+
+
+# ## Order statistics
+# 
+# Each node also records the `size` of its subtree (the number of nodes in it), which is kept up to date along the search path by every insertion and deletion (and, in the balanced trees below, by every rotation). With it, and the ordering of the keys, `BSTree` answers the following without walking the whole tree:
+# 
+# - `rank(key)`: the number of keys less than `key`
+# - `select(k)`: the `k`-th smallest key (raising an `IndexError` if there are no more than `k` keys)
+# - `floor(key)`, `ceiling(key)`: the largest key `<= key`, and the smallest key `>= key` (raising a `KeyError` if there is none)
+# - `min_key()`, `max_key()`: the smallest and largest keys
+# - `irange(lo, hi, reverse=False)`: an iterator over the keys in the range `[lo, hi)`, in ascending order (or descending, if `reverse` is true), which descends only into the branches that can hold keys in the range
+# 
+# Each takes time proportional to the height of the tree (plus, for `irange`, the number of keys produced), i.e., O(log n) for a balanced tree.
+
+# ## Bulk construction
+# 
+# `BSTree.from_sorted(items)` builds a tree from an iterable of `(key, value)` pairs already sorted by key (such as the `items()` of another tree) in O(n) time, rather than the O(n log n) time (or, for an unbalanced tree given sorted keys, O(n<sup>2</sup>)) that setting each key would take: the pairs are collected into a list of nodes, which are then linked into a perfectly balanced tree, the middle node of each sublist becoming the root of its subtree.
+# 
+# `update(items)` likewise sets a batch of sorted pairs in the tree. Unless the tree is balanced and the batch so small that setting its keys one at a time (at O(log n) each) is quicker, it is merged with the nodes of the tree in a single in-order pass (reusing the existing nodes, and replacing the values of keys already present), and the tree relinked in balance from the result, in O(n + m) time. In both cases, if a key appears more than once, the last of its values wins; pairs out of order raise a `ValueError` (before the tree is changed).
+
+# ## Balanced trees
+# 
+# `BSTree` makes no effort to keep itself balanced, so keys inserted in sorted (or reverse-sorted) order produce a tree that is a single long branch, on which lookups, insertions and deletions take O(n) time.
+# 
+# `AVLTree` is a `BSTree` with the same mapping API that is kept balanced as an [AVL tree](https://en.wikipedia.org/wiki/AVL_tree). Each node records the height of its subtree, and after every insertion or deletion the nodes along the path back up towards the root are updated (until one is reached whose height is unchanged), and rotated wherever the heights of their two subtrees differ by more than one. This keeps the height of the tree within about 1.44 log<sub>2</sub> n, so that getting, setting and deleting keys takes O(log n) time whatever the order in which the keys arrive.
+
+# In[ ]:
+
+
+class AVLTree(BSTree):
+    balanced = True
+
+    class Node(BSTree.Node):
+        __slots__ = ('height',)
+
+        def __init__(self, key, val, left=None, right=None):
+            super().__init__(key, val, left, right)
+            self.height = 1 + max(left.height if left else 0,
+                                  right.height if right else 0)
+
+    @staticmethod
+    def _height(node):
+        return node.height if node else 0
+
+    @staticmethod
+    def _update(node):
+        left, right = node.left, node.right
+        lh = left.height if left else 0
+        rh = right.height if right else 0
+        node.height = 1 + (lh if lh > rh else rh)
+        node.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+
+    def _rotate_right(self, node):
+        top = node.left
+        node.left = top.right
+        top.right = node
+        self._update(node)
+        self._update(top)
+        return top
+
+    def _rotate_left(self, node):
+        top = node.right
+        node.right = top.left
+        top.left = node
+        self._update(node)
+        self._update(top)
+        return top
+
+    def _rebalance(self, node):
+        """Updates the height of node, and rotates its subtree if it is out of
+        balance. Returns the (possibly new) root of the subtree."""
+        self._update(node)
+        h = self._height
+        balance = h(node.left) - h(node.right)
+        if balance > 1:
+            if h(node.left.left) < h(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        elif balance < -1:
+            if h(node.right.right) < h(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
+
+    def _retrace(self, path, delta):
+        """Rebalances the nodes on path (a list of nodes from the root down),
+        from the bottom up, until a subtree's height is unchanged; the sizes of
+        the nodes above it are then simply adjusted by delta."""
+        for i in range(len(path)-1, -1, -1):
+            node = path[i]
+            height = node.height
+            top = self._rebalance(node)
+            if top is not node:
+                self._replace_child(path[i-1] if i else None, node, top)
+            if top.height == height:
+                for j in range(i):
+                    path[j].size += delta
+                break
+
+
+# ## Compact trees
+# 
+# A `BSTree.Node` holds its key, value, child links and subtree size in `__slots__` (as does an `AVLTree.Node`, which adds its height), rather than in a per-instance `__dict__`, which roughly halves the size of each node.
+# 
+# Even so, every node is a separate Python object. `ArenaTree` is an AVL tree (balanced just as `AVLTree` is, and with the same mapping API) that instead keeps its nodes in an *arena*: a set of parallel arrays --- `_keys` and `_vals` (lists), and `_left`, `_right` and `_height` (typed `array.array`s) --- addressed by integer index, so that a node is just a slot in each of them. Index 0 is a sentinel standing in for the empty tree (with a height of 0), and the slots of deleted nodes are chained together through `_right` in a free list, to be reused by later insertions. This brings the cost of the tree itself down to about 25 bytes per entry, on top of the keys and values.
+
+# In[ ]:
+
+
+import array
+
+class ArenaTree:
+    def __init__(self):
+        self._keys   = [None]
+        self._vals   = [None]
+        self._left   = array.array('i', [0])
+        self._right  = array.array('i', [0])
+        self._height = array.array('b', [0])
+        self._free = 0
+        self.root = 0
+        self.size = 0
+
+    ### nodes ###
+
+    def _new(self, key, val):
+        """Returns the index of a new node holding key and val, reusing a free
+        slot if there is one."""
+        i = self._free
+        if i:
+            self._free = self._right[i]
+            self._keys[i] = key
+            self._vals[i] = val
+            self._right[i] = 0
+            self._height[i] = 1
+        else:
+            i = len(self._keys)
+            self._keys.append(key)
+            self._vals.append(val)
+            self._left.append(0)
+            self._right.append(0)
+            self._height.append(1)
+        return i
+
+    def _release(self, i):
+        """Adds the slot at index i to the free list."""
+        self._keys[i] = self._vals[i] = None
+        self._left[i] = 0
+        self._right[i] = self._free
+        self._height[i] = 0
+        self._free = i
+
+    def _find(self, key):
+        """Returns the index of the node holding key, or 0 if there is none."""
+        keys, left, right = self._keys, self._left, self._right
+        i = self.root
+        while i:
+            k = keys[i]
+            if key < k:
+                i = left[i]
+            elif key > k:
+                i = right[i]
+            else:
+                return i
+        return 0
+
+    def _replace_child(self, parent, old, new):
+        if not parent:
+            self.root = new
+        elif self._left[parent] == old:
+            self._left[parent] = new
+        else:
+            self._right[parent] = new
+
+    ### balancing ###
+
+    def _update(self, i):
+        h = self._height
+        lh = h[self._left[i]]
+        rh = h[self._right[i]]
+        h[i] = 1 + (lh if lh > rh else rh)
+
+    def _rotate_right(self, i):
+        left, right = self._left, self._right
+        top = left[i]
+        left[i] = right[top]
+        right[top] = i
+        self._update(i)
+        self._update(top)
+        return top
+
+    def _rotate_left(self, i):
+        left, right = self._left, self._right
+        top = right[i]
+        right[i] = left[top]
+        left[top] = i
+        self._update(i)
+        self._update(top)
+        return top
+
+    def _rebalance(self, i):
+        """Updates the height of node i, and rotates its subtree if it is out
+        of balance. Returns the (possibly new) root of the subtree."""
+        self._update(i)
+        h, left, right = self._height, self._left, self._right
+        balance = h[left[i]] - h[right[i]]
+        if balance > 1:
+            if h[left[left[i]]] < h[right[left[i]]]:
+                left[i] = self._rotate_left(left[i])
+            return self._rotate_right(i)
+        elif balance < -1:
+            if h[right[right[i]]] < h[left[right[i]]]:
+                right[i] = self._rotate_right(right[i])
+            return self._rotate_left(i)
+        return i
+
+    def _rebalance_path(self, path):
+        for n in range(len(path)-1, -1, -1):
+            i = path[n]
+            height = self._height[i]
+            top = self._rebalance(i)
+            if top != i:
+                self._replace_child(path[n-1] if n else 0, i, top)
+            if self._height[top] == height:
+                break
+
+    ### mapping API ###
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if not i:
+            raise KeyError(key)
+        return self._vals[i]
+
+    def __setitem__(self, key, val):
+        keys, left, right = self._keys, self._left, self._right
+        path = []
+        i = self.root
+        while i:
+            path.append(i)
+            k = keys[i]
+            if key < k:
+                i = left[i]
+            elif key > k:
+                i = right[i]
+            else:
+                self._vals[i] = val
+                return
+        i = self._new(key, val)
+        if not path:
+            self.root = i
+        elif key < keys[path[-1]]:
+            left[path[-1]] = i
+        else:
+            right[path[-1]] = i
+        self.size += 1
+        self._rebalance_path(path)
+
+    def __delitem__(self, key):
+        keys, left, right = self._keys, self._left, self._right
+        path = []
+        i = self.root
+        while i:
+            if key < keys[i]:
+                path.append(i)
+                i = left[i]
+            elif key > keys[i]:
+                path.append(i)
+                i = right[i]
             else:
-                return max(1+height_rec(t.left), 1+height_rec(t.right))
-        return height_rec(self.root)
+                break
+        else:
+            raise KeyError(key)
+        if left[i] and right[i]:
+            path.append(i)
+            pred = left[i]
+            while right[pred]:
+                path.append(pred)
+                pred = right[pred]
+            keys[i] = keys[pred]
+            self._vals[i] = self._vals[pred]
+            i = pred
+        self._replace_child(path[-1] if path else 0, i, left[i] or right[i])
+        self._release(i)
+        self.size -= 1
+        self._rebalance_path(path)
+
+    def __contains__(self, key):
+        return self._find(key) != 0
+
+    def __len__(self):
+        return self.size
+
+    ### iteration ###
+
+    def _indices(self):
+        """Yields the indices of the nodes in order of their keys."""
+        left, right = self._left, self._right
+        stack = []
+        i = self.root
+        while True:
+            while i:
+                stack.append(i)
+                i = left[i]
+            if not stack:
+                return
+            i = stack.pop()
+            yield i
+            i = right[i]
+
+    def __iter__(self):
+        return map(self._keys.__getitem__, self._indices())
+
+    def keys(self):
+        return map(self._keys.__getitem__, self._indices())
+
+    def values(self):
+        return map(self._vals.__getitem__, self._indices())
+
+    def items(self):
+        keys, vals = self._keys, self._vals
+        return ((keys[i], vals[i]) for i in self._indices())
+
+    def height(self):
+        """Returns the height of the longest branch of the tree."""
+        return self._height[self.root]
 
 
 # In[11]:
@@ -410,3 +930,396 @@ for k in range(1, 101, 2):
     with tc.assertRaises(KeyError):
         v = t[k]
 
+
+# In[ ]:
+
+
+# test balanced trees
+
+from unittest import TestCase
+import random
+
+def check_avl(t):
+    """Checks the ordering, heights and balance of every node in t, and
+    returns the number of nodes."""
+    def check_rec(node, lo, hi):
+        if not node:
+            return 0, 0
+        tc.assertTrue(lo is None or lo < node.key)
+        tc.assertTrue(hi is None or node.key < hi)
+        lh, lcount = check_rec(node.left, lo, node.key)
+        rh, rcount = check_rec(node.right, node.key, hi)
+        tc.assertLessEqual(abs(lh - rh), 1)
+        tc.assertEqual(node.height, 1 + max(lh, rh))
+        tc.assertEqual(node.size, 1 + lcount + rcount)
+        return node.height, 1 + lcount + rcount
+    count = check_rec(t.root, None, None)[1]
+    tc.assertEqual(len(t), count)
+    return count
+
+tc = TestCase()
+for keys in (list(range(500)), list(range(500, 0, -1)),
+             random.sample(range(10000), 500)):
+    t = AVLTree()
+    for k in keys:
+        t[k] = str(k)
+    check_avl(t)
+    tc.assertLessEqual(t.height(), 12)
+    tc.assertEqual(sorted(keys), list(t.keys()))
+    tc.assertEqual([str(k) for k in sorted(keys)], list(t.values()))
+    for k in keys[::7]:
+        tc.assertEqual(str(k), t[k])
+    tc.assertFalse(-1 in t)
+
+# setting an existing key replaces its value without growing the tree
+t = AVLTree()
+for k in range(100):
+    t[k] = k
+for k in range(0, 100, 3):
+    t[k] = -k
+tc.assertEqual(100, len(t))
+tc.assertEqual(-99, t[99])
+check_avl(t)
+
+# deletion keeps the tree balanced
+keys = list(range(400))
+t = AVLTree()
+for k in keys:
+    t[k] = k
+random.shuffle(keys)
+for i, k in enumerate(keys[:300]):
+    del t[k]
+    if i % 20 == 0:
+        check_avl(t)
+    tc.assertFalse(k in t)
+check_avl(t)
+tc.assertEqual(sorted(keys[300:]), list(t))
+for k in keys[:10]:
+    with tc.assertRaises(KeyError):
+        del t[k]
+    with tc.assertRaises(KeyError):
+        t[k]
+tc.assertEqual(100, len(t))
+for k in keys[300:]:
+    del t[k]
+tc.assertEqual(0, len(t))
+tc.assertIsNone(t.root)
+
+
+# In[ ]:
+
+
+# test iterative operations on deep trees
+
+from unittest import TestCase
+import random
+import sys
+
+tc = TestCase()
+# a (degenerate) tree deeper than the recursion limit, which the tree's
+# operations must handle without recursing
+n = 600
+limit = sys.getrecursionlimit()
+sys.setrecursionlimit(300)
+try:
+    t = BSTree()
+    for k in range(n):
+        t[k] = str(k)
+    tc.assertEqual(n, t.height())
+    tc.assertEqual(n, len(t))
+    tc.assertEqual(list(range(n)), list(t))
+    tc.assertEqual(list(range(n)), list(t.keys()))
+    tc.assertEqual([str(k) for k in range(n)], list(t.values()))
+    tc.assertEqual([(k, str(k)) for k in range(n)], list(t.items()))
+    tc.assertEqual(str(n-1), t[n-1])
+    tc.assertTrue(n-1 in t)
+    tc.assertFalse(n in t)
+
+    # setting an existing key doesn't grow the tree; deleting a missing key raises
+    t[n-1] = 'last'
+    tc.assertEqual(n, len(t))
+    tc.assertEqual('last', t[n-1])
+    with tc.assertRaises(KeyError):
+        del t[n]
+    tc.assertEqual(n, len(t))
+    for k in range(n-1, -1, -2):
+        del t[k]
+    tc.assertEqual(list(range(0, n, 2)), list(t))
+    tc.assertEqual(n // 2, len(t))
+finally:
+    sys.setrecursionlimit(limit)
+
+# deletions of nodes with zero, one and two children, against a dict
+t = BSTree()
+d = {}
+for k in random.sample(range(400), 200):
+    t[k] = d[k] = random.random()
+for k in random.sample(range(400), 300):
+    if k in d:
+        del t[k]
+        del d[k]
+    else:
+        with tc.assertRaises(KeyError):
+            del t[k]
+    tc.assertEqual(len(d), len(t))
+tc.assertEqual(sorted(d.items()), list(t.items()))
+
+# iterators are independent, and empty trees yield nothing
+it1, it2 = iter(t), iter(t)
+tc.assertEqual(next(it1), next(it2))
+tc.assertEqual(list(it1), list(it2))
+tc.assertEqual([], list(BSTree()))
+tc.assertEqual(0, BSTree().height())
+
+
+# In[ ]:
+
+
+# test compact trees
+
+from unittest import TestCase
+import random
+
+def check_arena(t):
+    """Checks the ordering, heights and balance of every node in arena tree t,
+    and that its free list and live nodes account for all its slots."""
+    def check_rec(i, lo, hi):
+        if not i:
+            return 0, 0
+        key = t._keys[i]
+        tc.assertTrue(lo is None or lo < key)
+        tc.assertTrue(hi is None or key < hi)
+        lh, lcount = check_rec(t._left[i], lo, key)
+        rh, rcount = check_rec(t._right[i], key, hi)
+        tc.assertLessEqual(abs(lh - rh), 1)
+        tc.assertEqual(t._height[i], 1 + max(lh, rh))
+        return t._height[i], 1 + lcount + rcount
+    tc.assertEqual(len(t), check_rec(t.root, None, None)[1])
+    free, i = 0, t._free
+    while i:
+        tc.assertIsNone(t._keys[i])
+        free, i = free + 1, t._right[i]
+    tc.assertEqual(len(t._keys), 1 + len(t) + free)
+
+tc = TestCase()
+for node in (BSTree.Node(1, 2), AVLTree.Node(1, 2)):
+    with tc.assertRaises(AttributeError):
+        node.__dict__
+
+for keys in (list(range(500)), list(range(500, 0, -1)),
+             random.sample(range(10000), 500)):
+    t = ArenaTree()
+    for k in keys:
+        t[k] = str(k)
+    check_arena(t)
+    tc.assertLessEqual(t.height(), 12)
+    tc.assertEqual(sorted(keys), list(t))
+    tc.assertEqual(sorted(keys), list(t.keys()))
+    tc.assertEqual([str(k) for k in sorted(keys)], list(t.values()))
+    tc.assertEqual([(k, str(k)) for k in sorted(keys)], list(t.items()))
+    for k in keys[::7]:
+        tc.assertEqual(str(k), t[k])
+        tc.assertTrue(k in t)
+    tc.assertFalse(-1 in t)
+    with tc.assertRaises(KeyError):
+        t[-1]
+
+# deletions free slots, which later insertions reuse
+t = ArenaTree()
+d = {}
+for k in random.sample(range(400), 200):
+    t[k] = d[k] = random.random()
+for k in random.sample(range(400), 300):
+    if k in d:
+        del t[k]
+        del d[k]
+    else:
+        with tc.assertRaises(KeyError):
+            del t[k]
+check_arena(t)
+tc.assertEqual(sorted(d.items()), list(t.items()))
+slots = len(t._keys)
+for k in range(len(d), 200):
+    t[-k] = d[-k] = k
+tc.assertEqual(slots, len(t._keys))
+t[0] = d[0] = 'zero'
+check_arena(t)
+tc.assertEqual(len(d), len(t))
+tc.assertEqual(sorted(d.items()), list(t.items()))
+
+for k in list(d):
+    del t[k]
+check_arena(t)
+tc.assertEqual(0, len(t))
+tc.assertEqual(0, t.height())
+tc.assertEqual([], list(t))
+
+
+# In[ ]:
+
+
+# test order statistics
+
+from unittest import TestCase
+import bisect
+import random
+
+def check_sizes(t):
+    def size_rec(node):
+        if not node:
+            return 0
+        size = 1 + size_rec(node.left) + size_rec(node.right)
+        tc.assertEqual(size, node.size)
+        return size
+    tc.assertEqual(len(t), size_rec(t.root))
+
+tc = TestCase()
+for cls in (BSTree, AVLTree):
+    t = cls()
+    keys = []
+    for k in random.sample(range(0, 2000, 2), 600):
+        t[k] = str(k)
+    for k in random.sample(range(0, 2000, 2), 300):
+        if k in t:
+            del t[k]
+    t[0] = 'zero'
+    keys = sorted(t)
+    check_sizes(t)
+    n = len(keys)
+
+    for k in range(-1, 2002, 7):
+        tc.assertEqual(bisect.bisect_left(keys, k), t.rank(k))
+    for i in range(n):
+        tc.assertEqual(keys[i], t.select(i))
+    tc.assertEqual(keys[-1], t.select(-1))
+    tc.assertEqual(keys[0], t.select(-n))
+    for i in (n, -n-1):
+        with tc.assertRaises(IndexError):
+            t.select(i)
+
+    for k in range(0, 2010, 3):
+        i = bisect.bisect_right(keys, k)
+        if i:
+            tc.assertEqual(keys[i-1], t.floor(k))
+        else:
+            with tc.assertRaises(KeyError):
+                t.floor(k)
+        i = bisect.bisect_left(keys, k)
+        if i < n:
+            tc.assertEqual(keys[i], t.ceiling(k))
+        else:
+            with tc.assertRaises(KeyError):
+                t.ceiling(k)
+    with tc.assertRaises(KeyError):
+        t.floor(-1)
+    tc.assertEqual(0, t.min_key())
+    tc.assertEqual(keys[-1], t.max_key())
+
+    for _ in range(100):
+        lo, hi = sorted(random.sample(range(-10, 2010), 2))
+        expected = [k for k in keys if lo <= k < hi]
+        tc.assertEqual(expected, list(t.irange(lo, hi)))
+        tc.assertEqual(expected[::-1], list(t.irange(lo, hi, reverse=True)))
+    tc.assertEqual(keys, list(t.irange()))
+    tc.assertEqual(keys[::-1], list(t.irange(reverse=True)))
+    tc.assertEqual([k for k in keys if k >= 1000], list(t.irange(lo=1000)))
+    tc.assertEqual([k for k in keys if k < 1000][::-1], list(t.irange(hi=1000, reverse=True)))
+    tc.assertEqual([], list(t.irange(500, 500)))
+    tc.assertEqual([], list(t.irange(600, 500, reverse=True)))
+
+    empty = cls()
+    tc.assertEqual(0, empty.rank(5))
+    tc.assertEqual([], list(empty.irange(0, 10)))
+    for method in (empty.min_key, empty.max_key):
+        with tc.assertRaises(KeyError):
+            method()
+    with tc.assertRaises(IndexError):
+        empty.select(0)
+
+# irange compares against only the keys on the paths to its ends
+t = AVLTree()
+for k in range(1000):
+    t[k] = k
+compared = []
+class Key(int):
+    def __lt__(self, other):
+        compared.append(other)
+        return int.__lt__(self, other)
+    def __gt__(self, other):
+        compared.append(other)
+        return int.__gt__(self, other)
+tc.assertEqual([500, 501, 502], list(t.irange(Key(500), Key(503))))
+tc.assertLess(len(compared), 30)
+compared.clear()
+tc.assertEqual([999, 998], list(t.irange(Key(998), Key(10**6), reverse=True)))
+tc.assertLess(len(compared), 30)
+
+
+# In[ ]:
+
+
+# test bulk construction
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+for cls in (BSTree, AVLTree):
+    for n in (0, 1, 2, 3, 10, 100, 255):
+        pairs = [(k, str(k)) for k in range(0, 2*n, 2)]
+        t = cls.from_sorted(pairs)
+        tc.assertIsInstance(t, cls)
+        tc.assertEqual(n, len(t))
+        tc.assertEqual(pairs, list(t.items()))
+        tc.assertEqual(n.bit_length(), t.height())
+        check_sizes(t)
+        if n:
+            tc.assertEqual(str(2*n-2), t[2*n-2])
+    check_avl(AVLTree.from_sorted((k, k) for k in range(77)))
+
+    # equal keys keep the last value; keys out of order are rejected
+    t = cls.from_sorted(iter([(1, 'a'), (2, 'b'), (2, 'c'), (3, 'd')]))
+    tc.assertEqual([(1, 'a'), (2, 'c'), (3, 'd')], list(t.items()))
+    with tc.assertRaises(ValueError):
+        cls.from_sorted([(1, 'a'), (3, 'b'), (2, 'c')])
+
+    # large and small batches, new and existing keys
+    for size, batch_size in ((300, 450), (300, 10), (0, 100), (100, 0)):
+        d = {k: 'old' for k in random.sample(range(900), size)}
+        t = cls()
+        for k in random.sample(list(d), len(d)):
+            t[k] = d[k]
+        batch = sorted((k, 'new') for k in random.sample(range(900), batch_size))
+        t.update(batch)
+        d.update(batch)
+        tc.assertEqual(sorted(d.items()), list(t.items()))
+        tc.assertEqual(len(d), len(t))
+        check_sizes(t)
+        if cls is AVLTree:
+            check_avl(t)
+        # merging (always, for an unbalanced tree) leaves the tree perfectly balanced
+        if not cls.balanced or batch_size > size // 10:
+            tc.assertEqual(len(t).bit_length(), t.height())
+
+    t = cls.from_sorted([(k, k) for k in range(10)])
+    with tc.assertRaises(ValueError):
+        t.update([(20, 0), (15, 0)])
+    tc.assertEqual(list(range(10)), list(t))
+
+# a small batch is merged into an unbalanced tree, rather than set key by key
+t = BSTree()
+for k in range(300):
+    t[k] = k
+t.update([(-1, 'new'), (150, 'changed')])
+tc.assertEqual(301, len(t))
+tc.assertEqual(9, t.height())
+tc.assertEqual('changed', t[150])
+
+# the existing nodes are reused by a merging update
+t = BSTree.from_sorted([(k, k) for k in range(100)])
+node = t._find(50)
+t.update((k, -k) for k in range(50, 300, 2))
+tc.assertIs(node, t._find(50))
+tc.assertEqual(-50, t[50])
+tc.assertEqual(51, t[51])
+tc.assertEqual(200, len(t))
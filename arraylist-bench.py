@@ -0,0 +1,430 @@
+# coding: utf-8
+
+# # ArrayList Benchmarks
+#
+# Timing comparisons for the `ArrayList` operations in `arraylist.py`. Run this file directly (`python arraylist-bench.py`) to print each table; pass one or more section names (e.g., `python arraylist-bench.py ranges`) to run only those.
+#
+# Note that importing `arraylist` also runs its test cells.
+
+# In[1]:
+
+
+import itertools
+import os
+import sys
+import timeit
+import tracemalloc
+from multiprocessing import shared_memory
+
+import random
+
+from arraylist import (ArrayList, BlockedArrayList, ConstrainedArray, IndexedArrayList,
+                       RecordArrayList, TypedArrayList, numpy)
+
+
+def best_of(stmt, setup, repeat=3):
+    """Returns the fastest of `repeat` single runs of `stmt`, in seconds.
+    `setup` is called before every run and its result passed to `stmt`."""
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        t = timeit.default_timer()
+        stmt(arg)
+        times.append(timeit.default_timer() - t)
+    return min(times)
+
+
+def filled(n, storage=None):
+    lst = ArrayList(storage=storage)
+    lst.extend(range(n))
+    return lst
+
+
+# ## Range insertion and deletion
+#
+# Inserting (or deleting) `k` elements in the middle of an `n`-element list with `k` calls to `insert` (or `del lst[i]`) shifts the tail `k` times; `insert_many` and `delete_range` shift it once.
+
+# In[2]:
+
+
+def bench_ranges(n=10000, ks=(10, 100, 500)):
+    print('{:>8} {:>6} {:>12} {:>12} {:>12} {:>12}'.format(
+        'n', 'k', 'insert x k', 'insert_many', 'del x k', 'del [i:j]'))
+    mid = n // 2
+    for k in ks:
+        vals = list(range(k))
+
+        def insert_each(lst):
+            for i, v in enumerate(vals):
+                lst.insert(mid+i, v)
+
+        def delete_each(lst):
+            for _ in range(k):
+                del lst[mid]
+
+        t_ins  = best_of(insert_each, lambda: filled(n))
+        t_many = best_of(lambda lst: lst.insert_many(mid, vals), lambda: filled(n))
+        t_del  = best_of(delete_each, lambda: filled(n))
+        t_rng  = best_of(lambda lst: lst.delete_range(mid, mid+k), lambda: filled(n))
+        print('{:>8} {:>6} {:>12.5f} {:>12.5f} {:>12.5f} {:>12.5f}'.format(
+            n, k, t_ins, t_many, t_del, t_rng))
+
+
+# ## Vectorized queries
+#
+# `min`, `max`, `count`, `index` and `in` on a `TypedArrayList`, with and without the NumPy fast path. (`count` and `in` look for a value that isn't present, and `index` for the last element, so each scans the whole list.) Larger sizes are timed only once.
+
+# In[3]:
+
+
+def bench_queries(sizes=(10**3, 10**4, 10**5, 10**6, 10**7)):
+    ops = [('min',   lambda lst: lst.min()),
+           ('max',   lambda lst: lst.max()),
+           ('count', lambda lst: lst.count(-1.0)),
+           ('index', lambda lst: lst.index(lst[-1])),
+           ('in',    lambda lst: -1.0 in lst)]
+    print('{:>10} {:>6} {:>12} {:>12} {:>9}'.format('n', 'op', 'python', 'numpy', 'speedup'))
+    for n in sizes:
+        lst = TypedArrayList('d')
+        lst.data = ConstrainedArray('d', (random.random() for _ in range(n)))
+        repeat = 3 if n < 10**6 else 1
+        for name, op in ops:
+            lst.use_numpy = False
+            t_py = best_of(op, lambda: lst, repeat)
+            if numpy is None:
+                print('{:>10} {:>6} {:>12.5f} {:>12} {:>9}'.format(n, name, t_py, 'n/a', ''))
+                continue
+            lst.use_numpy = True
+            t_np = best_of(op, lambda: lst, repeat)
+            print('{:>10} {:>6} {:>12.5f} {:>12.5f} {:>8.0f}x'.format(
+                n, name, t_py, t_np, t_py / t_np))
+
+
+# ## Storage backends
+#
+# The same workloads against the default (`'checked'`, i.e., `ConstrainedList`) and `'unchecked'` backing stores.
+
+# In[4]:
+
+
+def bench_storage(n=200000):
+    idxs = [random.randrange(n) for _ in range(n)]
+
+    def appends(lst):
+        for i in range(n):
+            lst.append(i)
+
+    def gets(lst):
+        for i in idxs:
+            lst[i]
+
+    def sets(lst):
+        for i in idxs:
+            lst[i] = i
+
+    def scan(lst):
+        for x in lst:
+            pass
+
+    ops = [('append', appends, lambda s: ArrayList(storage=s)),
+           ('get',    gets,    lambda s: filled(n, s)),
+           ('set',    sets,    lambda s: filled(n, s)),
+           ('iter',   scan,    lambda s: filled(n, s)),
+           ('count',  lambda lst: lst.count(-1), lambda s: filled(n, s)),
+           ('insert', lambda lst: lst.insert(0, -1), lambda s: filled(n, s))]
+    print('{:>8} {:>7} {:>12} {:>12} {:>9}'.format('n', 'op', 'checked', 'unchecked', 'speedup'))
+    for name, op, setup in ops:
+        t_chk = best_of(op, lambda: setup('checked'))
+        t_unc = best_of(op, lambda: setup('unchecked'))
+        print('{:>8} {:>7} {:>12.5f} {:>12.5f} {:>8.1f}x'.format(
+            n, name, t_chk, t_unc, t_chk / t_unc))
+
+
+# ## Bulk construction
+#
+# Copying and concatenating lists with a loop of `append`s, versus `copy`, `+` and `extend`, which reserve room for all the elements at once and copy them from the source list's store in a block (for `TypedArrayList`s of the same type, as a single buffer copy). As copies share storage until they are modified, the `copy` timings include forcing the copy to be made (the `copy`-only timing, which is O(1), is given as `lazy`, as is that of the lazy concatenation `concat` beside `+`).
+
+# In[5]:
+
+
+def bench_bulk(n=10**6):
+    def append_each(dst, src):
+        for i in range(len(src)):
+            dst.append(src[i])
+        return dst
+
+    print('{:>8} {:>15} {:>8} {:>12} {:>12} {:>9} {:>12}'.format(
+        'n', 'list', 'op', 'appends', 'bulk', 'speedup', 'lazy'))
+    for name, make in (('ArrayList', lambda: ArrayList()),
+                       ('TypedArrayList', lambda: TypedArrayList('d'))):
+        src = make()
+        src.extend(float(i) for i in range(n))
+        # (reading `data` gives a copy its own store)
+        ops = [('copy',   lambda: append_each(make(), src),
+                          lambda: src.copy().data,
+                          lambda: src.copy()),
+               ('+',      lambda: append_each(append_each(make(), src), src),
+                          lambda: src + src,
+                          lambda: src.concat(src)),
+               ('extend', lambda: append_each(make(), src),
+                          lambda: make().extend(src),
+                          None)]
+        for op, slow, fast, lazy in ops:
+            t_slow = best_of(lambda _: slow(), lambda: None, 1)
+            t_fast = best_of(lambda _: fast(), lambda: None)
+            t_lazy = '{:.5f}'.format(best_of(lambda _: lazy(), lambda: None)) if lazy else ''
+            print('{:>8} {:>15} {:>8} {:>12.5f} {:>12.5f} {:>8.1f}x {:>12}'.format(
+                n, name, op, t_slow, t_fast, t_slow / t_fast, t_lazy))
+
+
+# ## Blocked lists
+#
+# `k` inserts and deletes at random positions in an `n`-element `ArrayList`, which shifts O(n) elements for each, versus a `BlockedArrayList`, which only shifts the elements of one O(√n)-element chunk.
+
+# In[6]:
+
+
+def bench_blocked(sizes=(10**3, 10**4, 10**5), k=100):
+    print('{:>8} {:>6} {:>12} {:>12} {:>9}'.format('n', 'k', 'ArrayList', 'blocked', 'speedup'))
+    for n in sizes:
+        positions = [(random.randrange(n), random.randrange(n)) for _ in range(k)]
+
+        def edit(lst):
+            for i, j in positions:
+                lst.insert(i, -1)
+                del lst[j]
+
+        def make(cls):
+            lst = cls()
+            lst.extend(range(n))
+            return lst
+
+        t_arr = best_of(edit, lambda: make(ArrayList), 1)
+        t_blk = best_of(edit, lambda: make(BlockedArrayList))
+        print('{:>8} {:>6} {:>12.5f} {:>12.5f} {:>8.1f}x'.format(
+            n, k, t_arr, t_blk, t_arr / t_blk))
+
+
+# ## Parallel reductions
+#
+# `min`, `sum` and `count` on a `TypedArrayList` of `n` doubles (without NumPy), spread over increasing numbers of worker processes via `parallel_workers`; 1 worker is the sequential implementation. The speedup flattens out past the number of CPU cores (`os.cpu_count()`, printed first); part of it, which even a single core shows, comes from the workers reducing their slices with built-in functions over a `memoryview` rather than a Python loop. Each parallel call also pays a fixed cost, for copying the list into shared memory and starting the workers; the second table gives the time taken by a parallel `sum` of a 1000-element list, which is almost all overhead, and of copying the `n`-element list into shared memory alone.
+
+# In[7]:
+
+
+def bench_parallel(n=10**7, workers=(1, 2, 4, 8)):
+    print('cores:', os.cpu_count())
+    lst = TypedArrayList('d')
+    lst.data = ConstrainedArray('d', (random.random() for _ in range(n)))
+    lst.use_numpy = False
+    lst.parallel_min_size = 0
+    ops = [('min',   lambda lst: lst.min()),
+           ('sum',   lambda lst: lst.sum()),
+           ('count', lambda lst: lst.count(-1.0))]
+    print('{:>10} {:>6} {:>8} {:>12} {:>9}'.format('n', 'op', 'workers', 'time', 'speedup'))
+    for name, op in ops:
+        lst.parallel_workers = 1
+        t_seq = best_of(op, lambda: lst, 1)
+        for w in workers:
+            lst.parallel_workers = w
+            t = t_seq if w == 1 else best_of(op, lambda: lst, 1)
+            print('{:>10} {:>6} {:>8} {:>12.5f} {:>8.1f}x'.format(n, name, w, t, t_seq / t))
+
+    def copy_to_shm(lst):
+        shm = shared_memory.SharedMemory(create=True, size=n * lst.itemsize)
+        with lst.buffer() as view, view.cast('B') as src:
+            shm.buf[:len(src)] = src
+        shm.close()
+        shm.unlink()
+
+    small = TypedArrayList('d')
+    small.extend(random.random() for _ in range(1000))
+    small.parallel_min_size = 0
+    print()
+    print('{:>8} {:>16} {:>16}'.format('workers', 'sum(1000)', 'copy(n)'))
+    t_copy = best_of(copy_to_shm, lambda: lst)
+    for w in workers[1:]:
+        small.parallel_workers = w
+        print('{:>8} {:>16.5f} {:>16.5f}'.format(w, best_of(lambda l: l.sum(), lambda: small), t_copy))
+
+
+# ## Indexed lists
+#
+# `k` lookups with `in`, `index` and `count`, and `k` calls to `remove` (of values near the end of the list, so that the deletions shift few elements), on an `n`-element `ArrayList` and `IndexedArrayList`, along with the memory taken by the latter's index.
+
+# In[8]:
+
+
+def bench_indexed(sizes=(10**3, 10**4, 10**5), k=200):
+    print('{:>8} {:>7} {:>12} {:>12} {:>9}'.format('n', 'op', 'ArrayList', 'indexed', 'speedup'))
+    for n in sizes:
+        probes = [random.randrange(n) for _ in range(k)]
+        doomed = list(range(n-1, n-1-k, -1))
+
+        def make(cls):
+            lst = cls()
+            lst.extend(range(n))
+            if isinstance(lst, IndexedArrayList):
+                lst.index_memory() # (builds the index)
+            return lst
+
+        def removes(lst):
+            for x in doomed:
+                lst.remove(x)
+
+        ops = [('in',     lambda lst: [x in lst for x in probes]),
+               ('index',  lambda lst: [lst.index(x) for x in probes]),
+               ('count',  lambda lst: [lst.count(x) for x in probes]),
+               ('remove', removes)]
+        for name, op in ops:
+            t_arr = best_of(op, lambda: make(ArrayList), 1)
+            t_idx = best_of(op, lambda: make(IndexedArrayList))
+            print('{:>8} {:>7} {:>12.5f} {:>12.5f} {:>8.1f}x'.format(
+                n, name, t_arr, t_idx, t_arr / t_idx))
+        print('{:>8} {:>7} {:>12} {:>12}'.format(
+            n, 'memory', '', '{:.1f} MB'.format(make(IndexedArrayList).index_memory() / 2**20)))
+
+
+# ## Chunked iteration
+#
+# Consuming an `n`-element list in batches of `chunk` elements, built from plain iteration (with `itertools.islice`), versus those yielded by `iter_chunks`; and iterating in reverse by indexing (which is what `reversed` did before `ArrayList` had a `__reversed__` method), versus `reversed`.
+
+# In[9]:
+
+
+def bench_iteration(n=10**6, chunk=1024):
+    def scan(lst):
+        it = iter(lst)
+        batch = tuple(itertools.islice(it, chunk))
+        while batch:
+            for x in batch:
+                pass
+            batch = tuple(itertools.islice(it, chunk))
+
+    def scan_chunks(lst):
+        for batch in lst.iter_chunks(chunk):
+            for x in batch:
+                pass
+
+    def scan_indexed_reverse(lst):
+        for i in range(len(lst)-1, -1, -1):
+            lst[i]
+
+    def scan_reversed(lst):
+        for x in reversed(lst):
+            pass
+
+    print('{:>8} {:>15} {:>8} {:>12} {:>12} {:>9}'.format(
+        'n', 'list', 'order', 'elements', 'chunks', 'speedup'))
+    for name, make in (('checked', lambda: ArrayList()),
+                       ('unchecked', lambda: ArrayList(storage='unchecked')),
+                       ('TypedArrayList', lambda: TypedArrayList('d'))):
+        lst = make()
+        lst.extend(float(i) for i in range(n))
+        for order, slow, fast in (('forward', scan, scan_chunks),
+                                  ('reverse', scan_indexed_reverse, scan_reversed)):
+            t_slow = best_of(slow, lambda: lst)
+            t_fast = best_of(fast, lambda: lst)
+            print('{:>8} {:>15} {:>8} {:>12.5f} {:>12.5f} {:>8.1f}x'.format(
+                n, name, order, t_slow, t_fast, t_slow / t_fast))
+
+
+# ## Record lists
+#
+# `n` records of an integer, a short string and a float, stored as tuples in an `ArrayList` versus column-wise in a `RecordArrayList` (typing the numeric fields): the memory allocated to hold them (as measured by `tracemalloc`), and the time taken to find the minimum of the float field.
+
+# In[10]:
+
+
+def bench_records(n=10**5):
+    schema = [('id', 'q'), 'name', ('price', 'd')]
+    names = ['item' + str(i % 100) for i in range(100)]
+
+    def rows():
+        return ((i, names[i % 100], random.random()) for i in range(n))
+
+    def build_tuples():
+        lst = ArrayList()
+        lst.extend(rows())
+        return lst
+
+    def build_records():
+        lst = RecordArrayList(schema)
+        lst.extend(rows())
+        return lst
+
+    def tuples_min(lst):
+        it = iter(lst)
+        m = next(it)[2]
+        for r in it:
+            if r[2] < m:
+                m = r[2]
+        return m
+
+    print('{:>8} {:>12} {:>12} {:>12}'.format('n', 'list', 'memory', 'min(price)'))
+    for name, build, field_min in (('tuples', build_tuples, tuples_min),
+                                   ('records', build_records, lambda lst: lst.min('price'))):
+        tracemalloc.start()
+        lst = build()
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        t = best_of(field_min, lambda: lst)
+        print('{:>8} {:>12} {:>9.1f} MB {:>12.5f}'.format(n, name, mem / 2**20, t))
+
+
+# ## Lazy pipelines
+#
+# A map, filter and map over an `n`-element list, run eagerly (building an `ArrayList` after each stage) versus fused by `lazy()` and `collect`ed: the time taken, and the peak memory allocated along the way (as measured by `tracemalloc`).
+
+# In[11]:
+
+
+def bench_lazy(n=10**6):
+    lst = filled(n)
+    scale = lambda x: x * 3
+    odd = lambda x: x % 2
+    shift = lambda x: x + 1
+
+    def eager():
+        out = lst
+        for stage in (lambda l: map(scale, l), lambda l: filter(odd, l),
+                      lambda l: map(shift, l)):
+            step = ArrayList()
+            step.extend(stage(out))
+            out = step
+        return out
+
+    def fused():
+        return lst.lazy().map(scale).filter(odd).map(shift).collect()
+
+    print('{:>8} {:>8} {:>12} {:>12}'.format('n', 'mode', 'time', 'peak'))
+    for name, run in (('eager', eager), ('lazy', fused)):
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        t = best_of(lambda _: run(), lambda: None)
+        print('{:>8} {:>8} {:>12.5f} {:>9.1f} MB'.format(n, name, t, peak / 2**20))
+
+
+# In[ ]:
+
+
+BENCHMARKS = {
+    'ranges': bench_ranges,
+    'queries': bench_queries,
+    'storage': bench_storage,
+    'bulk': bench_bulk,
+    'blocked': bench_blocked,
+    'parallel': bench_parallel,
+    'indexed': bench_indexed,
+    'iteration': bench_iteration,
+    'records': bench_records,
+    'lazy': bench_lazy,
+}
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or BENCHMARKS:
+        print('==', name)
+        BENCHMARKS[name]()
+        print()
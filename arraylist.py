@@ -20,6 +20,8 @@
 # 
 # To help keep us honest, we've defined an API-constrained sub-class of the built-in list -- `ConstrainedList` -- an instance of which is assigned to the `data` attribute of each `ArrayList`. You should not change the definition of `ConstrainedList`, and ensure that your `ArrayList` implementation never assigns a regular Python list to its `data` attribute. So long as you use `ConstrainedList` in your implementation, you can be certain you're not performing any "illegal" operations (i.e., outside the constraints established above). If you invoke a disallowed operation, an appropriate exception will be raised.
 # 
+# Once an implementation has been tested, the checks are pure overhead. An `ArrayList` can therefore be created with `storage='unchecked'` (or with the `ARRAYLIST_STORAGE` environment variable set to `unchecked`), in which case its backing store is a built-in list that offers the same primitive array API without enforcing it. `ConstrainedList` remains the default, and is what the tests below expect.
+# 
 # Be sure to evaluate the following cell before testing your `ArrayList` implementation.
 
 # In[3]:
@@ -104,7 +106,7 @@ class ConstrainedList (list):
 # 6. Bulk operations
 # 7. Iteration
 # 
-# All told, there are 23 methods --- a handful of which have already been implemented for you --- whose behavior are specified in their docstrings below. Note that we left out API support for *slices* (e.g., `lst[start:stop:step]`); you can read about [how to support slices in the Python docs](https://docs.python.org/3.5/reference/datamodel.html#object.__length_hint__), but we just don't think it's worth the extra busywork.
+# All told, there are 23 methods --- a handful of which have already been implemented for you --- whose behavior are specified in their docstrings below. *Slices* (e.g., `lst[start:stop:step]`) are also supported: reading a slice returns a zero-copy `ArrayListView` onto the list (see *Slices and views*, below), while assigning to or deleting a slice modifies the list in place.
 # 
 # 
 # ### Hints / Advice
@@ -116,46 +118,366 @@ class ConstrainedList (list):
 # In[4]:
 
 
+import functools
+import operator
+import os
+import pickle
+import struct
+import sys
+import weakref
+
+# NumPy is optional; if it's available, queries over typed storage are vectorized
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _np_min(arr):
+    """Returns the minimum of ndarray arr, or None if it must be computed
+    in Python (because NumPy orders NaNs differently)."""
+    m = arr.min().item()
+    return m if m == m else None
+
+def _np_max(arr):
+    m = arr.max().item()
+    return m if m == m else None
+
+# number of elements summed at a time by `_np_sum`
+_SUM_BATCH = 1 << 16
+
+def _np_sum(arr, start=0):
+    """Returns start plus the sum of the elements of ndarray arr, added one
+    at a time from left to right (as in Python, so that the rounding is the
+    same), or None if it must be computed in Python (because the elements
+    are integers, whose sum could overflow, or start isn't a number)."""
+    if arr.dtype.kind != 'f' or not isinstance(start, (int, float)):
+        return None
+    # (a running sum, unlike `arr.sum`, adds the elements in order)
+    buf = numpy.empty(min(len(arr), _SUM_BATCH) + 1)
+    total = start
+    for i in range(0, len(arr), _SUM_BATCH):
+        batch = arr[i:i+_SUM_BATCH]
+        run = buf[:len(batch)+1]
+        run[0] = total
+        run[1:] = batch
+        total = numpy.cumsum(run, out=run)[-1].item()
+    return total
+
+def _np_scalar(arr, value):
+    """Returns value as a scalar of the dtype of ndarray arr, or None if it
+    isn't exactly representable as one (in which case NumPy's comparisons,
+    made after casting, could differ from Python's)."""
+    if not isinstance(value, (int, float)):
+        return None
+    try:
+        with numpy.errstate(all='ignore'):
+            scalar = arr.dtype.type(value)
+    except (OverflowError, ValueError):
+        return None
+    return scalar if scalar.item() == value else None
+
+def _np_count(arr, value):
+    """Returns the number of elements of ndarray arr equal to value, or None
+    if value can't be compared by NumPy the way Python would compare it."""
+    scalar = _np_scalar(arr, value)
+    if scalar is None:
+        return None
+    return int(numpy.count_nonzero(arr == scalar))
+
+def _np_find(arr, value):
+    """Returns the position of the first element of ndarray arr equal to
+    value, -1 if there's none, or None as for `_np_count`."""
+    scalar = _np_scalar(arr, value)
+    if scalar is None:
+        return None
+    mask = arr == scalar
+    pos = int(mask.argmax()) if len(mask) else 0
+    return pos if len(mask) and mask[pos] else -1
+
+_MASK64 = (1 << 64) - 1
+
+# runs shorter than this are extended by insertion sort before merging
+_MIN_RUN = 32
+
+# number of elements fetched at a time by `ArrayList.__reversed__`
+_ITER_BATCH = 256
+
+# header of the `ArrayList.dump` format: magic, format version, kind of
+# payload (pickled elements, or the raw buffer of a `TypedArrayList`) and
+# number of elements, followed (for raw buffers) by the typecode, item size
+# and byte order ('<' or '>')
+_DUMP_HEADER = struct.Struct('<4sBB2xQ')
+_DUMP_TYPED_HEADER = struct.Struct('<cBc5x')
+_DUMP_MAGIC = b'ALST'
+_DUMP_VERSION = 1
+_DUMP_PICKLED, _DUMP_RAW = 0, 1
+
+def _read_exact(fp, n):
+    buf = fp.read(n)
+    if len(buf) != n:
+        raise ValueError('Truncated ArrayList data')
+    return buf
+
+def _rebuild_arraylist(cls, state, payload):
+    """Unpickles an ArrayList (see `ArrayList.__reduce_ex__`)."""
+    lst = cls.__new__(cls)
+    lst.__dict__.update(state)
+    lst.data = lst._storage_from(payload)
+    return lst
+
+def _element_hash(x):
+    """Returns a well-mixed 64-bit hash of x, or None if x is unhashable."""
+    try:
+        h = hash(x)
+    except TypeError:
+        return None
+    h = (h * 0x9E3779B97F4A7C15) & _MASK64
+    return h ^ (h >> 29)
+
+
 class ArrayList:
-    def __init__(self):
-        self.data = ConstrainedList() # don't change this line!
+    # value left in backing-store slots that hold no element
+    _EMPTY_SLOT = None
+
+    # set to False (on the class or an instance) to disable the NumPy fast paths
+    use_numpy = numpy is not None
+
+    # content fingerprint (None unless tracked), and the number of unhashable
+    # elements, which make the fingerprint unusable
+    _fp = None
+    _fp_unhashable = 0
+
+    # the lists sharing this list's backing store (see `copy`), by id, or None
+    _sharers = None
+
+    # backing-store types, by name: 'checked' stores enforce the primitive
+    # array API, while 'unchecked' ones skip the checks for speed
+    STORAGE_BACKENDS = {'checked': ConstrainedList, 'unchecked': list}
+
+    def __init__(self, growth_factor=2, storage=None):
+        """Creates an empty list. The backing store grows geometrically by
+        `growth_factor` (which must be > 1) when full, and shrinks by the
+        same factor once it drops below 1/growth_factor**2 occupancy.
+
+        `storage` names one of the `STORAGE_BACKENDS` (or is a callable that
+        creates a backing store, which is empty unless the callable is passed
+        an initial sequence of slots). If omitted, the name is taken from
+        the ARRAYLIST_STORAGE environment variable, defaulting to 'checked'."""
+        if growth_factor <= 1:
+            raise ValueError('growth_factor must be greater than 1')
+        self.growth_factor = growth_factor
+        if storage is None:
+            storage = os.environ.get('ARRAYLIST_STORAGE', 'checked')
+        if not callable(storage):
+            if storage not in self.STORAGE_BACKENDS:
+                raise ValueError('Unknown storage backend: ' + repr(storage))
+            storage = self.STORAGE_BACKENDS[storage]
+        self.storage = storage
+        self.data = self._new_storage()
+
+    @property
+    def data(self):
+        # (the store may be modified through it, so it can't stay shared)
+        if self._sharers is not None:
+            self._unshare()
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        # every slot of a freshly assigned store is treated as in use
+        if self._sharers is not None:
+            del self._sharers[id(self)]
+            self._sharers = None
+        self._data = data
+        self._size = len(data)
+        if self._fp is not None:
+            self.track_fingerprint()
+
+    @property
+    def capacity(self):
+        """The number of slots in the backing store."""
+        return len(self._data)
+
+
+    ### capacity management ###
+
+    def _resize(self, capacity):
+        """Grows or shrinks the backing store, one slot at a time, to hold
+        exactly `capacity` slots. Never discards in-use slots."""
+        assert(capacity >= self._size)
+        if self._sharers is not None:
+            self._unshare()
+        data = self._data
+        if self._size == 0 and capacity > len(data):
+            # nothing to keep, so create the store at its new size
+            self._data = self._new_storage(self._blank_slots(capacity))
+            return
+        while len(data) < capacity:
+            data.append(None)
+        while len(data) > capacity:
+            del data[len(data)-1]
+
+    def _grow(self):
+        cap = len(self._data)
+        self._resize(max(cap+1, int(cap * self.growth_factor)))
+
+    def _reserve(self, n):
+        """Ensures the backing store has room for at least `n` elements."""
+        cap = len(self._data)
+        if n > cap:
+            self._resize(max(n, int(cap * self.growth_factor)))
+
+    def _maybe_shrink(self):
+        cap = len(self._data)
+        if self._size * self.growth_factor**2 < cap:
+            self._resize(max(self._size, int(cap / self.growth_factor)))
+
+
+    ### copy-on-write ###
+
+    def is_shared(self):
+        """Returns True if this list's backing store is shared with another
+        list (see `copy`)."""
+        return self._sharers is not None and len(self._sharers) > 1
+
+    def _unshare(self):
+        """Stops sharing the backing store, copying it if any other list is
+        still using it. Must be called before the store is modified."""
+        sharers, self._sharers = self._sharers, None
+        del sharers[id(self)]
+        if sharers:
+            self._data = self._copy_storage()
+
+    def _copy_storage(self):
+        """Returns a copy of the backing store, slot for slot."""
+        data = self._data
+        return self._new_storage([data[i] for i in range(len(data))])
 
     
+    ### content fingerprint ###
+
+    def track_fingerprint(self, enabled=True):
+        """Starts (or, if enabled is False, stops) maintaining a fingerprint
+        of this list's contents, which every mutation then updates in O(1)
+        time. Equality tests between two tracked lists with different
+        fingerprints are then decided without comparing elements."""
+        if enabled:
+            self._settle()
+            self._fp = 0
+            self._fp_unhashable = 0
+            for i in range(self._size):
+                self._fp_add(self._data[i])
+        else:
+            self._fp = None
+            self._fp_unhashable = 0
+
+    def fingerprint(self):
+        """Returns an integer fingerprint of this list's contents, which is
+        the same for any two lists with equal contents. (It is computed from
+        scratch if it isn't being tracked.) Returns None if the list contains
+        unhashable elements.
+
+        The fingerprint combines element hashes by (modular) addition, so
+        that it can be updated in O(1) time by insertions and deletions
+        anywhere in the list; as a result, lists containing the same elements
+        in different orders share a fingerprint."""
+        if self._fp is None:
+            self._settle()
+            fp = 0
+            for i in range(self._size):
+                h = _element_hash(self._data[i])
+                if h is None:
+                    return None
+                fp = (fp + h) & _MASK64
+            return fp
+        return self._fp if self._fp_unhashable == 0 else None
+
+    def _fp_add(self, x):
+        h = _element_hash(x)
+        if h is None:
+            self._fp_unhashable += 1
+        else:
+            self._fp = (self._fp + h) & _MASK64
+
+    def _fp_remove(self, x):
+        h = _element_hash(x)
+        if h is None:
+            self._fp_unhashable -= 1
+        else:
+            self._fp = (self._fp - h) & _MASK64
+
+
     ### subscript-based access ###
     
     def _normalize_idx(self, idx):
         nidx = idx
         if nidx < 0:
-            nidx += len(self.data)
+            nidx += self._size
             if nidx < 0:
                 nidx = 0
         return nidx
     
     def __getitem__(self, idx):
-        """Implements `x = self[idx]`"""
+        """Implements `x = self[idx]`. Slicing (`self[start:stop:step]`)
+        returns an `ArrayListView` onto this list's storage."""
+        if isinstance(idx, slice):
+            return ArrayListView(self, range(self._size)[idx])
         assert(isinstance(idx, int))
         nidx = self._normalize_idx(idx)
-        if nidx >= len(self.data):
+        if nidx >= self._size:
             raise IndexError
-        return self.data[nidx]
+        return self._data[nidx]
 
     def __setitem__(self, idx, value):
-        """Implements `self[idx] = x`"""
+        """Implements `self[idx] = x` and `self[start:stop:step] = iterable`"""
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self._size)
+            if step == 1:
+                self._replace_range(start, max(start, stop), list(value))
+            else:
+                indices = range(start, stop, step)
+                values = list(value)
+                if len(values) != len(indices):
+                    raise ValueError('attempt to assign sequence of size {} '
+                                     'to extended slice of size {}'.format(
+                                         len(values), len(indices)))
+                for i, x in zip(indices, values):
+                    self[i] = x
+            return
         assert(isinstance(idx, int))
         nidx = self._normalize_idx(idx)
-        if nidx >= len(self.data):
+        if nidx >= self._size:
             raise IndexError
-        self.data[nidx] = value
+        if self._sharers is not None:
+            self._unshare()
+        old = self._data[nidx]
+        self._data[nidx] = value
+        if self._fp is not None:
+            self._fp_remove(old)
+            self._fp_add(value)
 
     def __delitem__(self, idx):
-        """Implements `del self[idx]`"""
+        """Implements `del self[idx]` and `del self[start:stop:step]`"""
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self._size)
+            if step == 1:
+                self.delete_range(start, stop)
+            else:
+                self._delete_indices(range(start, stop, step))
+            return
         assert(isinstance(idx, int))
         nidx = self._normalize_idx(idx)
-        if nidx >= len(self.data):
+        if nidx >= self._size:
             raise IndexError
-        for i in range(nidx+1, len(self.data)):
-            self.data[i-1] = self.data[i]
-        del self.data[len(self.data)-1]
+        if self._sharers is not None:
+            self._unshare()
+        if self._fp is not None:
+            self._fp_remove(self._data[nidx])
+        for i in range(nidx+1, self._size):
+            self._data[i-1] = self._data[i]
+        self._size -= 1
+        self._data[self._size] = self._EMPTY_SLOT
+        self._maybe_shrink()
     
 
     ### stringification ###
@@ -166,7 +488,7 @@ class ArrayList:
         and enclosed by square brackets. E.g., for a list containing values
         1, 2 and 3, returns '[1, 2, 3]'."""
         # YOUR CODE HERE 
-        if len(self.data) == 0: 
+        if self._size == 0: 
             return '[]'
         else:
             return '[' + ', '.join(str(x) for x in self) + ']'
@@ -175,7 +497,7 @@ class ArrayList:
         
     def __repr__(self):
         """Supports REPL inspection. (Same behavior as `str`.)"""
-        if len(self.data) == 0: 
+        if self._size == 0: 
             return '[]'
         else:
             return '[' + ', '.join(str(x) for x in self) + ']'
@@ -186,29 +508,31 @@ class ArrayList:
     
     def append(self, value):
         """Appends value to the end of this list."""
-        self.data.append(None)
-        self.data[len(self.data)-1]=value
-        #raise NotImplementedError()
+        if self._size == len(self._data):
+            self._grow()
+        elif self._sharers is not None:
+            self._unshare()
+        self._data[self._size] = value
+        if self._fp is not None:
+            self._fp_add(value)
+        self._size += 1
     
     def insert(self, idx, value):
         """Inserts value at position idx, shifting the original elements down the
         list, as needed. Note that inserting a value at len(self) --- equivalent
         to appending the value --- is permitted. Raises IndexError if idx is invalid."""
-        # YOUR CODE HERE
-        if(idx > len(self.data)):
+        if idx < 0 or idx > self._size:
             raise IndexError
-        if idx < 0 :
-            raise IndexError
-        elif(idx==len(self.data)):
-            self.append(value)
-        else:
-            self.data.append(None)
-        for i in range(len(self.data)-1, idx, -1):
-
-            self.data[i]=self.data[i-1]
-            self.data[i-1]=None
-        self.__setitem__(idx, value)
-                #raise NotImplementedError()
+        if self._size == len(self._data):
+            self._grow()
+        elif self._sharers is not None:
+            self._unshare()
+        for i in range(self._size, idx, -1):
+            self._data[i] = self._data[i-1]
+        self._data[idx] = value
+        if self._fp is not None:
+            self._fp_add(value)
+        self._size += 1
     
     def pop(self, idx=-1):
         """Deletes and returns the element at idx (which is the last element,
@@ -223,105 +547,143 @@ class ArrayList:
     def remove(self, value):
         """Removes the first (closest to the front) instance of value from the
         list. Raises a ValueError if value is not found in the list."""
-        # YOUR CODE HERE
-        flag=0
-        for i in range(0, len(self.data)-1):
-            if self.data[i]==value:
-                self.__delitem__(i)
-                flag+=1
-                break
-        if flag == 0:
-            raise ValueError
-        #raise NotImplementedError()
+        self._settle()
+        for i in range(0, self._size):
+            if self._data[i] == value:
+                del self[i]
+                return
+        raise ValueError
     
 
     ### predicates (T/F queries) ###
     
     def __eq__(self, other):
         """Returns True if this ArrayList contains the same elements (in order) as
-        other. If other is not an ArrayList, returns False."""
-        same = False
-        if isinstance(other, ArrayList):
-            for i in range(0, len(self.data)-1):
-                if self.data[i] == other.data[i]:
-                    same = True
-                else:
-                    return false
-            return same
-       # raise NotImplementedError()
+        other. If other is not an ArrayList, returns False. (Comparisons with
+        an ArrayListView, BlockedArrayList or ArrayListConcat are delegated
+        to it.)"""
+        if isinstance(other, (ArrayListView, BlockedArrayList, ArrayListConcat)):
+            return other == self
+        if not isinstance(other, ArrayList) or self._size != other._size:
+            return False
+        if self._fp is not None and other._fp is not None \
+           and self._fp_unhashable == other._fp_unhashable == 0 \
+           and self._fp != other._fp:
+            return False
+        self._settle()
+        other._settle()
+        for i in range(0, self._size):
+            if self._data[i] != other._data[i]:
+                return False
+        return True
 
     def __contains__(self, value):
         """Implements `val in self`. Returns true if value is found in this list."""
-        found=False
-        for i in range(0, len(self.data)-1):
-            if self.data[i]==value:
-                found = True
-        return found
-        #raise NotImplementedError()
+        self._settle()
+        arr = self._ndarray()
+        if arr is not None:
+            pos = _np_find(arr, value)
+            if pos is not None:
+                return pos >= 0
+        for i in range(0, self._size):
+            if self._data[i] == value:
+                return True
+        return False
 
 
     ### queries ###
     
     def __len__(self):
         """Implements `len(self)`"""
-        count=0
-        for x in range(0, len(self.data)):
-            count+=1
-        return count
+        return self._size
     
     def min(self):
-        """Returns the minimum value in this list."""
-        min=self.data[0]
-        for x in range(0, len(self.data)-1):
-            if min > self.data[x]:
-                min=self.data[x]
+        """Returns the minimum value in this list. Raises ValueError if the
+        list is empty."""
+        if self._size == 0:
+            raise ValueError('min() of an empty list')
+        self._settle()
+        arr = self._ndarray()
+        if arr is not None and len(arr):
+            min = _np_min(arr)
+            if min is not None:
+                return min
+        min=self._data[0]
+        for x in range(1, self._size):
+            if min > self._data[x]:
+                min=self._data[x]
         return min
     
     def max(self):
-        """Returns the maximum value in this list."""
-        # YOUR CODE HERE
-        max=self.data[0]
-        for x in range(0, len(self.data)-1):
-            if max < self.data[x]:
-                max=self.data[x]
+        """Returns the maximum value in this list. Raises ValueError if the
+        list is empty."""
+        if self._size == 0:
+            raise ValueError('max() of an empty list')
+        self._settle()
+        arr = self._ndarray()
+        if arr is not None and len(arr):
+            max = _np_max(arr)
+            if max is not None:
+                return max
+        max=self._data[0]
+        for x in range(1, self._size):
+            if max < self._data[x]:
+                max=self._data[x]
         return max
-        #raise NotImplementedError()
     
     def index(self, value, i=0, j=None):
         """Returns the index of the first instance of value encountered in
         this list between index i (inclusive) and j (exclusive). If j is not
         specified, search through the end of the list for value. If value
         is not in the list, raise a ValueError."""
-        # YOUR CODE 
-        ValueFound=0
-        if j==None:
-            j=len(self.data)
-            start = self._normalize_idx(i)
-            end = self._normalize_idx(j)
-
-            for x in range(start, end):
-                if self.data[x]==value:
-                    ValueFound+=1
-                    return x
-            if ValueFound==0:
-                raise ValueError
-        if j!=None:
-            start = self._normalize_idx(i)
-            end = self._normalize_idx(j)
-
-            for x in range(start, end):
-                if self.data[x]==value:
-                    ValueFound+=1
-                    return x
-            if ValueFound==0:
-                raise ValueError
+        if j is None:
+            j = self._size
+        start = self._normalize_idx(i)
+        end = min(self._normalize_idx(j), self._size)
+        self._settle()
+        arr = self._ndarray()
+        if arr is not None:
+            pos = _np_find(arr[start:end], value)
+            arr = None # release the buffer before (possibly) raising
+            if pos is not None:
+                if pos < 0:
+                    raise ValueError
+                return start + pos
+        for x in range(start, end):
+            if self._data[x] == value:
+                return x
+        raise ValueError
+
+    def sum(self, start=0):
+        """Returns start plus the sum of the elements in this list."""
+        self._settle()
+        arr = self._ndarray()
+        if arr is not None:
+            total = _np_sum(arr, start)
+            if total is not None:
+                return total
+        total = start
+        for x in range(0, self._size):
+            total = total + self._data[x]
+        return total
+
+    def reduce(self, function, *initial):
+        """Returns `functools.reduce(function, self[, initial])`: function
+        applied cumulatively to the elements of this list, from left to right
+        (starting from initial, if given)."""
+        return functools.reduce(function, iter(self), *initial)
 
     def count(self, value):
         """Returns the number of times value appears in this list."""
-        # YOUR CODE HERE
+        self._settle()
+        arr = self._ndarray()
+        if arr is not None:
+            count = _np_count(arr, value)
+            if count is not None:
+                return count
         count=0
-        for x in range(0, len(self.data)):
-            if self.data[x]==value:
+        for x in range(0, self._size):
+            if self._data[x]==value:
                 count +=1
         return count
         #raise NotImplementedError()
@@ -333,40 +695,329 @@ class ArrayList:
         """Implements `self + other_array_list`. Returns a new ArrayList
         instance that contains the values in this list followed by those 
         of other."""
-        newarray = ArrayList ()
-        for i in range(0, len(self.data)):
-            newarray.append(self.data[i])
-        #newarray.data[i]=self.data[i]
-        #newarray.data.append(None)
-        #print(newarray.data[i], self.data[i])
-        for i in range(0, len(other.data)):
-            newarray.append(other.data[i])
-        #newarray.data.append(None)
-        #newarray.data[len(self.data)-1]=other.data[i]
-        #print(newarray.data[i], self.data[i])
+        newarray = self._empty_like()
+        newarray._reserve(len(self) + len(other))
+        newarray.extend(self)
+        newarray.extend(other)
         return newarray
+
+    def concat(self, other):
+        """Returns an `ArrayListConcat` of this list followed by other: the
+        lazy counterpart of `self + other`, which shares the storage of both
+        lists until it is modified."""
+        return ArrayListConcat(_concat_parts(self, self) + _concat_parts(other, self))
         
     def clear(self):
-        self.data = ConstrainedList() # don't change this!
+        self.data = self._new_storage()
+
+    def _new_storage(self, *initializer):
+        return self.storage(*initializer)
+
+    def _empty_like(self):
+        """Returns a new, empty list configured like this one."""
+        return ArrayList(self.growth_factor, self.storage)
+
+    def _blank_slots(self, n):
+        """Returns an initializer for a backing store of n empty slots."""
+        return [self._EMPTY_SLOT] * n
+
+    def _gather(self, start, stop):
+        """Returns a tuple of the elements in (valid) range [start, stop) of
+        the (settled) backing store."""
+        data = self._data
+        if type(data) is list:
+            # (an unchecked store can be sliced in one step)
+            return tuple(data[start:stop])
+        return tuple([data[i] for i in range(start, stop)])
+
+    @classmethod
+    def with_capacity(cls, n, *args, **kwargs):
+        """Returns a new, empty list (created by passing args and kwargs to
+        cls) with room for n elements."""
+        lst = cls(*args, **kwargs)
+        lst._reserve(n)
+        return lst
+
+    def _ndarray(self):
+        """Returns a NumPy array sharing this list's elements (which the
+        caller mustn't hold on to), or None if the elements aren't stored in
+        a typed buffer or NumPy isn't being used."""
+        return None
+
+    def _settle(self):
+        """Arranges for the elements to occupy slots [0, len(self)) of the
+        backing store, in order. (They always do, in an ArrayList.)"""
+        pass
         
     def copy(self):
-        """Returns a new ArrayList instance (with a separate data store), that
-        contains the same values as this list."""
-        newarray = ArrayList()
-        for i in range(0, len(self.data)):
-            newarray.append(self.data[i])
+        """Returns a new ArrayList instance that contains the same values as
+        this list. The two lists share a backing store until either of them
+        is modified, at which point it is given a copy of its own
+        (`is_shared` tells whether that has happened yet)."""
+        newarray = self._empty_like()
+        if type(newarray) is not type(self):
+            # (the store can only be shared with a list of the same kind)
+            newarray._reserve(self._size)
+            newarray.extend(self)
+            return newarray
+        self._settle()
+        if self._sharers is None:
+            self._sharers = weakref.WeakValueDictionary({id(self): self})
+        newarray.data = self._data
+        newarray._size = self._size
+        newarray._sharers = self._sharers
+        self._sharers[id(newarray)] = newarray
         return newarray
 
     def extend(self, other):
-        """Adds all elements, in order, from other --- an Iterable --- to this list."""
-        # YOUR CODE HERE
+        """Adds all elements, in order, from other --- an Iterable --- to this list.
+        Room for them is reserved up front, if their number is known."""
+        if isinstance(other, ArrayList):
+            # copy straight from the other list's store
+            other._settle()
+            values = [other._data[i] for i in range(other._size)]
+            self._replace_range(self._size, self._size, values)
+            return self
+        self._reserve(self._size + operator.length_hint(other))
         for i in other:
             self.append(i)
-        #self.data.append(None)
-        #self.data[len(self.data)-1]=other.data[i]
-        #print(other.data[i], self.data[i])
         return self
-        #raise NotImplementedError()
+
+    def insert_many(self, idx, iterable):
+        """Inserts all values from iterable, in order, starting at position
+        idx. The elements after idx are shifted down in a single pass.
+        Raises IndexError if idx is invalid."""
+        if idx < 0 or idx > self._size:
+            raise IndexError
+        self._replace_range(idx, idx, list(iterable))
+
+    def delete_range(self, i, j=None):
+        """Deletes the elements from index i (inclusive) to j (exclusive),
+        with the same clamping rules as `del self[i:j]`. The elements after
+        j are shifted up in a single pass."""
+        start, stop, _ = slice(i, j).indices(self._size)
+        if stop > start:
+            self._replace_range(start, stop, [])
+
+    def _replace_range(self, start, stop, values):
+        """Replaces the elements in [start, stop) with those in the list
+        values, shifting the tail (in a single pass) if the lengths differ."""
+        delta = len(values) - (stop - start)
+        size = self._size
+        if self._sharers is not None:
+            self._unshare()
+        if self._fp is not None:
+            removed = [self._data[x] for x in range(start, stop)]
+        if delta > 0:
+            self._reserve(size + delta)
+            for x in range(size-1, stop-1, -1):
+                self._data[x+delta] = self._data[x]
+        elif delta < 0:
+            for x in range(stop, size):
+                self._data[x+delta] = self._data[x]
+            for x in range(size+delta, size):
+                self._data[x] = self._EMPTY_SLOT
+        for x in range(len(values)):
+            self._data[start+x] = values[x]
+        if self._fp is not None:
+            for v in removed:
+                self._fp_remove(v)
+            for v in values:
+                self._fp_add(v)
+        self._size = size + delta
+        if delta < 0:
+            self._maybe_shrink()
+
+    def _delete_indices(self, indices):
+        """Deletes the elements at the given (distinct) indices, compacting
+        the remaining elements in a single pass."""
+        doomed = set(indices)
+        if not doomed:
+            return
+        if self._sharers is not None:
+            self._unshare()
+        dst = min(doomed)
+        if self._fp is not None:
+            for x in doomed:
+                self._fp_remove(self._data[x])
+        for src in range(dst, self._size):
+            if src not in doomed:
+                self._data[dst] = self._data[src]
+                dst += 1
+        for x in range(dst, self._size):
+            self._data[x] = self._EMPTY_SLOT
+        self._size = dst
+        self._maybe_shrink()
+
+
+    ### sorting ###
+
+    def sort(self, key=None, reverse=False):
+        """Sorts this list in place, stably, by the values of `key` (if
+        given) applied to each element, in descending order if `reverse`.
+
+        Uses a natural merge sort: runs of elements that are already in
+        (or in strictly reversed) order are found and merged, so sorted and
+        nearly-sorted lists are sorted in close to linear time."""
+        n = self._size
+        if n < 2:
+            return
+        self._settle()
+        if self._sharers is not None:
+            self._unshare()
+        data = self._data
+        keys = [data[i] if key is None else key(data[i]) for i in range(n)]
+
+        def before(a, b):
+            return b < a if reverse else a < b
+
+        def insertion_sort(start, sorted_end, end):
+            # extends the sorted run [start, sorted_end) to [start, end)
+            for k in range(sorted_end, end):
+                x, kx = data[k], keys[k]
+                lo, hi = start, k
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if before(kx, keys[mid]):
+                        hi = mid
+                    else:
+                        lo = mid + 1
+                for i in range(k, lo, -1):
+                    data[i] = data[i-1]
+                    keys[i] = keys[i-1]
+                data[lo] = x
+                keys[lo] = kx
+
+        def merge(start, mid, end):
+            # merges the sorted runs [start, mid) and [mid, end)
+            left = [data[i] for i in range(start, mid)]
+            left_keys = keys[start:mid]
+            i, j, dst = 0, mid, start
+            try:
+                while i < len(left) and j < end:
+                    if before(keys[j], left_keys[i]):
+                        data[dst], keys[dst] = data[j], keys[j]
+                        j += 1
+                    else:
+                        data[dst], keys[dst] = left[i], left_keys[i]
+                        i += 1
+                    dst += 1
+            finally:
+                # (if a comparison raises, this still leaves a permutation of
+                # the original elements, as `list.sort` does)
+                while i < len(left):
+                    data[dst], keys[dst] = left[i], left_keys[i]
+                    i += 1
+                    dst += 1
+
+        runs = []
+        start = 0
+        while start < n:
+            end = start + 1
+            if end < n and before(keys[end], keys[start]):
+                while end < n and before(keys[end], keys[end-1]):
+                    end += 1
+                for i in range((end - start) // 2):
+                    a, b = start + i, end - 1 - i
+                    data[a], data[b] = data[b], data[a]
+                    keys[a], keys[b] = keys[b], keys[a]
+            else:
+                while end < n and not before(keys[end], keys[end-1]):
+                    end += 1
+            run_end = min(n, max(end, start + _MIN_RUN))
+            insertion_sort(start, end, run_end)
+            runs.append((start, run_end))
+            start = run_end
+
+        while len(runs) > 1:
+            merged = []
+            for r in range(0, len(runs)-1, 2):
+                (start, mid), (_, end) = runs[r], runs[r+1]
+                merge(start, mid, end)
+                merged.append((start, end))
+            if len(runs) % 2:
+                merged.append(runs[-1])
+            runs = merged
+
+
+    ### serialization ###
+
+    def dump(self, fp):
+        """Writes this list to the binary file fp, in a format that `load`
+        can read back. (The elements of a `TypedArrayList` are written as a
+        raw buffer; those of other lists are pickled.)"""
+        self._settle()
+        fp.write(_DUMP_HEADER.pack(_DUMP_MAGIC, _DUMP_VERSION, _DUMP_PICKLED, self._size))
+        pickle.dump([self._data[i] for i in range(self._size)], fp, protocol=5)
+
+    @classmethod
+    def load(cls, fp, growth_factor=2, storage=None):
+        """Reads a list written by `dump` from the binary file fp. A list of
+        raw typed elements is loaded into a `TypedArrayList` (or cls, if it
+        is a subclass of that) by reading it directly into its storage; the
+        elements of any other list are sorted, if cls is `SortedArrayList`.
+        As those elements are unpickled, data from an untrusted source must
+        never be loaded (see the warning in the `pickle` documentation)."""
+        magic, version, kind, count = _DUMP_HEADER.unpack(_read_exact(fp, _DUMP_HEADER.size))
+        if magic != _DUMP_MAGIC:
+            raise ValueError('Not ArrayList data')
+        if version != _DUMP_VERSION:
+            raise ValueError('Unsupported ArrayList data version: ' + str(version))
+        if kind == _DUMP_RAW:
+            typecode, itemsize, byteorder = _DUMP_TYPED_HEADER.unpack(
+                _read_exact(fp, _DUMP_TYPED_HEADER.size))
+            if not issubclass(cls, TypedArrayList):
+                cls = TypedArrayList
+            lst = cls(typecode.decode('ascii'), growth_factor, storage)
+            if lst.itemsize != itemsize:
+                raise ValueError('Item size of typecode {!r} differs from that of the data'.format(
+                    lst.typecode))
+            # data in the other byte order is read into (and swapped in) a
+            # plain array, as the store doesn't offer `byteswap`
+            swap = byteorder != (b'<' if sys.byteorder == 'little' else b'>')
+            if swap:
+                target = array.array(lst.typecode, bytes(count * itemsize))
+            else:
+                lst.data = target = lst._new_storage(bytes(count * itemsize))
+            with memoryview(target) as view, view.cast('B') as buf:
+                pos = 0
+                while pos < len(buf):
+                    n = fp.readinto(buf[pos:])
+                    if not n:
+                        raise ValueError('Truncated ArrayList data')
+                    pos += n
+            if swap:
+                target.byteswap()
+                lst.data = lst._new_storage(target.tobytes())
+        elif kind == _DUMP_PICKLED:
+            if issubclass(cls, TypedArrayList):
+                raise ValueError('ArrayList data is not typed')
+            items = pickle.load(fp)
+            if len(items) != count:
+                raise ValueError('Corrupt ArrayList data')
+            if issubclass(cls, SortedArrayList):
+                items.sort()
+            lst = cls(growth_factor, storage)
+            lst.data = lst._new_storage(items)
+        else:
+            raise ValueError('Unknown kind of ArrayList data: ' + str(kind))
+        return lst
+
+    def __reduce_ex__(self, protocol):
+        """Pickles the elements as a plain list, and the other attributes
+        (other than the backing store) as they are."""
+        self._settle()
+        state = dict(self.__dict__)
+        del state['_data']
+        state.pop('_sharers', None)
+        return (_rebuild_arraylist, (type(self), state, self._pickle_payload(protocol)))
+
+    def _pickle_payload(self, protocol):
+        return [self._data[i] for i in range(self._size)]
+
+    def _storage_from(self, payload):
+        """Returns a backing store holding the elements of a pickle payload."""
+        return self._new_storage(payload)
 
             
     ### iteration ###
@@ -374,247 +1025,3811 @@ class ArrayList:
     def __iter__(self):
         """Supports iteration (via `iter(self)`)"""
         #code
-        for i in range(0, len(self.data)):
-            yield self.data[i]
+        for i in range(0, self._size):
+            yield self._data[i]
         #raise NotImplementedError()
 
+    def iter_chunks(self, n):
+        """Yields the elements of this list, in order, as tuples of (at most)
+        n consecutive elements. Each tuple is copied from the backing store
+        in one pass (for a `TypedArrayList`, as a single buffer copy), which
+        saves the per-element cost of resuming `__iter__` for consumers that
+        process elements in batches. Raises ValueError (immediately) if n
+        is less than 1."""
+        if n < 1:
+            raise ValueError('Chunk size must be at least 1')
+        return self._iter_chunks(n)
 
-# In[5]:
+    def _iter_chunks(self, n):
+        start = 0
+        while start < self._size:
+            stop = min(start + n, self._size)
+            self._settle()
+            yield self._gather(start, stop)
+            start = stop
 
+    def lazy(self):
+        """Returns an `ArrayListPipeline` over the elements of this list, for
+        chaining lazily evaluated map, filter, take and enumerate stages."""
+        return ArrayListPipeline(self)
 
-# (6 points) test subscript-based access
+    def __reversed__(self):
+        """Supports iteration in reverse order (via `reversed(self)`),
+        fetching elements from the backing store in batches."""
+        stop = self._size
+        while stop > 0:
+            start = max(0, stop - _ITER_BATCH)
+            self._settle()
+            yield from reversed(self._gather(start, stop))
+            stop = min(start, self._size)
 
-from unittest import TestCase
-import random
 
-tc = TestCase()
-lst = ArrayList()
-data = [1, 2, 3, 4]
-lst.data = ConstrainedList(data)
+# ## Slices and views
+# 
+# Reading a slice of an `ArrayList` doesn't copy anything: `lst[start:stop:step]` returns an `ArrayListView`, which refers back to `lst` and the range of indexes selected by the slice. Views support indexing (including further slicing, which yields another view onto the same list), iteration, the read-only queries of `ArrayList`, and writing elements (or slices, as for the list itself) through to the underlying list. Because a view is "live", changes to the underlying list are visible through it; a view whose range has been truncated by deletions raises `IndexError` when a missing element is accessed. Use `materialize` to obtain an independent `ArrayList` copy.
 
-for i in range(len(data)):
-    tc.assertEqual(lst[i], data[i])
-    
-with tc.assertRaises(IndexError):
-    x = lst[100]
+# In[ ]:
 
-with tc.assertRaises(IndexError):
-    lst[100] = 0
 
-with tc.assertRaises(IndexError):
-    del lst[100]
+class ArrayListView:
+    def __init__(self, parent, indices):
+        """Creates a view onto the elements of ArrayList parent at the
+        indexes in range indices."""
+        self.parent = parent
+        self.indices = indices
 
-lst[1] = data[1] = 20
-del data[0]
-del lst[0]
+    def _parent_idx(self, idx):
+        pidx = self.indices[idx]
+        if pidx >= self.parent._size:
+            raise IndexError
+        return pidx
 
-for i in range(len(data)):
-    tc.assertEqual(lst[i], data[i])
+    def __getitem__(self, idx):
+        """Implements `x = self[idx]`; slicing returns another view."""
+        if isinstance(idx, slice):
+            return ArrayListView(self.parent, self.indices[idx])
+        return self.parent[self._parent_idx(idx)]
 
-data = [random.randint(1, 100) for _ in range(100)]
-lst.data = ConstrainedList(data)
-for i in range(len(data)):
-    lst[i] = data[i] = random.randint(101, 200)
-for i in range(50):
-    to_del = random.randrange(len(data))
-    del lst[to_del]
-    del data[to_del]
+    def __setitem__(self, idx, value):
+        """Implements `self[idx] = x` and `self[start:stop:step] = iterable`,
+        updating the underlying list. As for lists, only a contiguous range
+        may be replaced by a sequence of a different length."""
+        if isinstance(idx, slice):
+            r = self.indices[idx]
+            if r and max(r[0], r[-1]) >= self.parent._size:
+                raise IndexError
+            values = list(value)
+            if (idx.step not in (None, 1) or self.indices.step != 1) \
+               and len(values) != len(r):
+                raise ValueError('attempt to assign sequence of size {} '
+                                 'to extended slice of size {}'.format(
+                                     len(values), len(r)))
+            self.parent[r.start:r.stop if r.stop >= 0 else None:r.step] = values
+            return
+        self.parent[self._parent_idx(idx)] = value
 
-for i in range(len(data)):
-    tc.assertEqual(lst[i], data[i])
-    
-for i in range(0, -len(data), -1):
-    tc.assertEqual(lst[i], data[i])
+    def __len__(self):
+        return len(self.indices)
 
+    def __iter__(self):
+        parent = self.parent
+        for pidx in self.indices:
+            yield parent[pidx]
 
-# In[6]:
+    def __str__(self):
+        return '[' + ', '.join(str(x) for x in self) + ']'
 
+    def __repr__(self):
+        return str(self)
 
-# (4 points) test stringification
+    def __eq__(self, other):
+        """Returns True if other is an ArrayList, BlockedArrayList,
+        ArrayListConcat or ArrayListView with the same elements (in order) as
+        this view."""
+        if not isinstance(other, (ArrayList, BlockedArrayList, ArrayListConcat, ArrayListView)) \
+           or len(self) != len(other):
+            return False
+        for x, y in zip(self, other):
+            if x != y:
+                return False
+        return True
 
-from unittest import TestCase
-tc = TestCase()
+    def _ndarray(self):
+        arr = self.parent._ndarray()
+        r = self.indices
+        if arr is None or not r:
+            return None
+        if max(r[0], r[-1]) >= len(arr):
+            return None
+        return arr[r.start:r.stop if r.stop >= 0 else None:r.step]
 
-lst = ArrayList()
-tc.assertIsInstance(lst.data, ConstrainedList)
-tc.assertEqual('[]', str(lst))
-tc.assertEqual('[]', repr(lst))
+    def __contains__(self, value):
+        arr = self._ndarray()
+        if arr is not None:
+            pos = _np_find(arr, value)
+            if pos is not None:
+                return pos >= 0
+        for x in self:
+            if x == value:
+                return True
+        return False
 
-lst.data = ConstrainedList([1])
-tc.assertEqual('[1]', str(lst))
-tc.assertEqual('[1]', repr(lst))
+    def min(self):
+        arr = self._ndarray()
+        if arr is not None:
+            min = _np_min(arr)
+            if min is not None:
+                return min
+        if not self.indices:
+            raise ValueError('min() of an empty list')
+        it = iter(self)
+        min = next(it)
+        for x in it:
+            if min > x:
+                min = x
+        return min
 
-lst.data = ConstrainedList([10, 20, 30, 40, 50])
-tc.assertEqual('[10, 20, 30, 40, 50]', str(lst))
-tc.assertEqual('[10, 20, 30, 40, 50]', repr(lst))
+    def max(self):
+        arr = self._ndarray()
+        if arr is not None:
+            max = _np_max(arr)
+            if max is not None:
+                return max
+        if not self.indices:
+            raise ValueError('max() of an empty list')
+        it = iter(self)
+        max = next(it)
+        for x in it:
+            if max < x:
+                max = x
+        return max
 
+    def index(self, value, i=0, j=None):
+        """Returns the index (relative to this view) of the first instance of
+        value between index i (inclusive) and j (exclusive). Raises ValueError
+        if value is not found."""
+        r = range(len(self.indices))[i:j]
+        arr = self._ndarray()
+        if arr is not None:
+            pos = _np_find(arr[r.start:r.stop], value)
+            arr = None
+            if pos is not None:
+                if pos < 0:
+                    raise ValueError
+                return r.start + pos
+        for x in r:
+            if self[x] == value:
+                return x
+        raise ValueError
 
-# In[207]:
+    def count(self, value):
+        arr = self._ndarray()
+        if arr is not None:
+            count = _np_count(arr, value)
+            if count is not None:
+                return count
+        count = 0
+        for x in self:
+            if x == value:
+                count += 1
+        return count
 
+    lazy = ArrayList.lazy
 
-# (8 points) test single-element manipulation
+    def materialize(self):
+        """Returns a new ArrayList containing the elements of this view."""
+        newarray = self.parent._empty_like()
+        newarray.extend(self)
+        return newarray
 
-from unittest import TestCase
-import random
 
-tc = TestCase()
-lst = ArrayList()
-data = []
+# ## Typed lists
+# 
+# An `ArrayList` stores references to boxed Python objects. For homogeneous numeric data, `TypedArrayList` stores the values themselves in a single contiguous buffer, using the [`array`](https://docs.python.org/3/library/array.html) module's type codes (e.g., `'d'` for C doubles, `'q'` for 64-bit signed integers). Its backing store is a `ConstrainedArray` --- a typed counterpart to `ConstrainedList` that offers the same primitive array API (with `append(None)` growing the array by a single zero-filled slot).
+# 
+# `buffer` returns a `memoryview` onto the list's elements, which can be handed to NumPy (`numpy.frombuffer`), `struct`, or a binary file's `write` without copying. Note that, as with `array.array`, the list cannot grow or shrink while a view is held, so release it (e.g., by using it in a `with` statement) before resizing.
+# 
+# `min`, `max`, `count`, `sum` and `reduce` can be spread over several processes: setting `parallel_workers` (on the class or an instance) to more than 1 makes them, for lists of at least `parallel_min_size` (by default, ten million) elements, copy the elements into a [`multiprocessing.shared_memory`](https://docs.python.org/3/library/multiprocessing.shared_memory.html) block, reduce one slice of it in each of that many worker processes, and combine the partial results. Each call pays for that setup: copying the elements (O(n), at memory speed) and starting the worker processes (several milliseconds each, even when they are forked), which is why only large lists are reduced in parallel. (The function passed to `reduce` must therefore be associative, and, where worker processes are not forked, picklable --- e.g., one defined at the top level of a module, or from `operator`. The order in which floating-point values are added differs from a sequential `sum`, which may change the last bits of the result.)
 
-for _ in range(100):
-    to_add = random.randrange(1000)
-    data.append(to_add)
-    lst.append(to_add)
+# In[ ]:
 
-tc.assertIsInstance(lst.data, ConstrainedList)
-tc.assertEqual(data, lst.data._as_list())
 
-for _ in range(100):
-    to_ins = random.randrange(1000)
-    ins_idx = random.randrange(len(data)+1)
-    data.insert(ins_idx, to_ins)
-    lst.insert(ins_idx, to_ins)
+import array
+import multiprocessing
+from multiprocessing import shared_memory
 
-tc.assertEqual(data, lst.data._as_list())
+def _mp_context():
+    # forked workers (where available) are handed their arguments as they
+    # are, rather than re-importing this module to unpickle them
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
 
-for _ in range(100):
-    pop_idx = random.randrange(len(data))
-    tc.assertEqual(data.pop(pop_idx), lst.pop(pop_idx))
-    
-tc.assertEqual(data, lst.data._as_list())
+def _reduce_chunk(conn, shm, typecode, start, stop, use_numpy, op, args):
+    """Runs in a worker process: reduces elements [start, stop) of the
+    typed array in SharedMemory block shm, and sends (True, result), or
+    (False, exception), over connection conn."""
+    try:
+        with shm.buf.cast(typecode) as elements, elements[start:stop] as view:
+            arr = numpy.frombuffer(view, dtype=typecode) if use_numpy else None
+            result = None
+            if op == 'min':
+                result = _np_min(arr) if arr is not None else None
+                if result is None:
+                    result = min(view)
+            elif op == 'max':
+                result = _np_max(arr) if arr is not None else None
+                if result is None:
+                    result = max(view)
+            elif op == 'count':
+                result = _np_count(arr, args[0]) if arr is not None else None
+                if result is None:
+                    result = operator.countOf(view, args[0])
+            elif op == 'sum':
+                result = _np_sum(arr) if arr is not None else None
+                if result is None:
+                    result = sum(view)
+            else:
+                result = functools.reduce(args[0], view)
+            arr = None
+        conn.send((True, result))
+    except Exception as e:
+        conn.send((False, e))
+    finally:
+        shm.close()
+        conn.close()
 
-for _ in range(25):
-    to_rem = data[random.randrange(len(data))]
-    data.remove(to_rem)
-    lst.remove(to_rem)
-    
-tc.assertEqual(data, lst.data._as_list())
+class ConstrainedArray (array.array):
+    """Constrains the array class so it offers only the primitive array API
+    of `ConstrainedList`, where `lst.append(None)` adds a zero-filled slot.
+    The underlying buffer may still be accessed via `memoryview`."""
 
-with tc.assertRaises(ValueError):
-    lst.remove(9999)
+    def append(self, value):
+        if value is not None:
+            raise ValueError('Can only append None to constrained array!')
+        super().append(0)
 
+    def __getitem__(self, idx):
+        if idx < 0 or idx >= len(self):
+            raise ValueError('Can only use positive, valid indexes on constrained arrays!')
+        return super().__getitem__(idx)
 
-# In[208]:
+    def __setitem__(self, idx, value):
+        if idx < 0 or idx >= len(self):
+            raise ValueError('Can only use positive, valid indexes on constrained arrays!')
+        super().__setitem__(idx, value)
 
+    def __delitem__(self, idx):
+        if idx != len(self)-1:
+            raise ValueError('Can only delete last item in constrained array!')
+        super().__delitem__(idx)
 
-# (4 points) test predicates
+    def __getattribute__(self, name):
+        if name in ('insert', 'pop', 'remove', 'index', 'count', 'extend',
+                    'reverse', 'byteswap', 'fromlist', 'frombytes', 'fromfile',
+                    'fromunicode', 'tolist', 'tobytes', 'tofile', 'tounicode'):
+            raise AttributeError('Method "' + name + '" not supported on constrained array!')
+        else:
+            return super().__getattribute__(name)
 
-from unittest import TestCase
-tc = TestCase()
-lst = ArrayList()
-lst2 = ArrayList()
+    def __add__(self, value):
+        raise AttributeError('Constrained arrays do not support `+`!')
 
-lst.data = ConstrainedList([])
-lst2.data = ConstrainedList([1, 2, 3])
-tc.assertNotEqual(lst, lst2)
+    def __contains__(self, value):
+        raise AttributeError('Constrained arrays do not support `in`!')
 
-lst.data = ConstrainedList([1, 2, 3])
-tc.assertEqual(lst, lst2)
+    def __eq__(self, value):
+        raise AttributeError('Constrained arrays do not support `==`!')
 
-lst.data = ConstrainedList([])
-tc.assertFalse(1 in lst)
-tc.assertFalse(None in lst)
+    def __iter__(self):
+        raise AttributeError('Constrained arrays do not support iteration!')
 
-lst.data = ConstrainedList(range(100))
-tc.assertFalse(100 in lst)
-tc.assertTrue(50 in lst)
+    def __str__(self):
+        raise AttributeError('Constrained arrays do not support stringification!')
 
+    def __repr__(self):
+        raise AttributeError('Constrained arrays do not support stringification!')
 
-# In[209]:
+    # for testing only! (don't use this in your ArrayList implementation)
 
+    def _as_list(self):
+        return list(super().__iter__())
 
-# (10 points) test queries
 
-from unittest import TestCase
-tc = TestCase()
-lst = ArrayList()
+class UncheckedArray (array.array):
+    """An array whose `append(None)` adds a zero-filled slot, as for
+    `ConstrainedArray`, but that is otherwise unrestricted."""
 
-tc.assertEqual(0, len(lst))
-tc.assertEqual(0, lst.count(1))
-with tc.assertRaises(ValueError):
-    lst.index(1)
+    def append(self, value):
+        super().append(0 if value is None else value)
 
-import random
-data = [random.randrange(1000) for _ in range(100)]
-lst.data = ConstrainedList(data)
 
-tc.assertEqual(100, len(lst))
-tc.assertEqual(min(data), lst.min())
-tc.assertEqual(max(data), lst.max())
-for x in data:    
-    tc.assertEqual(data.index(x), lst.index(x))
-    tc.assertEqual(data.count(x), lst.count(x))
+class TypedArrayList (ArrayList):
+    _EMPTY_SLOT = 0
 
+    STORAGE_BACKENDS = {'checked': ConstrainedArray, 'unchecked': UncheckedArray}
+
+    def __init__(self, typecode, growth_factor=2, storage=None):
+        """Creates an empty list whose elements are stored as the C type
+        designated by `typecode` (see the `array` module). `storage` is as
+        for `ArrayList`, but callables are passed the typecode."""
+        self.typecode = typecode
+        # a one-element array that single values are stored into first, to
+        # check (without allocating) that they can be
+        self._slot = array.array(typecode, bytes(array.array(typecode).itemsize))
+        super().__init__(growth_factor, storage)
+
+    # set to more than 1 to spread reductions over that many processes (for
+    # lists of at least parallel_min_size elements)
+    parallel_workers = 1
+    parallel_min_size = 10**7
+
+    def _new_storage(self, *initializer):
+        return self.storage(self.typecode, *initializer)
+
+    def _empty_like(self):
+        return TypedArrayList(self.typecode, self.growth_factor, self.storage)
+
+    def _ndarray(self):
+        if numpy is None or not self.use_numpy or self.typecode in 'uw' or self._size == 0:
+            return None
+        return numpy.frombuffer(self._data, dtype=self.typecode)[:self._size]
+
+    @property
+    def itemsize(self):
+        """The size, in bytes, of each element."""
+        return self._data.itemsize
+
+    def buffer(self):
+        """Returns a writable `memoryview` onto this list's elements (without
+        copying). The list can't be resized until the view is released. (A
+        list sharing its storage with copies is first given its own.)"""
+        if self._sharers is not None:
+            self._unshare()
+        return memoryview(self._data)[:self._size]
+
+    def _view(self):
+        # a read-only view onto the elements, which (unlike `buffer`) leaves
+        # storage shared with copies as it is
+        return memoryview(self._data)[:self._size].toreadonly()
+
+    def _blank_slots(self, n):
+        return bytes(n * self.itemsize)
+
+    # values are checked before the list is changed, so that one that can't
+    # be stored (and raises TypeError or OverflowError) leaves it as it was
+
+    def _check_values(self, values):
+        array.array(self.typecode, values)
+
+    def __setitem__(self, idx, value):
+        if not isinstance(idx, slice):
+            self._slot[0] = value
+        super().__setitem__(idx, value)
+
+    def append(self, value):
+        self._slot[0] = value
+        super().append(value)
+
+    def insert(self, idx, value):
+        self._slot[0] = value
+        super().insert(idx, value)
+
+    def _replace_range(self, start, stop, values):
+        self._check_values(values)
+        super()._replace_range(start, stop, values)
+
+    def _copy_storage(self):
+        return self._new_storage(bytes(self._data))
+
+    def _gather(self, start, stop):
+        if self.typecode in 'uw':
+            return super()._gather(start, stop)
+        with memoryview(self._data) as view, view[start:stop] as part:
+            return tuple(part.tolist())
+
+    def _parallel(self):
+        """Returns True if reductions should be spread over processes."""
+        return self.parallel_workers > 1 and self._size >= max(1, self.parallel_min_size) \
+            and self.typecode not in 'uw'
+
+    def _reduce_chunks(self, op, *args):
+        """Returns the results of reducing each of parallel_workers slices of
+        this list (by `_reduce_chunk`), each in its own worker process."""
+        # (the workers are started afresh for each call, rather than kept in
+        # a pool, so that they are handed their arguments --- including a
+        # function passed to `reduce` --- as they are, without pickling)
+        n, workers = self._size, self.parallel_workers
+        bounds = [n * k // workers for k in range(workers+1)]
+        nbytes = n * self.itemsize
+        conns, procs = [], []
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        try:
+            with self._view() as view, view.cast('B') as src:
+                shm.buf[:nbytes] = src
+            use_numpy = numpy is not None and self.use_numpy
+            ctx = _mp_context()
+            for k in range(workers):
+                if bounds[k] < bounds[k+1]:
+                    recv, send = ctx.Pipe(duplex=False)
+                    procs.append(ctx.Process(target=_reduce_chunk, daemon=True, args=(
+                        send, shm, self.typecode, bounds[k], bounds[k+1], use_numpy, op, args)))
+                    procs[-1].start()
+                    send.close()
+                    conns.append(recv)
+            results = []
+            for conn in conns:
+                ok, result = conn.recv()
+                if not ok:
+                    raise result
+                results.append(result)
+            return results
+        finally:
+            for proc in procs:
+                proc.join()
+            shm.close()
+            shm.unlink()
+
+    def min(self):
+        if self._parallel():
+            return min(self._reduce_chunks('min'))
+        return super().min()
+
+    def max(self):
+        if self._parallel():
+            return max(self._reduce_chunks('max'))
+        return super().max()
+
+    def count(self, value):
+        if self._parallel():
+            return sum(self._reduce_chunks('count', value))
+        return super().count(value)
+
+    def sum(self, start=0):
+        if self._parallel():
+            return start + sum(self._reduce_chunks('sum'))
+        return super().sum(start)
+
+    def reduce(self, function, *initial):
+        if self._parallel():
+            return functools.reduce(function, self._reduce_chunks('reduce', function), *initial)
+        return super().reduce(function, *initial)
+
+    def extend(self, other):
+        # between lists of the same type, copy the buffer directly
+        if isinstance(other, TypedArrayList) and other.typecode == self.typecode \
+           and self._fp is None:
+            n, size = len(other), self._size
+            if self._sharers is not None:
+                self._unshare()
+            self._reserve(size + n)
+            with memoryview(self._data) as dst, other._view() as src:
+                dst[size:size+n] = src
+            self._size += n
+            return self
+        return super().extend(other)
+
+    def dump(self, fp):
+        fp.write(_DUMP_HEADER.pack(_DUMP_MAGIC, _DUMP_VERSION, _DUMP_RAW, self._size))
+        fp.write(_DUMP_TYPED_HEADER.pack(self.typecode.encode('ascii'), self.itemsize,
+                                         b'<' if sys.byteorder == 'little' else b'>'))
+        with self._view() as view:
+            fp.write(view)
+
+    def _pickle_payload(self, protocol):
+        # with protocol 5, the buffer may be transferred out-of-band
+        if protocol >= 5:
+            return pickle.PickleBuffer(self._view())
+        with self._view() as view:
+            return view.tobytes()
+
+    def _storage_from(self, payload):
+        if not isinstance(payload, (bytes, bytearray)):
+            payload = memoryview(payload).cast('B').tobytes()
+        return self._new_storage(payload)
+
+
+# ## Sorted lists
+# 
+# `ArrayList.sort` sorts a list in place. A `SortedArrayList` instead keeps its elements in sorted order at all times: `add` (as well as `append` and `extend`, which are equivalent to it) places each new element after any equal ones, and `insert` and item assignment are permitted only where they preserve the ordering. In return, `index`, `in`, `count` and `remove` use binary search ([`bisect`](https://docs.python.org/3/library/bisect.html)) to locate elements in O(log n) time, `min` and `max` take O(1) time, and `irange` returns a view of the elements in a range of values.
+
+# In[ ]:
+
+
+import bisect
+
+class SortedArrayList (ArrayList):
+    def _empty_like(self):
+        return SortedArrayList(self.growth_factor, self.storage)
+
+    def bisect_left(self, value):
+        """Returns the index of the first element not less than value."""
+        return bisect.bisect_left(self._data, value, 0, self._size)
+
+    def bisect_right(self, value):
+        """Returns the index of the first element greater than value."""
+        return bisect.bisect_right(self._data, value, 0, self._size)
+
+    def _check_order(self, lo, values, hi):
+        """Raises ValueError unless values, placed between positions lo-1 and
+        hi, would keep this list sorted."""
+        prev = self._data[lo-1] if lo > 0 else None
+        for i, x in enumerate(values):
+            if (i > 0 or lo > 0) and x < prev:
+                raise ValueError('Value would break the ordering of a SortedArrayList')
+            prev = x
+        if values and hi < self._size and self._data[hi] < prev:
+            raise ValueError('Value would break the ordering of a SortedArrayList')
+
+    def add(self, value):
+        """Adds value to this list, after any elements equal to it."""
+        super().insert(self.bisect_right(value), value)
+
+    def append(self, value):
+        """Same as `add` (elements can't be placed out of order)."""
+        self.add(value)
+
+    def concat(self, other):
+        """Same as `self + other` (a lazy concatenation wouldn't be in sorted
+        order)."""
+        return self + other
+
+    def extend(self, other):
+        """Adds all elements from other to this list, in sorted order. The
+        batch is sorted and merged with the elements from where its first
+        one goes in a single pass, in O(n + m log m) time --- except for a
+        batch small enough that it is quicker to add its elements one at a
+        time, in O(m log n) comparisons."""
+        values = sorted(other)
+        size = self._size
+        if not values:
+            return self
+        if len(values) * size.bit_length() < size:
+            for x in values:
+                self.add(x)
+            return self
+        # (the merge only reads the list, so if a comparison raises, the list
+        # is left as it was)
+        data = self._data
+        start = i = self.bisect_right(values[0])
+        merged = []
+        for x in values:
+            while i < size and not x < data[i]:
+                merged.append(data[i])
+                i += 1
+            merged.append(x)
+        merged.extend(data[k] for k in range(i, size))
+        self._replace_range(start, size, merged)
+        return self
+
+    def insert(self, idx, value):
+        """Inserts value at position idx, which must lie in its sorted range.
+        Raises IndexError if idx is invalid, or ValueError if it isn't in
+        sorted position."""
+        if 0 <= idx <= self._size:
+            self._check_order(idx, [value], idx)
+        super().insert(idx, value)
+
+    def insert_many(self, idx, iterable):
+        values = list(iterable)
+        if 0 <= idx <= self._size:
+            self._check_order(idx, values, idx)
+        super().insert_many(idx, values)
+
+    def __setitem__(self, idx, value):
+        """Implements `self[idx] = x`, which must not break the ordering.
+        Slice assignment raises TypeError, as it does for other types that
+        don't support it: the ordering, not the slice, decides where the
+        elements would go."""
+        if isinstance(idx, slice):
+            raise TypeError('SortedArrayList does not support slice assignment')
+        nidx = self._normalize_idx(idx)
+        if nidx < self._size:
+            self._check_order(nidx, [value], nidx+1)
+        super().__setitem__(idx, value)
+
+    def sort(self, key=None, reverse=False):
+        """Does nothing, as the list is already sorted; raises ValueError if
+        a different ordering is requested."""
+        if key is not None or reverse:
+            raise ValueError('Cannot reorder a SortedArrayList')
+
+    def __contains__(self, value):
+        i = self.bisect_left(value)
+        return i < self._size and self._data[i] == value
+
+    def index(self, value, i=0, j=None):
+        """Returns the index of the first instance of value between index i
+        (inclusive) and j (exclusive). Raises ValueError if value is not
+        found."""
+        if j is None:
+            j = self._size
+        start = self._normalize_idx(i)
+        end = min(self._normalize_idx(j), self._size)
+        x = max(start, self.bisect_left(value))
+        if x < end and self._data[x] == value:
+            return x
+        raise ValueError
+
+    def count(self, value):
+        return self.bisect_right(value) - self.bisect_left(value)
+
+    def remove(self, value):
+        del self[self.index(value)]
+
+    def min(self):
+        if self._size == 0:
+            raise ValueError('min() of an empty list')
+        return self[0]
+
+    def max(self):
+        if self._size == 0:
+            raise ValueError('max() of an empty list')
+        return self[-1]
+
+    def irange(self, lo=None, hi=None, reverse=False):
+        """Returns a view of the elements x where lo <= x < hi (either bound
+        may be omitted), in descending order if reverse."""
+        start = 0 if lo is None else self.bisect_left(lo)
+        stop = self._size if hi is None else max(start, self.bisect_left(hi))
+        view = self[start:stop]
+        return view[::-1] if reverse else view
+
+
+# ## Gap buffers
+# 
+# Inserting or deleting an element in the middle of an `ArrayList` requires shifting every element after it. A `GapArrayList` instead keeps all its unused slots together in a *gap*, which it moves to wherever an edit takes place: elements are inserted into the start of the gap, and deleted by absorbing them into it. Moving the gap only shifts the elements between its old and new positions, so a sequence of edits made near a moving cursor (as in a text editor) takes O(1) amortized time per edit.
+# 
+# Operations that scan the whole list first move the gap to the end, so that the elements are laid out just as in an `ArrayList`.
+
+# In[ ]:
+
+
+class GapArrayList (ArrayList):
+    @ArrayList.data.setter
+    def data(self, data):
+        self._gap_start = self._gap_end = len(data)
+        ArrayList.data.fset(self, data)
+
+    def _empty_like(self):
+        return GapArrayList(self.growth_factor, self.storage)
+
+    def _phys(self, idx):
+        """Returns the slot holding the element at (valid, non-negative) idx."""
+        return idx if idx < self._gap_start else idx + self._gap_end - self._gap_start
+
+    def _move_gap(self, pos):
+        """Moves the gap so that it starts just after the element at pos-1."""
+        if self._sharers is not None:
+            self._unshare()
+        start, end = self._gap_start, self._gap_end
+        if start == end:
+            self._gap_start = self._gap_end = pos
+            return
+        if pos == start:
+            return
+        data = self._data
+        if pos < start:
+            for i in range(start-1, pos-1, -1):
+                end -= 1
+                data[end] = data[i]
+                data[i] = self._EMPTY_SLOT
+        else:
+            for k in range(pos - start):
+                data[start+k] = data[end+k]
+                data[end+k] = self._EMPTY_SLOT
+            end += pos - start
+        self._gap_start, self._gap_end = pos, end
+
+    def _settle(self):
+        self._move_gap(self._size)
+
+    def copy(self):
+        newarray = super().copy()
+        newarray._gap_start, newarray._gap_end = self._gap_start, self._gap_end
+        return newarray
+
+    def _resize(self, capacity):
+        # slots are added to or removed from the gap, wherever it is
+        if self._sharers is not None:
+            self._unshare()
+        data = self._data
+        old = len(data)
+        if capacity > old:
+            super()._resize(capacity)
+            data = self._data
+            delta = capacity - old
+            for i in range(old-1, self._gap_end-1, -1):
+                data[i+delta] = data[i]
+                data[i] = self._EMPTY_SLOT
+            self._gap_end += delta
+        elif capacity < old:
+            delta = old - capacity
+            for i in range(self._gap_end, old):
+                data[i-delta] = data[i]
+                data[i] = self._EMPTY_SLOT
+            self._gap_end -= delta
+            super()._resize(capacity)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return super().__getitem__(idx)
+        assert(isinstance(idx, int))
+        nidx = self._normalize_idx(idx)
+        if nidx >= self._size:
+            raise IndexError
+        return self._data[self._phys(nidx)]
+
+    def __setitem__(self, idx, value):
+        if isinstance(idx, slice):
+            return super().__setitem__(idx, value)
+        assert(isinstance(idx, int))
+        nidx = self._normalize_idx(idx)
+        if nidx >= self._size:
+            raise IndexError
+        pidx = self._phys(nidx)
+        if self._sharers is not None:
+            self._unshare()
+        old = self._data[pidx]
+        self._data[pidx] = value
+        if self._fp is not None:
+            self._fp_remove(old)
+            self._fp_add(value)
+
+    def __delitem__(self, idx):
+        if isinstance(idx, slice):
+            return super().__delitem__(idx)
+        assert(isinstance(idx, int))
+        nidx = self._normalize_idx(idx)
+        if nidx >= self._size:
+            raise IndexError
+        self._replace_range(nidx, nidx+1, [])
+
+    def append(self, value):
+        self._replace_range(self._size, self._size, [value])
+
+    def insert(self, idx, value):
+        if idx < 0 or idx > self._size:
+            raise IndexError
+        self._replace_range(idx, idx, [value])
+
+    def _replace_range(self, start, stop, values):
+        if self._sharers is not None:
+            self._unshare()
+        self._move_gap(stop)
+        data = self._data
+        for i in range(start, stop):
+            old = data[i]
+            data[i] = self._EMPTY_SLOT
+            if self._fp is not None:
+                self._fp_remove(old)
+        self._gap_start = start
+        self._size -= stop - start
+        self._reserve(self._size + len(values))
+        data = self._data
+        for v in values:
+            data[self._gap_start] = v
+            if self._fp is not None:
+                self._fp_add(v)
+            self._gap_start += 1
+        self._size += len(values)
+        if stop - start > len(values):
+            self._maybe_shrink()
+
+    def _delete_indices(self, indices):
+        for i in sorted(set(indices), reverse=True):
+            self._replace_range(i, i+1, [])
+
+    def __iter__(self):
+        # resolves each index as it goes, so as to follow the gap around
+        i = 0
+        while i < self._size:
+            yield self._data[self._phys(i)]
+            i += 1
+
+
+# ## Memory-mapped lists
+# 
+# A `MmapArrayList` keeps fixed-width records in a memory-mapped file, so that a list built by one process can be reopened by another without being rebuilt: opening one takes O(1) time, and the operating system only reads in the pages that are actually accessed. Each record is packed with a [`struct`](https://docs.python.org/3/library/struct.html) format (e.g., `'d'` for a float, or `'<qd'` for an integer and a float), and is read back as a single value if the format has a single field, else as a tuple.
+# 
+# The backing store is a `MmapRecords` object, which offers the same primitive array API as `ConstrainedList` over the records following a short header (which holds the record format and the number of records in use). The list grows and shrinks its capacity geometrically, as an `ArrayList` does, resizing and remapping the file each time. Copies (and the results of `+`) are ordinary, in-memory `ArrayList`s.
+
+# In[ ]:
+
+
+import mmap
+import struct
+
+class MmapRecords:
+    """Fixed-width records in a memory-mapped file, offering the primitive
+    array API of `ConstrainedList` along with `resize`. The file's header
+    records the struct format and the number of records in use (`count`)."""
+
+    # magic, version, count and the (NUL-padded) record format
+    HEADER = struct.Struct('<4sB3xQ2x46s')
+    MAGIC = b'ALMM'
+    VERSION = 1
+
+    def __init__(self, path, record_format=None):
+        if record_format is not None:
+            if len(record_format.encode('ascii')) > 46:
+                raise ValueError('Record format is too long: ' + repr(record_format))
+            struct.Struct(record_format)
+        created = not os.path.exists(path)
+        if created and record_format is None:
+            raise ValueError('A record format is needed to create ' + repr(path))
+        self._file = open(path, 'w+b' if created else 'r+b')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size == 0:
+                if record_format is None:
+                    raise ValueError('A record format is needed to create ' + repr(path))
+                self._file.truncate(self.HEADER.size)
+                self._map()
+                self.HEADER.pack_into(self._mm, 0, self.MAGIC, self.VERSION, 0,
+                                      record_format.encode('ascii'))
+            else:
+                if size < self.HEADER.size:
+                    raise ValueError(repr(path) + ' is not a memory-mapped list file')
+                self._map()
+                magic, version, _, fmt = self.HEADER.unpack_from(self._mm, 0)
+                if magic != self.MAGIC or version != self.VERSION:
+                    raise ValueError(repr(path) + ' is not a memory-mapped list file')
+                fmt = fmt.rstrip(b'\0').decode('ascii')
+                if record_format is not None and record_format != fmt:
+                    raise ValueError('{!r} holds records of format {!r}, not {!r}'.format(
+                        path, fmt, record_format))
+                record_format = fmt
+            self.record_format = record_format
+            self._record = struct.Struct(record_format)
+            self._single = len(self._record.unpack(bytes(self._record.size))) == 1
+            if self.count > len(self):
+                raise ValueError('{!r} is corrupt: its header counts {} records, but it '
+                                 'holds only {}'.format(path, self.count, len(self)))
+        except BaseException:
+            # (a file this failed to set up is removed, if it was created here)
+            self.close()
+            if created:
+                os.remove(path)
+            raise
+
+    def _map(self):
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+
+    def empty_record(self):
+        """Returns the value of an all-zero record."""
+        value = self._record.unpack(bytes(self._record.size))
+        return value[0] if self._single else value
+
+    @property
+    def count(self):
+        return struct.unpack_from('<Q', self._mm, 8)[0]
+
+    @count.setter
+    def count(self, n):
+        struct.pack_into('<Q', self._mm, 8, n)
+
+    def __len__(self):
+        return (len(self._mm) - self.HEADER.size) // self._record.size
+
+    def __getitem__(self, idx):
+        if idx < 0 or idx >= len(self):
+            raise ValueError('Can only use positive, valid indexes on mapped records!')
+        value = self._record.unpack_from(self._mm, self.HEADER.size + idx * self._record.size)
+        return value[0] if self._single else value
+
+    def __setitem__(self, idx, value):
+        if idx < 0 or idx >= len(self):
+            raise ValueError('Can only use positive, valid indexes on mapped records!')
+        offset = self.HEADER.size + idx * self._record.size
+        if self._single:
+            self._record.pack_into(self._mm, offset, value)
+        else:
+            self._record.pack_into(self._mm, offset, *value)
+
+    def append(self, value):
+        if value is not None:
+            raise ValueError('Can only append None to mapped records!')
+        self.resize(len(self) + 1)
+
+    def __delitem__(self, idx):
+        if idx != len(self)-1:
+            raise ValueError('Can only delete last item in mapped records!')
+        self.resize(len(self) - 1)
+
+    def resize(self, n):
+        """Resizes the file to hold exactly n records, and remaps it."""
+        self._mm.close()
+        self._file.truncate(self.HEADER.size + n * self._record.size)
+        self._map()
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        if getattr(self, '_mm', None) is not None and not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+
+class MmapArrayList (ArrayList):
+    def __init__(self, path, record_format=None, growth_factor=2):
+        """Opens the memory-mapped list stored at path, creating it (for
+        records with the given struct format) if it doesn't exist. If the
+        file exists, record_format may be omitted, but must otherwise match
+        the format it was created with."""
+        self.path = path
+        super().__init__(growth_factor, lambda: MmapRecords(path, record_format))
+        self.record_format = self._data.record_format
+        self._EMPTY_SLOT = self._data.empty_record()
+
+    # the number of elements is kept in the file, rather than in memory
+
+    @ArrayList.data.setter
+    def data(self, data):
+        self._data = data
+
+    @property
+    def _size(self):
+        return self._data.count
+
+    @_size.setter
+    def _size(self, n):
+        self._data.count = n
+
+    def _resize(self, capacity):
+        assert(capacity >= self._size)
+        self._data.resize(capacity)
+
+    def clear(self):
+        self._size = 0
+        self._resize(0)
+        if self._fp is not None:
+            self.track_fingerprint()
+
+    def _empty_like(self):
+        return ArrayList(self.growth_factor)
+
+    def flush(self):
+        """Writes any changes through to the file."""
+        self._data.flush()
+
+    def close(self):
+        """Flushes and closes the file; the list can't be used afterwards."""
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ## Blocked lists
+# 
+# A `BlockedArrayList` stores its elements in a sequence of *chunks* --- small `ArrayList`s, backed by `ConstrainedList`s (or whichever `storage` is chosen) --- so that inserting or deleting an element only shifts the elements of one chunk. Locating the chunk holding a given index takes a walk over the chunk lengths, so with chunks of about √n elements, indexing, insertion and deletion at any position all take O(√n) time.
+# 
+# A chunk that grows beyond twice the target chunk size is split, and one that shrinks below half of it is merged with a neighbor. The target size is doubled (or halved) whenever the number of elements quadruples (or drops by a factor of sixteen), re-chunking the whole list in O(n) time, which is amortized over the insertions (or deletions) that led up to it.
+# 
+# A `BlockedArrayList` provides the same API as an `ArrayList` (and compares equal to one with the same elements), but isn't a subclass of it, as it has no single backing store.
+
+# In[ ]:
+
+
+import itertools
+import math
+
+# the smallest target chunk size
+_MIN_CHUNK = 64
+
+
+class BlockedArrayList:
+    _fp_tracked = False
+
+    def __init__(self, growth_factor=2, storage=None):
+        """Creates an empty list. `growth_factor` and `storage` configure the
+        chunks, as they do an `ArrayList`."""
+        self.storage = ArrayList(growth_factor, storage).storage # (validates them)
+        self.growth_factor = growth_factor
+        self.clear()
+
+    def _new_chunk(self, values=()):
+        chunk = ArrayList(self.growth_factor, self.storage)
+        chunk.extend(values)
+        if self._fp_tracked:
+            chunk.track_fingerprint()
+        return chunk
+
+    def _load(self, values):
+        """Re-chunks the list to hold the elements in the list values."""
+        n = len(values)
+        size = _MIN_CHUNK
+        while n > 4 * size * size:
+            size *= 2
+        self._chunk_size = size
+        self._chunks = [self._new_chunk(values[i:i+size]) for i in range(0, n, size)]
+        self._size = n
+
+    @property
+    def capacity(self):
+        """The total number of slots in the chunks' backing stores."""
+        return sum(chunk.capacity for chunk in self._chunks)
+
+    @property
+    def chunk_count(self):
+        """The number of chunks the elements are stored in."""
+        return len(self._chunks)
+
+
+    ### chunk management ###
+
+    def _locate(self, idx):
+        """Returns the position of the chunk holding the element at (valid,
+        non-negative) idx, and the element's index within that chunk."""
+        chunks = self._chunks
+        if idx >= self._size - len(chunks[-1]):
+            return len(chunks)-1, idx - (self._size - len(chunks[-1]))
+        for c in range(len(chunks)):
+            if idx < len(chunks[c]):
+                return c, idx
+            idx -= len(chunks[c])
+
+    def _rebalance(self, c):
+        """Splits or merges the chunk at position c (which was just changed)
+        as needed, then re-chunks the whole list if its size has left the
+        range suited to the target chunk size."""
+        chunks = self._chunks
+        size = self._chunk_size
+        chunk = chunks[c]
+        if len(chunk) > 2 * size:
+            # split into pieces of between 1 and 2 times the target size
+            k = len(chunk) // size
+            bounds = [len(chunk) * p // k for p in range(k+1)]
+            pieces = [self._new_chunk(chunk[bounds[p]:bounds[p+1]]) for p in range(1, k)]
+            chunk.delete_range(bounds[1])
+            chunks[c+1:c+1] = pieces
+        elif len(chunk) == 0:
+            del chunks[c]
+        elif len(chunk) < size // 2 and len(chunks) > 1:
+            left = c if c+1 < len(chunks) else c-1
+            chunks[left].extend(chunks[left+1])
+            del chunks[left+1]
+            if len(chunks[left]) > 2 * size:
+                self._rebalance(left)
+                return
+        n = self._size
+        if n > 4 * size * size or (size > _MIN_CHUNK and 16 * n < size * size):
+            self._load(list(self))
+
+
+    ### content fingerprint ###
+
+    def track_fingerprint(self, enabled=True):
+        """Starts (or stops) maintaining a fingerprint of this list's
+        contents, as `ArrayList.track_fingerprint` does."""
+        self._fp_tracked = enabled
+        for chunk in self._chunks:
+            chunk.track_fingerprint(enabled)
+
+    def fingerprint(self):
+        """Returns the same fingerprint as an `ArrayList` with the same
+        elements would; it is combined from those of the chunks."""
+        fp = 0
+        for chunk in self._chunks:
+            h = chunk.fingerprint()
+            if h is None:
+                return None
+            fp = (fp + h) & _MASK64
+        return fp
+
+
+    ### subscript-based access ###
+
+    _normalize_idx = ArrayList._normalize_idx
+
+    def __getitem__(self, idx):
+        """Implements `x = self[idx]`. Slicing returns an `ArrayListView`."""
+        if isinstance(idx, slice):
+            return ArrayListView(self, range(self._size)[idx])
+        assert(isinstance(idx, int))
+        nidx = self._normalize_idx(idx)
+        if nidx >= self._size:
+            raise IndexError
+        c, i = self._locate(nidx)
+        return self._chunks[c][i]
+
+    def __setitem__(self, idx, value):
+        """Implements `self[idx] = x` and `self[start:stop:step] = iterable`"""
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self._size)
+            if step == 1:
+                values = list(value)
+                self.delete_range(start, max(start, stop))
+                self.insert_many(start, values)
+            else:
+                indices = range(start, stop, step)
+                values = list(value)
+                if len(values) != len(indices):
+                    raise ValueError('attempt to assign sequence of size {} '
+                                     'to extended slice of size {}'.format(
+                                         len(values), len(indices)))
+                for i, x in zip(indices, values):
+                    self[i] = x
+            return
+        assert(isinstance(idx, int))
+        nidx = self._normalize_idx(idx)
+        if nidx >= self._size:
+            raise IndexError
+        c, i = self._locate(nidx)
+        self._chunks[c][i] = value
+
+    def __delitem__(self, idx):
+        """Implements `del self[idx]` and `del self[start:stop:step]`"""
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self._size)
+            if step == 1:
+                self.delete_range(start, stop)
+            else:
+                for i in sorted(range(start, stop, step), reverse=True):
+                    del self[i]
+            return
+        assert(isinstance(idx, int))
+        nidx = self._normalize_idx(idx)
+        if nidx >= self._size:
+            raise IndexError
+        c, i = self._locate(nidx)
+        del self._chunks[c][i]
+        self._size -= 1
+        self._rebalance(c)
+
+
+    ### stringification ###
+
+    __str__ = ArrayList.__str__
+    __repr__ = ArrayList.__repr__
+
+
+    ### single-element manipulation ###
+
+    def append(self, value):
+        """Appends value to the end of this list."""
+        self.insert(self._size, value)
+
+    def insert(self, idx, value):
+        """Inserts value at position idx (which may be len(self)). Raises
+        IndexError if idx is invalid."""
+        if idx < 0 or idx > self._size:
+            raise IndexError
+        if not self._chunks:
+            self._chunks.append(self._new_chunk())
+        if idx == self._size:
+            c, i = len(self._chunks)-1, len(self._chunks[-1])
+        else:
+            c, i = self._locate(idx)
+        self._chunks[c].insert(i, value)
+        self._size += 1
+        self._rebalance(c)
+
+    pop = ArrayList.pop
+
+    def remove(self, value):
+        """Removes the first instance of value from the list. Raises a
+        ValueError if value is not found in the list."""
+        del self[self.index(value)]
+
+
+    ### predicates and queries ###
+
+    def __eq__(self, other):
+        """Returns True if other is an ArrayList, BlockedArrayList,
+        ArrayListConcat or ArrayListView with the same elements (in order) as
+        this list."""
+        if not isinstance(other, (ArrayList, BlockedArrayList, ArrayListConcat, ArrayListView)) \
+           or len(self) != len(other):
+            return False
+        if self._fp_tracked and (getattr(other, '_fp', None) is not None
+                                 or getattr(other, '_fp_tracked', False)):
+            fp, other_fp = self.fingerprint(), other.fingerprint()
+            if fp is not None and other_fp is not None and fp != other_fp:
+                return False
+        for x, y in zip(self, other):
+            if x != y:
+                return False
+        return True
+
+    def __contains__(self, value):
+        return any(value in chunk for chunk in self._chunks)
+
+    def __len__(self):
+        return self._size
+
+    def min(self):
+        return min(chunk.min() for chunk in self._chunks)
+
+    def max(self):
+        return max(chunk.max() for chunk in self._chunks)
+
+    def index(self, value, i=0, j=None):
+        """Returns the index of the first instance of value between index i
+        (inclusive) and j (exclusive). Raises ValueError if value is not
+        found."""
+        if j is None:
+            j = self._size
+        start = self._normalize_idx(i)
+        end = min(self._normalize_idx(j), self._size)
+        offset = 0
+        for chunk in self._chunks:
+            n = len(chunk)
+            if offset + n > start and offset < end:
+                try:
+                    return offset + chunk.index(value, max(start - offset, 0),
+                                                min(end - offset, n))
+                except ValueError:
+                    pass
+            offset += n
+        raise ValueError
+
+    def count(self, value):
+        return sum(chunk.count(value) for chunk in self._chunks)
+
+    def sum(self, start=0):
+        for chunk in self._chunks:
+            start = chunk.sum(start)
+        return start
+
+    def reduce(self, function, *initial):
+        return functools.reduce(function, iter(self), *initial)
+
+
+    ### bulk operations ###
+
+    def __add__(self, other):
+        """Implements `self + other`, returning a new BlockedArrayList."""
+        newarray = self.copy()
+        newarray.extend(other)
+        return newarray
+
+    def clear(self):
+        self._chunks = []
+        self._size = 0
+        self._chunk_size = _MIN_CHUNK
+
+    def _empty_like(self):
+        return BlockedArrayList(self.growth_factor, self.storage)
+
+    @classmethod
+    def with_capacity(cls, n, *args, **kwargs):
+        """Returns a new, empty list. (Chunks are allocated as needed, so
+        the capacity isn't reserved.)"""
+        return cls(*args, **kwargs)
+
+    def _ndarray(self):
+        return None
+
+    def copy(self):
+        """Returns a new BlockedArrayList with the same values as this list
+        (in copies of its chunks)."""
+        newarray = self._empty_like()
+        newarray._chunks = [chunk.copy() for chunk in self._chunks]
+        newarray._size = self._size
+        newarray._chunk_size = self._chunk_size
+        if self._fp_tracked:
+            newarray.track_fingerprint()
+        return newarray
+
+    def extend(self, other):
+        """Adds all elements, in order, from other --- an Iterable --- to
+        this list."""
+        self.insert_many(self._size, other)
+        return self
+
+    def insert_many(self, idx, iterable):
+        """Inserts all values from iterable, in order, starting at position
+        idx, into a single chunk (which is then split as needed). Raises
+        IndexError if idx is invalid."""
+        if idx < 0 or idx > self._size:
+            raise IndexError
+        values = list(iterable)
+        if not values:
+            return
+        if not self._chunks:
+            self._load(values)
+            return
+        if idx == self._size:
+            c, i = len(self._chunks)-1, len(self._chunks[-1])
+        else:
+            c, i = self._locate(idx)
+        self._chunks[c].insert_many(i, values)
+        self._size += len(values)
+        self._rebalance(c)
+
+    def delete_range(self, i, j=None):
+        """Deletes the elements from index i (inclusive) to j (exclusive),
+        with the same clamping rules as `del self[i:j]`. Chunks lying wholly
+        inside the range are dropped without visiting their elements."""
+        start, stop, _ = slice(i, j).indices(self._size)
+        if stop <= start:
+            return
+        chunks = self._chunks
+        c, lo = self._locate(start)
+        first = c
+        while start < stop:
+            n = min(len(chunks[c]) - lo, stop - start)
+            if lo == 0 and n == len(chunks[c]):
+                del chunks[c]
+            else:
+                chunks[c].delete_range(lo, lo + n)
+                c += 1
+            start += n
+            self._size -= n
+            lo = 0
+        if not chunks:
+            self.clear()
+            return
+        # only the chunks at either end of the range were cut short
+        for c in (first+1, first):
+            self._rebalance(min(c, len(self._chunks)-1))
+
+
+    ### sorting ###
+
+    def sort(self, key=None, reverse=False):
+        """Sorts this list in place, stably, as `ArrayList.sort` does."""
+        lst = ArrayList(self.growth_factor, self.storage)
+        lst.extend(self)
+        lst.sort(key=key, reverse=reverse)
+        self._load(list(lst))
+        if self._fp_tracked:
+            self.track_fingerprint()
+
+
+    ### serialization ###
+
+    def dump(self, fp):
+        """Writes this list to the binary file fp, in the same format as
+        `ArrayList.dump`."""
+        lst = ArrayList(self.growth_factor, self.storage)
+        lst.extend(self)
+        lst.dump(fp)
+
+    @classmethod
+    def load(cls, fp, growth_factor=2, storage=None):
+        """Reads a list written by `dump` (of any `ArrayList`) from fp."""
+        lst = cls(growth_factor, storage)
+        lst.extend(ArrayList.load(fp))
+        return lst
+
+
+    ### iteration ###
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    def iter_chunks(self, n):
+        """Yields the elements of this list as tuples of (at most) n
+        consecutive elements, as `ArrayList.iter_chunks` does."""
+        if n < 1:
+            raise ValueError('Chunk size must be at least 1')
+        return self._iter_chunks(n)
+
+    def _iter_chunks(self, n):
+        it = iter(self)
+        batch = tuple(itertools.islice(it, n))
+        while batch:
+            yield batch
+            batch = tuple(itertools.islice(it, n))
+
+    def __reversed__(self):
+        for chunk in reversed(self._chunks):
+            yield from reversed(chunk)
+
+    lazy = ArrayList.lazy
+
+
+# ## Lazy concatenation
+# 
+# `a.concat(b)` is a lazy version of `a + b` (which builds a new list right away): it returns an `ArrayListConcat`, a list made up of copies of `a` and `b` which --- being copy-on-write --- share their storage, so that building it takes O(1) time. Reading from it (by index, slicing, iteration, comparison and the other queries that `BlockedArrayList` supports over its chunks) leaves the parts as they are; any other operation first *materializes* the concatenation into a single list, of the same kind as `a`, to which it is then applied. `is_shared` reports whether a concatenation still shares storage with its operands. (`SortedArrayList.concat` is the same as `+`, as a concatenation of sorted lists isn't in sorted order.)
+
+# In[ ]:
+
+
+def _concat_parts(operand, like):
+    """Returns the lists making up operand (as copies, sharing its storage
+    where possible), for use as parts of an ArrayListConcat. Iterables that
+    aren't ArrayLists are copied into a list configured like `like`."""
+    if isinstance(operand, ArrayListConcat):
+        return [part.copy() for part in operand._chunks]
+    if isinstance(operand, ArrayList):
+        return [operand.copy()]
+    part = like._empty_like()
+    part.extend(operand)
+    return [part]
+
+
+class ArrayListConcat:
+    _fp_tracked = False
+
+    def __init__(self, parts):
+        """Creates the concatenation of the ArrayLists in parts, which it
+        takes ownership of."""
+        # (empty parts are dropped, but the first is kept, to materialize into)
+        self._chunks = parts[:1] + [part for part in parts[1:] if len(part)]
+
+    @property
+    def _size(self):
+        return sum(len(part) for part in self._chunks)
+
+    def materialize(self):
+        """Joins the parts (if that hasn't been done yet) into a single list,
+        of the same kind as the first, and returns it. (Unlike that of a view,
+        the list isn't a copy: it is the one this concatenation now wraps.)"""
+        chunks = self._chunks
+        if len(chunks) > 1:
+            lst = chunks[0]._empty_like()
+            lst._reserve(self._size)
+            for part in chunks:
+                lst.extend(part)
+            self._chunks = [lst]
+        return self._chunks[0]
+
+    def is_shared(self):
+        """Returns True while this concatenation hasn't been materialized,
+        or if the list it was materialized into shares its backing store."""
+        return len(self._chunks) > 1 or self._chunks[0].is_shared()
+
+    def __getattr__(self, name):
+        # everything else is done by the materialized list
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.materialize(), name)
+
+    # (reads go through the same methods as for the chunks of a BlockedArrayList)
+    _normalize_idx = ArrayList._normalize_idx
+    _locate = BlockedArrayList._locate
+    __getitem__ = BlockedArrayList.__getitem__
+    __len__ = _size.fget
+    __iter__ = BlockedArrayList.__iter__
+    __reversed__ = BlockedArrayList.__reversed__
+    iter_chunks = BlockedArrayList.iter_chunks
+    _iter_chunks = BlockedArrayList._iter_chunks
+    lazy = ArrayList.lazy
+    __str__ = ArrayList.__str__
+    __repr__ = ArrayList.__repr__
+    __eq__ = BlockedArrayList.__eq__
+    __contains__ = BlockedArrayList.__contains__
+    min = BlockedArrayList.min
+    max = BlockedArrayList.max
+    index = BlockedArrayList.index
+    count = BlockedArrayList.count
+    sum = BlockedArrayList.sum
+    reduce = BlockedArrayList.reduce
+
+    def __setitem__(self, idx, value):
+        self.materialize()[idx] = value
+
+    def __delitem__(self, idx):
+        del self.materialize()[idx]
+
+    __add__ = ArrayList.__add__
+
+    def concat(self, other):
+        return ArrayListConcat(_concat_parts(self, self._chunks[0])
+                               + _concat_parts(other, self._chunks[0]))
+
+    def copy(self):
+        return ArrayListConcat(_concat_parts(self, self._chunks[0]))
+
+    def _empty_like(self):
+        return self._chunks[0]._empty_like()
+
+    def _ndarray(self):
+        return None
+
+
+# ## Indexed lists
+# 
+# An `IndexedArrayList` keeps a hash index alongside its backing store, mapping each value to the position of each of its occurrences, so that `in`, `count`, `index` and `remove` locate elements in O(1) expected time (or O(k), for a value occurring k times) rather than by scanning the list. Every mutation updates the index incrementally: elements shifted by an insertion or deletion are moved to their new positions as they are shifted, which doesn't change the O(n) cost of the shift. (Operations that rearrange the whole list, like `sort`, or assigning `data`, drop the index, which is rebuilt the next time it is needed.)
+# 
+# The elements must therefore be hashable (as dictionary keys must be), and values that compare equal share an index entry, as they do in a `dict`. The index takes extra memory --- roughly a dictionary entry per distinct value, plus a set of positions for each repeated value --- which `index_memory` reports.
+
+# In[ ]:
+
+
+class IndexedArrayList (ArrayList):
+    # maps each value to its position, or to a set of its positions if it
+    # occurs more than once; None when it must be rebuilt
+    _positions = None
+
+    @ArrayList.data.setter
+    def data(self, data):
+        ArrayList.data.fset(self, data)
+        self._positions = None
+
+    def _empty_like(self):
+        return IndexedArrayList(self.growth_factor, self.storage)
+
+    def _index(self):
+        """Returns the index, (re)building it if needed, or None if it can't
+        be built (because an element assigned through `data` is unhashable)."""
+        if self._positions is None:
+            self._positions = {}
+            try:
+                self._index_range(0, self._size)
+            except TypeError:
+                self._positions = None
+        return self._positions
+
+    def _index_range(self, start, stop):
+        """Adds the elements at positions [start, stop) to the index."""
+        positions, data = self._positions, self._data
+        for p in range(start, stop):
+            x = data[p]
+            ps = positions.get(x)
+            if ps is None:
+                positions[x] = p
+            elif isinstance(ps, int):
+                positions[x] = {ps, p}
+            else:
+                ps.add(p)
+
+    def _unindex_range(self, start, stop):
+        """Removes the elements at positions [start, stop) from the index."""
+        positions, data = self._positions, self._data
+        for p in range(start, stop):
+            x = data[p]
+            ps = positions[x]
+            if isinstance(ps, int):
+                del positions[x]
+            else:
+                ps.remove(p)
+                if len(ps) == 1:
+                    positions[x] = ps.pop()
+
+    def index_memory(self):
+        """Returns the approximate number of bytes taken up by the index (on
+        top of the list's backing store and elements)."""
+        positions = self._index()
+        if positions is None:
+            return 0
+        total = sys.getsizeof(positions)
+        for ps in positions.values():
+            if isinstance(ps, int):
+                total += sys.getsizeof(ps)
+            else:
+                total += sys.getsizeof(ps) + sum(sys.getsizeof(p) for p in ps)
+        return total
+
+
+    ### mutations, which keep the index up to date ###
+
+    # (each new value is hashed before anything is changed, so that an
+    # unhashable one is rejected whether or not the index has been built)
+
+    def __setitem__(self, idx, value):
+        if isinstance(idx, slice):
+            return super().__setitem__(idx, value)
+        hash(value)
+        if self._positions is None:
+            return super().__setitem__(idx, value)
+        nidx = self._normalize_idx(idx)
+        if nidx >= self._size:
+            raise IndexError
+        self._unindex_range(nidx, nidx+1)
+        super().__setitem__(nidx, value)
+        self._index_range(nidx, nidx+1)
+
+    def __delitem__(self, idx):
+        if isinstance(idx, slice) or self._positions is None:
+            return super().__delitem__(idx)
+        nidx = self._normalize_idx(idx)
+        if nidx >= self._size:
+            raise IndexError
+        self._unindex_range(nidx, self._size)
+        super().__delitem__(nidx)
+        self._index_range(nidx, self._size)
+
+    def append(self, value):
+        hash(value)
+        super().append(value)
+        if self._positions is not None:
+            self._index_range(self._size-1, self._size)
+
+    def insert(self, idx, value):
+        hash(value)
+        if self._positions is None:
+            return super().insert(idx, value)
+        if idx < 0 or idx > self._size:
+            raise IndexError
+        self._unindex_range(idx, self._size)
+        super().insert(idx, value)
+        self._index_range(idx, self._size)
+
+    def _replace_range(self, start, stop, values):
+        for v in values:
+            hash(v)
+        if self._positions is None:
+            return super()._replace_range(start, stop, values)
+        self._unindex_range(start, self._size)
+        super()._replace_range(start, stop, values)
+        self._index_range(start, self._size)
+
+    def _delete_indices(self, indices):
+        indices = list(indices)
+        if not indices or self._positions is None:
+            return super()._delete_indices(indices)
+        start = min(indices)
+        self._unindex_range(start, self._size)
+        super()._delete_indices(indices)
+        self._index_range(start, self._size)
+
+    def sort(self, key=None, reverse=False):
+        self._positions = None
+        super().sort(key=key, reverse=reverse)
+
+    def copy(self):
+        newarray = super().copy()
+        newarray._positions = None
+        return newarray
+
+
+    ### queries, which consult the index ###
+
+    # (if the index can't be built, they fall back to scanning the list)
+
+    def __contains__(self, value):
+        positions = self._index()
+        if positions is None:
+            return super().__contains__(value)
+        try:
+            return value in positions
+        except TypeError: # (an unhashable value can't be in the list)
+            return False
+
+    def count(self, value):
+        positions = self._index()
+        if positions is None:
+            return super().count(value)
+        try:
+            ps = positions.get(value)
+        except TypeError:
+            return 0
+        if ps is None:
+            return 0
+        return 1 if isinstance(ps, int) else len(ps)
+
+    def index(self, value, i=0, j=None):
+        positions = self._index()
+        if positions is None:
+            return super().index(value, i, j)
+        if j is None:
+            j = self._size
+        start = self._normalize_idx(i)
+        end = min(self._normalize_idx(j), self._size)
+        try:
+            ps = positions.get(value)
+        except TypeError:
+            ps = None
+        if isinstance(ps, int):
+            ps = (ps,)
+        found = [p for p in ps or () if start <= p < end]
+        if not found:
+            raise ValueError
+        return min(found)
+
+    def remove(self, value):
+        del self[self.index(value)]
+
+
+# ## Record lists
+# 
+# A list of records (e.g., tuples or dicts) in an `ArrayList` stores a separate object for every record, plus one for each of its fields. A `RecordArrayList` instead stores records *column-wise*, keeping each field in its own list: a `TypedArrayList` for a field given a type code, which packs its values into a buffer, and an `ArrayList` otherwise. A column can be scanned on its own (and, if typed, with the NumPy fast paths), so `min`, `max` and `count` take the name of the field to compute them over.
+# 
+# Rows are appended (or inserted, or assigned) as sequences of values in schema order, or as mappings from field names to values. Reading a row by index, or iterating over the list, builds a named tuple for each row only as it is needed; indexing with a field name (`lst['price']`) returns that field's column.
+
+# In[ ]:
+
+
+import collections
+import collections.abc
+
+
+class RecordArrayList:
+    def __init__(self, schema, growth_factor=2, storage=None):
+        """Creates an empty list of records with the fields in schema: a
+        sequence of field names (of untyped fields), or (name, typecode)
+        pairs, where a typecode of None also denotes an untyped field.
+        `growth_factor` and `storage` configure the columns."""
+        self.schema = tuple((field, None) if isinstance(field, str) else tuple(field)
+                            for field in schema)
+        self.growth_factor = growth_factor
+        self.storage = storage
+        self._columns = [ArrayList(growth_factor, storage) if typecode is None
+                         else TypedArrayList(typecode, growth_factor, storage)
+                         for _, typecode in self.schema]
+        self.Row = collections.namedtuple('Row', [name for name, _ in self.schema])
+        self.fields = self.Row._fields
+        self._column_of = dict(zip(self.fields, self._columns))
+
+    @property
+    def _size(self):
+        return len(self._columns[0]) if self._columns else 0
+
+    def __len__(self):
+        return self._size
+
+    def column(self, name):
+        """Returns the list holding the values of field name (which may be
+        read, or written in place, but mustn't be resized)."""
+        return self._column_of[name]
+
+    def _values(self, row):
+        """Returns the values of row (a sequence or mapping) in field order."""
+        if isinstance(row, collections.abc.Mapping):
+            return [row[name] for name in self.fields]
+        values = list(row)
+        if len(values) != len(self.fields):
+            raise ValueError('Expected a row of {} values, got {}'.format(
+                len(self.fields), len(values)))
+        return values
+
+
+    ### row and column access ###
+
+    def __getitem__(self, idx):
+        """Implements `row = self[idx]` (a named tuple), `self[start:stop:step]`
+        (an `ArrayListView` of rows) and `column = self[name]`."""
+        if isinstance(idx, str):
+            return self.column(idx)
+        if isinstance(idx, slice):
+            return ArrayListView(self, range(self._size)[idx])
+        return self.Row._make([col[idx] for col in self._columns])
+
+    def __setitem__(self, idx, row):
+        """Implements `self[idx] = row`."""
+        values = self._values(row)
+        old = self[idx]
+        for k, col in enumerate(self._columns):
+            try:
+                col[idx] = values[k]
+            except Exception:
+                for col, value in zip(self._columns[:k], old):
+                    col[idx] = value
+                raise
+
+    def __delitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self._size)
+            for col in self._columns:
+                del col[start:stop:step]
+            return
+        self[idx] # (raises IndexError for an invalid idx)
+        for col in self._columns:
+            del col[idx]
+
+
+    ### row manipulation ###
+
+    def append(self, row):
+        """Appends row to the end of this list."""
+        self.insert(self._size, row)
+
+    def insert(self, idx, row):
+        """Inserts row at position idx (which may be len(self)). Raises
+        IndexError if idx is invalid. If any value can't be stored in its
+        column, none are."""
+        if idx < 0 or idx > self._size:
+            raise IndexError
+        values = self._values(row)
+        for k, col in enumerate(self._columns):
+            try:
+                col.insert(idx, values[k])
+            except Exception:
+                for col in self._columns[:k]:
+                    del col[idx]
+                raise
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+        return self
+
+    _normalize_idx = ArrayList._normalize_idx
+    pop = ArrayList.pop
+
+    def clear(self):
+        for col in self._columns:
+            col.clear()
+
+    def _empty_like(self):
+        return RecordArrayList(self.schema, self.growth_factor, self.storage)
+
+    def _ndarray(self):
+        return None
+
+
+    ### column-wise queries ###
+
+    def min(self, field):
+        """Returns the minimum value of field."""
+        return self.column(field).min()
+
+    def max(self, field):
+        """Returns the maximum value of field."""
+        return self.column(field).max()
+
+    def count(self, field, value):
+        """Returns the number of rows whose field equals value."""
+        return self.column(field).count(value)
+
+
+    ### iteration ###
+
+    def __iter__(self):
+        """Yields the rows, as named tuples built one at a time from batches
+        of column values."""
+        columns = [itertools.chain.from_iterable(col.iter_chunks(_ITER_BATCH))
+                   for col in self._columns]
+        return map(self.Row._make, zip(*columns))
+
+    lazy = ArrayList.lazy
+    __str__ = ArrayList.__str__
+    __repr__ = ArrayList.__repr__
+
+
+# ## External sorting
+# 
+# `external_sort` sorts data that doesn't fit in memory. It reads the input `run_size` elements at a time into an `ArrayList`, sorts each such *run* (with `ArrayList.sort`), and spills it to a temporary file as a series of pickled batches. The runs are then merged by a k-way merge, which keeps the next element of each run in a `Heap` (from `Heaps.py`) and repeatedly yields the least of them, reading further batches from each run's file as it is exhausted. If there are more than `fan_in` runs, groups of `fan_in` runs are first merged into longer runs, and those merged in turn, so that no more than `fan_in` files are read at once. At most `run_size` elements are held in memory while the runs are made, and `fan_in` batches while they are merged.
+# 
+# The result is an iterator that streams the sorted elements, deleting the temporary files once it is exhausted (or closed). Like `sorted`, the sort is stable, and accepts `key` and `reverse` arguments. (Elements are pickled, so must be picklable; input that fits in a single run is sorted in memory, without being spilled.)
+
+# In[ ]:
+
+
+import random
+import tempfile
+
+# number of elements pickled together in a run file
+_SPILL_BATCH = 1024
+
+
+class _MergeKey:
+    """The priority of an element in the merge heap: as `Heap` pops the
+    greatest element first, a _MergeKey is "greater" than another if its
+    element should be yielded first --- i.e., if its key is less (or, if
+    reverse, greater), or the keys are equal and it comes from an earlier
+    run (which keeps the merge stable)."""
+    __slots__ = ('key', 'run', 'reverse')
+
+    def __init__(self, key, run, reverse):
+        self.key, self.run, self.reverse = key, run, reverse
+
+    def __gt__(self, other):
+        a, b = (other.key, self.key) if self.reverse else (self.key, other.key)
+        if a < b:
+            return True
+        if b < a:
+            return False
+        return self.run < other.run
+
+    def __lt__(self, other):
+        return other > self
+
+
+def _spill(batches, path):
+    """Writes the tuples of elements in batches to a new run file at path."""
+    with open(path, 'wb') as fp:
+        for batch in batches:
+            pickle.dump(batch, fp, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path):
+    """Yields the elements of the run file at path, a batch at a time."""
+    with open(path, 'rb') as fp:
+        while True:
+            try:
+                batch = pickle.load(fp)
+            except EOFError:
+                return
+            yield from batch
+
+
+def _batched(iterable, n):
+    it = iter(iterable)
+    batch = tuple(itertools.islice(it, n))
+    while batch:
+        yield batch
+        batch = tuple(itertools.islice(it, n))
+
+
+def _heap_class():
+    """Returns `Heaps.Heap`, importing it on first use: importing Heaps runs
+    its tests, which take a while and reseed the random module (whose state
+    is restored afterwards)."""
+    if 'Heaps' not in sys.modules:
+        state = random.getstate()
+        try:
+            import Heaps
+        finally:
+            random.setstate(state)
+    return sys.modules['Heaps'].Heap
+
+
+def _merge(runs, key, reverse):
+    """Lazily merges the iterators in runs (each over a sorted run, in input
+    order) by way of a Heap holding the next element from each."""
+    heap = _heap_class()(operator.itemgetter(0))
+    for run, it in enumerate(runs):
+        for x in it:
+            heap.add((_MergeKey(key(x), run, reverse), x, it))
+            break
+    while heap:
+        mkey, x, it = heap.pop()
+        yield x
+        for x in it:
+            heap.add((_MergeKey(key(x), mkey.run, reverse), x, it))
+            break
+
+
+def external_sort(iterable, key=None, reverse=False, run_size=100000, fan_in=16, tmpdir=None):
+    """Returns an iterator over the elements of iterable in sorted order (by
+    key, if given, and in descending order if reverse), spilling sorted runs
+    of up to run_size elements to temporary files (in directory tmpdir, if
+    given) and merging up to fan_in of them at a time."""
+    if run_size < 1:
+        raise ValueError('run_size must be at least 1')
+    if fan_in < 2:
+        raise ValueError('fan_in must be at least 2')
+    return _external_sort(iter(iterable), key, reverse, run_size, fan_in, tmpdir)
+
+
+def _external_sort(it, key, reverse, run_size, fan_in, tmpdir):
+    merge_key = key if key is not None else (lambda x: x)
+    with tempfile.TemporaryDirectory(prefix='arraylist-sort-', dir=tmpdir) as tmp:
+        paths = []
+        names = itertools.count()
+        while True:
+            run = ArrayList()
+            run.extend(itertools.islice(it, run_size))
+            if not paths and len(run) < run_size:
+                # everything fits in a single run, so there's no need to spill
+                run.sort(key=key, reverse=reverse)
+                yield from run
+                return
+            if len(run) == 0:
+                break
+            run.sort(key=key, reverse=reverse)
+            paths.append(os.path.join(tmp, str(next(names))))
+            _spill(run.iter_chunks(_SPILL_BATCH), paths[-1])
+            full = len(run) == run_size
+            run = None
+            if not full:
+                break
+
+        while len(paths) > fan_in:
+            merged = []
+            for g in range(0, len(paths), fan_in):
+                group = paths[g:g+fan_in]
+                merged.append(os.path.join(tmp, str(next(names))))
+                _spill(_batched(_merge([_read_run(p) for p in group], merge_key, reverse),
+                                _SPILL_BATCH), merged[-1])
+                for p in group:
+                    os.remove(p)
+            paths = merged
+
+        runs = [_read_run(p) for p in paths]
+        try:
+            yield from _merge(runs, merge_key, reverse)
+        finally:
+            for run in runs:
+                run.close()
+
+
+# ## Lazy pipelines
+# 
+# `lst.lazy()` returns an `ArrayListPipeline`, to which `map`, `filter`, `take` and `enumerate` stages can be chained (each call returning a new pipeline, and leaving the one it was called on as it was). Nothing is computed until the pipeline is iterated over, or `collect`ed into a new list: the stages are then fused into a single pass over the list --- a chain of the built-in `map`, `filter`, `itertools.islice` and `enumerate` iterators, fed with batches from `iter_chunks` --- so that each element flows through every stage before the next is read, and no intermediate list is built.
+
+# In[ ]:
+
+
+class ArrayListPipeline:
+    def __init__(self, source, stages=()):
+        """Creates a pipeline over the elements of source (an ArrayList, or
+        any other iterable) that applies the given (kind, argument) stages."""
+        self.source = source
+        self.stages = tuple(stages)
+
+    def _then(self, kind, arg):
+        return ArrayListPipeline(self.source, self.stages + ((kind, arg),))
+
+    def map(self, function):
+        """Adds a stage that replaces each element x with function(x)."""
+        return self._then('map', function)
+
+    def filter(self, predicate):
+        """Adds a stage that keeps only the elements x for which predicate(x)
+        is true."""
+        return self._then('filter', predicate)
+
+    def take(self, n):
+        """Adds a stage that passes on (at most) the first n elements, and
+        stops reading the list once it has."""
+        if n < 0:
+            raise ValueError('Cannot take a negative number of elements')
+        return self._then('take', n)
+
+    def enumerate(self, start=0):
+        """Adds a stage that replaces each element x with a tuple (i, x),
+        where i counts up from start."""
+        return self._then('enumerate', start)
+
+    def __iter__(self):
+        chunks = getattr(self.source, 'iter_chunks', None)
+        if chunks is not None:
+            it = itertools.chain.from_iterable(chunks(_ITER_BATCH))
+        else:
+            it = iter(self.source)
+        for kind, arg in self.stages:
+            if kind == 'map':
+                it = map(arg, it)
+            elif kind == 'filter':
+                it = filter(arg, it)
+            elif kind == 'take':
+                it = itertools.islice(it, arg)
+            else:
+                it = enumerate(it, arg)
+        return it
+
+    def __length_hint__(self):
+        """Returns the number of elements the pipeline will produce, if it
+        can be told without running it (i.e., if it has no filter stages)."""
+        n = len(self.source)
+        for kind, arg in self.stages:
+            if kind == 'filter':
+                return NotImplemented
+            if kind == 'take':
+                n = min(n, arg)
+        return n
+
+    def collect(self, into=None):
+        """Runs the pipeline, adding the elements it produces to the list into
+        (by default, a new ArrayList), which is returned."""
+        if into is None:
+            into = ArrayList()
+        into.extend(self)
+        return into
+
+
+
+# In[ ]:
+
+
+# the tests below expect the default (checked) storage, so ARRAYLIST_STORAGE
+# is cleared while they run, and restored after the last of them
+_storage_env = os.environ.pop('ARRAYLIST_STORAGE', None)
+
+
+# In[5]:
+
+
+# (6 points) test subscript-based access
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+lst = ArrayList()
+data = [1, 2, 3, 4]
+lst.data = ConstrainedList(data)
+
+for i in range(len(data)):
+    tc.assertEqual(lst[i], data[i])
+    
+with tc.assertRaises(IndexError):
+    x = lst[100]
+
+with tc.assertRaises(IndexError):
+    lst[100] = 0
+
+with tc.assertRaises(IndexError):
+    del lst[100]
+
+lst[1] = data[1] = 20
+del data[0]
+del lst[0]
+
+for i in range(len(data)):
+    tc.assertEqual(lst[i], data[i])
+
+data = [random.randint(1, 100) for _ in range(100)]
+lst.data = ConstrainedList(data)
+for i in range(len(data)):
+    lst[i] = data[i] = random.randint(101, 200)
+for i in range(50):
+    to_del = random.randrange(len(data))
+    del lst[to_del]
+    del data[to_del]
+
+for i in range(len(data)):
+    tc.assertEqual(lst[i], data[i])
+    
+for i in range(0, -len(data), -1):
+    tc.assertEqual(lst[i], data[i])
+
+
+# In[6]:
+
+
+# (4 points) test stringification
+
+from unittest import TestCase
+tc = TestCase()
+
+lst = ArrayList()
+tc.assertIsInstance(lst.data, ConstrainedList)
+tc.assertEqual('[]', str(lst))
+tc.assertEqual('[]', repr(lst))
+
+lst.data = ConstrainedList([1])
+tc.assertEqual('[1]', str(lst))
+tc.assertEqual('[1]', repr(lst))
+
+lst.data = ConstrainedList([10, 20, 30, 40, 50])
+tc.assertEqual('[10, 20, 30, 40, 50]', str(lst))
+tc.assertEqual('[10, 20, 30, 40, 50]', repr(lst))
+
+
+# In[207]:
+
+
+# (8 points) test single-element manipulation
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+lst = ArrayList()
+data = []
+
+for _ in range(100):
+    to_add = random.randrange(1000)
+    data.append(to_add)
+    lst.append(to_add)
+
+tc.assertIsInstance(lst.data, ConstrainedList)
+tc.assertEqual(data, lst.data._as_list()[:len(lst)])
+
+for _ in range(100):
+    to_ins = random.randrange(1000)
+    ins_idx = random.randrange(len(data)+1)
+    data.insert(ins_idx, to_ins)
+    lst.insert(ins_idx, to_ins)
+
+tc.assertEqual(data, lst.data._as_list()[:len(lst)])
+
+for _ in range(100):
+    pop_idx = random.randrange(len(data))
+    tc.assertEqual(data.pop(pop_idx), lst.pop(pop_idx))
+    
+tc.assertEqual(data, lst.data._as_list()[:len(lst)])
+
+for _ in range(25):
+    to_rem = data[random.randrange(len(data))]
+    data.remove(to_rem)
+    lst.remove(to_rem)
+    
+tc.assertEqual(data, lst.data._as_list()[:len(lst)])
+
+with tc.assertRaises(ValueError):
+    lst.remove(9999)
+
+
+# In[208]:
+
+
+# (4 points) test predicates
+
+from unittest import TestCase
+tc = TestCase()
+lst = ArrayList()
+lst2 = ArrayList()
+
+lst.data = ConstrainedList([])
+lst2.data = ConstrainedList([1, 2, 3])
+tc.assertNotEqual(lst, lst2)
+
+lst.data = ConstrainedList([1, 2, 3])
+tc.assertEqual(lst, lst2)
+
+lst.data = ConstrainedList([])
+tc.assertFalse(1 in lst)
+tc.assertFalse(None in lst)
+
+lst.data = ConstrainedList(range(100))
+tc.assertFalse(100 in lst)
+tc.assertTrue(50 in lst)
+
+
+# In[209]:
+
+
+# (10 points) test queries
+
+from unittest import TestCase
+tc = TestCase()
+lst = ArrayList()
+
+tc.assertEqual(0, len(lst))
+tc.assertEqual(0, lst.count(1))
+with tc.assertRaises(ValueError):
+    lst.index(1)
+
+import random
+data = [random.randrange(1000) for _ in range(100)]
+lst.data = ConstrainedList(data)
+
+tc.assertEqual(100, len(lst))
+tc.assertEqual(min(data), lst.min())
+tc.assertEqual(max(data), lst.max())
+for x in data:    
+    tc.assertEqual(data.index(x), lst.index(x))
+    tc.assertEqual(data.count(x), lst.count(x))
+
+with tc.assertRaises(ValueError):
+    lst.index(1000)
+    
+lst.data = ConstrainedList([1, 2, 1, 2, 1, 1, 1, 2, 1])
+tc.assertEqual(1, lst.index(2))
+tc.assertEqual(1, lst.index(2, 1))
+tc.assertEqual(3, lst.index(2, 2))
+tc.assertEqual(7, lst.index(2, 4))
+tc.assertEqual(7, lst.index(2, 4, -1))
+with tc.assertRaises(ValueError):
+    lst.index(2, 4, -2)
+
+
+# In[210]:
+
+
+# (6 points) test bulk operations
+
+from unittest import TestCase
+tc = TestCase()
+lst = ArrayList()
+lst2 = ArrayList()
+lst3 = lst+lst2
+
+tc.assertIsInstance(lst3, ArrayList)
+tc.assertEqual([], lst3.data._as_list()[:len(lst3)])
+
+import random
+data  = [random.randrange(1000) for _ in range(50)]
+data2 = [random.randrange(1000) for _ in range(50)]
+lst.data = ConstrainedList(data)
+lst2.data = ConstrainedList(data2)
+lst3 = lst + lst2
+tc.assertEqual(100, len(lst3))
+tc.assertEqual(data + data2, lst3.data._as_list()[:len(lst3)])
+
+lst.clear()
+tc.assertEqual([], lst.data._as_list()[:len(lst)])
+
+lst.data = ConstrainedList([random.randrange(1000) for _ in range(50)])
+lst2 = lst.copy()
+tc.assertIsNot(lst, lst2)
+tc.assertIsNot(lst.data, lst2.data)
+tc.assertEqual(lst.data._as_list()[:len(lst)], lst2.data._as_list()[:len(lst2)])
+
+lst.clear()
+lst.extend(range(10))
+lst.extend(range(10,0,-1))
+lst.extend(data.copy())
+tc.assertEqual(70, len(lst))
+tc.assertEqual(list(range(10))+list(range(10,0,-1))+data, lst.data._as_list()[:len(lst)])
+
+
+# In[194]:
+
+
+# (2 points) test iteration
+
+from unittest import TestCase
+tc = TestCase()
+lst = ArrayList()
+
+import random
+data = [random.randrange(1000) for _ in range(100)]
+lst.data = ConstrainedList(data)
+tc.assertEqual(data, [x for x in lst])
+
+it1 = iter(lst)
+it2 = iter(lst)
+for x in data:
+    tc.assertEqual(next(it1), x)
+    tc.assertEqual(next(it2), x)
+
+
+
+# In[ ]:
+
+
+# test capacity growth and shrinking
+
+from unittest import TestCase
+tc = TestCase()
+
+with tc.assertRaises(ValueError):
+    ArrayList(growth_factor=1)
+
+lst = ArrayList()
+tc.assertEqual(0, lst.capacity)
+caps = set()
+for i in range(1000):
+    lst.append(i)
+    tc.assertEqual(i+1, len(lst))
+    caps.add(lst.capacity)
+tc.assertEqual(list(range(1000)), [x for x in lst])
+tc.assertEqual(1024, lst.capacity)
+tc.assertLessEqual(len(caps), 12)
+
+while len(lst) > 300:
+    lst.pop()
+tc.assertEqual(1024, lst.capacity)
+while len(lst) > 200:
+    lst.pop()
+tc.assertLess(lst.capacity, 1024)
+tc.assertGreaterEqual(lst.capacity, len(lst))
+tc.assertEqual(list(range(200)), [x for x in lst])
+
+lst = ArrayList(growth_factor=1.5)
+lst.extend(range(100))
+for i in range(50):
+    del lst[0]
+tc.assertEqual(list(range(50, 100)), [x for x in lst])
+tc.assertLessEqual(len(lst), lst.capacity)
+tc.assertTrue(all(x is None for x in lst.data._as_list()[len(lst):]))
+
+# the empty slots of an (emptied) list aren't its min or max
+for lst in (ArrayList.with_capacity(10), TypedArrayList('d'), GapArrayList(),
+            SortedArrayList(), ArrayList(storage='unchecked')):
+    lst.extend([3, 1, 2])
+    del lst[:]
+    tc.assertGreater(lst.capacity, 0)
+    for method in (lst.min, lst.max):
+        with tc.assertRaises(ValueError):
+            method()
+
+
+# In[ ]:
+
+
+# test range insertion and deletion
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+lst = ArrayList()
+data = []
+
+for _ in range(50):
+    vals = [random.randrange(1000) for _ in range(random.randrange(10))]
+    ins_idx = random.randrange(len(data)+1)
+    data[ins_idx:ins_idx] = vals
+    lst.insert_many(ins_idx, iter(vals))
+tc.assertEqual(data, [x for x in lst])
+
+with tc.assertRaises(IndexError):
+    lst.insert_many(len(lst)+1, [1])
+
+for _ in range(20):
+    i = random.randrange(len(data))
+    j = random.randrange(i, min(i+20, len(data))+1)
+    del data[i:j]
+    lst.delete_range(i, j)
+tc.assertEqual(data, [x for x in lst])
+
+del data[5:-5]
+del lst[5:-5]
+tc.assertEqual(data, [x for x in lst])
+
+lst = ArrayList()
+lst.extend(range(100))
+data = list(range(100))
+del data[::3]
+del lst[::3]
+tc.assertEqual(data, [x for x in lst])
+del data[50:10:-7]
+del lst[50:10:-7]
+tc.assertEqual(data, [x for x in lst])
+del data[:]
+del lst[:]
+tc.assertEqual(0, len(lst))
+
+
+# In[ ]:
+
+
+# test slices and views
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+lst = ArrayList()
+data = [random.randrange(1000) for _ in range(100)]
+lst.extend(data)
+
+for s in (slice(None), slice(10, 20), slice(-30, -5), slice(5, 90, 7),
+          slice(None, None, -1), slice(80, 10, -3), slice(200, 300)):
+    view = lst[s]
+    tc.assertIsInstance(view, ArrayListView)
+    tc.assertIs(lst, view.parent)
+    tc.assertEqual(data[s], [x for x in view])
+    tc.assertEqual(len(data[s]), len(view))
+    tc.assertEqual(str(data[s]), str(view))
+    for i in range(-len(view), len(view)):
+        tc.assertEqual(data[s][i], view[i])
+    if data[s]:
+        tc.assertEqual(min(data[s]), view.min())
+        tc.assertEqual(max(data[s]), view.max())
+        x = data[s][len(data[s])//2]
+        tc.assertTrue(x in view)
+        tc.assertEqual(data[s].index(x), view.index(x))
+        tc.assertEqual(data[s].count(x), view.count(x))
+    else:
+        with tc.assertRaises(ValueError):
+            view.min()
+        with tc.assertRaises(ValueError):
+            view.max()
+    tc.assertFalse(1000 in view)
+
+view = lst[10:60][5:40:2]
+tc.assertEqual(data[10:60][5:40:2], [x for x in view])
+copy = view.materialize()
+tc.assertIsInstance(copy, ArrayList)
+tc.assertEqual(copy, view)
+view[0] = data[15] = -1
+tc.assertEqual(-1, lst[15])
+tc.assertNotEqual(copy, view)
+
+lst[10:20][2:5] = data[12:15] = [-2]
+tc.assertEqual(data, [x for x in lst])
+view = lst[::-1]
+view[1:7:2] = [-4, -5, -6]
+for i, x in zip(range(len(data))[::-1][1:7:2], [-4, -5, -6]):
+    data[i] = x
+tc.assertEqual(data, [x for x in lst])
+view = lst[5:50:3]
+view[2:4] = [-7, -8]
+data[11], data[14] = -7, -8
+tc.assertEqual(data, [x for x in lst])
+with tc.assertRaises(ValueError):
+    view[2:4] = [1, 2, 3]
+with tc.assertRaises(ValueError):
+    lst[::-1][::-1] = [1]
+tc.assertEqual(data, [x for x in lst])
+
+lst[20:30] = data[20:30] = range(3)
+tc.assertEqual(data, [x for x in lst])
+lst[0:0] = data[0:0] = [7, 8, 9]
+tc.assertEqual(data, [x for x in lst])
+lst[::4] = data[::4] = [0] * len(data[::4])
+tc.assertEqual(data, [x for x in lst])
+with tc.assertRaises(ValueError):
+    lst[::4] = [1, 2]
+lst[::2] = data[::2] = lst[1::2].materialize()[:len(data[::2])]
+tc.assertEqual(data, [x for x in lst])
+del lst[10:]
+with tc.assertRaises(IndexError):
+    view[len(view)-1]
+
+
+# In[ ]:
+
+
+# test typed lists
+
+from unittest import TestCase
+import random
+import struct
+
+tc = TestCase()
+lst = TypedArrayList('d')
+tc.assertIsInstance(lst.data, ConstrainedArray)
+tc.assertEqual('[]', str(lst))
+
+data = [random.random() for _ in range(100)]
+lst.extend(data)
+tc.assertEqual(data, [x for x in lst])
+tc.assertEqual(data, lst.data._as_list()[:len(lst)])
+tc.assertEqual(min(data), lst.min())
+tc.assertEqual(max(data), lst.max())
+tc.assertTrue(data[50] in lst)
+tc.assertEqual(data.index(data[50]), lst.index(data[50]))
+
+lst.insert(10, 0.5)
+data.insert(10, 0.5)
+del lst[20]
+del data[20]
+lst[30:40] = data[30:40] = [1.0, 2.0]
+tc.assertEqual(data, [x for x in lst])
+tc.assertEqual(data[5:50:3], [x for x in lst[5:50:3]])
+
+with tc.assertRaises(TypeError):
+    lst.append('foo')
+
+# values that can't be stored leave the list unchanged (rather than
+# shifting the elements after them, and dropping the last)
+ints = TypedArrayList('b')
+ints.extend(range(10))
+for mutate in (lambda: ints.insert(3, 'foo'), lambda: ints.insert(0, 1000),
+               lambda: ints.append(1000), lambda: ints.__setitem__(5, 'foo'),
+               lambda: ints.__setitem__(slice(2, 4), [1, 'foo', 2]),
+               lambda: ints.insert_many(4, [1, 2, 300])):
+    with tc.assertRaises((TypeError, OverflowError)):
+        mutate()
+    tc.assertEqual(list(range(10)), [x for x in ints])
+
+with lst.buffer() as view:
+    tc.assertEqual(len(data), len(view))
+    tc.assertEqual(8, view.itemsize)
+    tc.assertEqual(data, list(struct.unpack('{}d'.format(len(data)), view)))
+    view[0] = -1.0
+tc.assertEqual(-1.0, lst[0])
+
+copy = lst.copy()
+tc.assertIsInstance(copy, TypedArrayList)
+tc.assertIsNot(lst.data, copy.data)
+tc.assertEqual(lst, copy)
+tc.assertIsInstance(lst + copy, TypedArrayList)
+tc.assertIsInstance(lst[::2].materialize(), TypedArrayList)
+
+ints = TypedArrayList('q')
+ints.extend(range(1000))
+while len(ints) > 10:
+    ints.pop()
+tc.assertEqual(list(range(10)), [x for x in ints])
+tc.assertLess(ints.capacity, 1000)
+ints.clear()
+tc.assertEqual(0, len(ints))
+tc.assertIsInstance(ints.data, ConstrainedArray)
+
+
+# In[ ]:
+
+
+# test vectorized queries (compares NumPy and pure-Python results, if NumPy is available)
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+lst = TypedArrayList('q')
+lst.extend(random.randrange(-500, 500) for _ in range(1000))
+data = [x for x in lst]
+flst = TypedArrayList('d')
+flst.extend([1.5, float('nan'), -2.0, 3.0])
+
+def queries(lst, probes):
+    results = [lst.min(), lst.max()]
+    for x in probes:
+        results.append((x in lst, lst.count(x)))
+        try:
+            results.append(lst.index(x, 10, -10))
+        except ValueError:
+            results.append(None)
+    return results
+
+probes = data[:20] + [1000, 2**70, 0.5, 7.0, 'foo', None]
+for use_numpy in (False, True):
+    lst.use_numpy = use_numpy
+    result = queries(lst, probes) + queries(lst[900:5:-3], probes)
+    tc.assertEqual(min(data[::-3]), lst[::-3].min())
+    tc.assertEqual(max(data[5:500:7]), lst[5:500:7].max())
+    tc.assertEqual(data[5:500:7].count(data[10]), lst[5:500:7].count(data[10]))
+    tc.assertEqual(data[::-1].index(data[10]), lst[::-1].index(data[10]))
+    if use_numpy:
+        tc.assertEqual(pure, result)
+    pure = result
+    flst.use_numpy = use_numpy
+    tc.assertEqual((-2.0, 3.0), (flst.min(), flst.max()))
+    tc.assertFalse(float('nan') in flst)
+
+# values NumPy would have to cast to compare (inexactly), and sums of floats
+# (which must be added in the same order to round the same way)
+cases = [('f', [0.1, 0.5], [0.1, 0.5, 1]), ('q', [2**53+1, 3], [float(2**53), 3.0, 2**53+1]),
+         ('q', [2**63-1], [float(2**63), 2**63-1, 2.5]), ('Q', [0, 5], [-1, 5.0]),
+         ('d', [random.uniform(-1e6, 1e6) for _ in range(5000)] + [1e16, 1.0, -1e16], [1.0])]
+for typecode, values, probes in cases:
+    tlst = TypedArrayList(typecode)
+    tlst.extend(values)
+    results = []
+    for use_numpy in (False, True):
+        tlst.use_numpy = use_numpy
+        results.append(queries(tlst, probes) + [tlst.index(tlst[-1]), tlst.sum(), tlst.sum(0.5)])
+    tc.assertEqual(results[0], results[1])
+
+lst.use_numpy = TypedArrayList.use_numpy
+try:
+    lst.index(12345)
+except ValueError:
+    lst.append(12345) # must not be blocked by a lingering buffer export
+tc.assertEqual(12345, lst[-1])
+
+
+# In[ ]:
+
+
+# test storage backends
+
+from unittest import TestCase
+import os
+import random
+
+tc = TestCase()
+data = [random.randrange(1000) for _ in range(100)]
+
+for storage in ('checked', 'unchecked', ConstrainedList):
+    lst = ArrayList(storage=storage)
+    lst.extend(data)
+    lst.insert(10, -1)
+    del lst[20:30]
+    expected = data[:10] + [-1] + data[10:19] + data[29:]
+    tc.assertEqual(expected, [x for x in lst])
+    tc.assertEqual(min(expected), lst.min())
+    tc.assertIs(lst.storage, type(lst.data))
+    tc.assertIs(lst.storage, type(lst.copy().data))
+    lst.clear()
+    tc.assertIs(lst.storage, type(lst.data))
+
+tc.assertIs(ConstrainedList, type(ArrayList().data))
+tc.assertIs(list, type(ArrayList(storage='unchecked').data))
 with tc.assertRaises(ValueError):
-    lst.index(1000)
-    
-lst.data = ConstrainedList([1, 2, 1, 2, 1, 1, 1, 2, 1])
-tc.assertEqual(1, lst.index(2))
-tc.assertEqual(1, lst.index(2, 1))
-tc.assertEqual(3, lst.index(2, 2))
-tc.assertEqual(7, lst.index(2, 4))
-tc.assertEqual(7, lst.index(2, 4, -1))
+    ArrayList(storage='fast')
+
+old = os.environ.get('ARRAYLIST_STORAGE')
+os.environ['ARRAYLIST_STORAGE'] = 'unchecked'
+try:
+    tc.assertIs(list, type(ArrayList().data))
+    tc.assertIs(UncheckedArray, type(TypedArrayList('d').data))
+    tc.assertIs(ConstrainedList, type(ArrayList(storage='checked').data))
+finally:
+    if old is None:
+        del os.environ['ARRAYLIST_STORAGE']
+    else:
+        os.environ['ARRAYLIST_STORAGE'] = old
+
+lst = TypedArrayList('q', storage='unchecked')
+lst.extend(range(100))
+del lst[::2]
+tc.assertEqual(list(range(1, 100, 2)), [x for x in lst])
+tc.assertIs(UncheckedArray, type(lst[::3].materialize().data))
+
+
+# In[ ]:
+
+
+# test content fingerprints
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+
+class Probe:
+    """A hashable value that counts equality tests."""
+    comparisons = 0
+    def __init__(self, v):
+        self.v = v
+    def __eq__(self, other):
+        Probe.comparisons += 1
+        return isinstance(other, Probe) and self.v == other.v
+    def __hash__(self):
+        return hash(self.v)
+
+lst = ArrayList()
+lst.track_fingerprint()
+data = []
+for _ in range(200):
+    x = random.randrange(100)
+    lst.append(x)
+    data.append(x)
+for _ in range(50):
+    i = random.randrange(len(data))
+    op = random.randrange(6)
+    if op == 0:
+        lst.insert(i, -i)
+        data.insert(i, -i)
+    elif op == 1:
+        del lst[i]
+        del data[i]
+    elif op == 2:
+        lst[i] = data[i] = random.randrange(100)
+    elif op == 3:
+        lst[i:i+3] = data[i:i+3] = [1, 2]
+    elif op == 4:
+        del lst[i::7]
+        del data[i::7]
+    else:
+        lst[i::5] = data[i::5] = [0] * len(data[i::5])
+    lst[-i:][0] = data[-i] = 42 # through a view
+tc.assertEqual(data, [x for x in lst])
+untracked = ArrayList()
+untracked.extend(data)
+tc.assertIsNotNone(lst.fingerprint())
+tc.assertEqual(untracked.fingerprint(), lst.fingerprint())
+tc.assertEqual(lst, untracked)
+
+a = ArrayList()
+b = ArrayList()
+a.extend(Probe(i) for i in range(100))
+b.extend(Probe(i) for i in range(100))
+a.track_fingerprint()
+b.track_fingerprint()
+b[50] = Probe(-1)
+Probe.comparisons = 0
+tc.assertNotEqual(a, b)
+tc.assertEqual(0, Probe.comparisons)
+b[50] = Probe(50)
+tc.assertEqual(a, b)
+
+a.append([1, 2])
+b.append([1, 2])
+tc.assertIsNone(a.fingerprint())
+tc.assertEqual(a, b)
+a.pop()
+tc.assertIsNotNone(a.fingerprint())
+
+a.clear()
+tc.assertEqual(0, a.fingerprint())
+a.track_fingerprint(False)
+a.data = ConstrainedList([1, 2, 3])
+b.data = ConstrainedList([3, 2, 1])
+tc.assertEqual(a.fingerprint(), b.fingerprint())
+tc.assertNotEqual(a, b)
+
+class ByteSlots(ConstrainedList):
+    """A backing store whose slots only accept (small) ints."""
+    def __setitem__(self, idx, value):
+        if value is not None and not -128 <= value < 128:
+            raise OverflowError
+        super().__setitem__(idx, value)
+
+lst = ArrayList(storage=ByteSlots)
+lst.track_fingerprint()
+lst.extend(range(10))
+fp = lst.fingerprint()
+with tc.assertRaises(OverflowError):
+    lst.append(1000)
+with tc.assertRaises(OverflowError):
+    lst[5] = 1000
+tc.assertEqual(list(range(10)), [x for x in lst])
+tc.assertEqual(fp, lst.fingerprint())
+lst.track_fingerprint()
+tc.assertEqual(fp, lst.fingerprint())
+
+
+# In[ ]:
+
+
+# test sorting and sorted lists
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+
+for data in ([random.randrange(100) for _ in range(500)],
+             list(range(300)), list(range(300, 0, -1)),
+             list(range(200)) + [5, 3] + list(range(200, 400)),
+             [random.random() for _ in range(40)], [], [1]):
+    for key, reverse in ((None, False), (None, True), (lambda x: x % 7, False),
+                         (lambda x: -x % 5, True)):
+        lst = ArrayList()
+        lst.extend(data)
+        lst.sort(key=key, reverse=reverse)
+        tc.assertEqual(sorted(data, key=key, reverse=reverse), [x for x in lst])
+
+pairs = [(random.randrange(10), i) for i in range(200)]
+lst = TypedArrayList('q')
+lst.extend(a*1000 + b for a, b in pairs)
+lst.sort(key=lambda x: x // 1000, reverse=True)
+tc.assertEqual(sorted((a*1000 + b for a, b in pairs), key=lambda x: x // 1000, reverse=True),
+               [x for x in lst])
+
+# a comparison that raises partway through leaves the elements permuted
+class Fragile:
+    calls = 0
+    def __init__(self, v):
+        self.v = v
+    def __lt__(self, other):
+        Fragile.calls += 1
+        if Fragile.calls > limit:
+            raise RuntimeError
+        return self.v < other.v
+for limit in range(0, 3000, 37):
+    data = [Fragile(random.randrange(1000)) for _ in range(300)]
+    lst = ArrayList()
+    lst.extend(data)
+    Fragile.calls = 0
+    try:
+        lst.sort()
+    except RuntimeError:
+        pass
+    tc.assertEqual(sorted(map(id, data)), sorted(id(x) for x in lst))
+
+slst = SortedArrayList()
+data = [random.randrange(100) for _ in range(300)]
+for x in data:
+    slst.add(x)
+data.sort()
+tc.assertEqual(data, [x for x in slst])
+slst.extend([50, 0, 99])
+data = sorted(data + [50, 0, 99])
+tc.assertEqual(data, [x for x in slst])
+
+# a large batch is merged in, after any equal elements already in the list
+merged = SortedArrayList()
+merged.extend(data)
+batch = [float(random.randrange(120)) for _ in range(200)]
+merged.extend(batch)
+tc.assertEqual(sorted(data + batch), [x for x in merged])
+tc.assertEqual([type(x) for x in sorted(data + batch)], [type(x) for x in merged])
+merged.extend(merged)
+tc.assertEqual(sorted(2 * (data + batch)), [x for x in merged])
+with tc.assertRaises(TypeError):
+    merged.extend([None] * 100)
+tc.assertEqual(sorted(2 * (data + batch)), [x for x in merged])
+
+for x in range(-1, 101):
+    tc.assertEqual(x in data, x in slst)
+    tc.assertEqual(data.count(x), slst.count(x))
+    if x in data:
+        tc.assertEqual(data.index(x), slst.index(x))
+    else:
+        with tc.assertRaises(ValueError):
+            slst.index(x)
+tc.assertEqual(data.index(data[150], 120), slst.index(data[150], 120))
+tc.assertEqual((data[0], data[-1]), (slst.min(), slst.max()))
+tc.assertEqual([x for x in data if 20 <= x < 40], [x for x in slst.irange(20, 40)])
+tc.assertEqual([x for x in data if x >= 90][::-1], [x for x in slst.irange(90, reverse=True)])
+tc.assertEqual([], [x for x in slst.irange(40, 20)])
+
+slst.remove(data[10])
+del data[10]
+tc.assertEqual(data, [x for x in slst])
+slst.insert(0, -5)
+slst[1] = data[0]
 with tc.assertRaises(ValueError):
-    lst.index(2, 4, -2)
+    slst.insert(0, 1000)
+with tc.assertRaises(ValueError):
+    slst[0] = 1000
+with tc.assertRaises(ValueError):
+    slst.insert_many(5, [1000, -1000])
+with tc.assertRaises(TypeError):
+    slst[0:2] = [0, 1]
+tc.assertEqual([-5] + data, [x for x in slst])
+tc.assertIsInstance(slst.copy(), SortedArrayList)
+tc.assertEqual(slst, slst[10:50].materialize() + slst[:10].materialize() + slst[50:].materialize())
 
 
-# In[210]:
+# In[ ]:
 
 
-# (6 points) test bulk operations
+# test gap buffers
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+lst = GapArrayList()
+tc.assertEqual('[]', str(lst))
+data = []
+cursor = 0
+for _ in range(2000):
+    op = random.randrange(10)
+    if op < 5:
+        x = random.randrange(1000)
+        lst.insert(cursor, x)
+        data.insert(cursor, x)
+        cursor += 1
+    elif op < 7 and cursor > 0:
+        cursor -= 1
+        del lst[cursor]
+        del data[cursor]
+    elif op < 9:
+        cursor = max(0, min(len(data), cursor + random.randrange(-3, 4)))
+    else:
+        cursor = random.randrange(len(data)+1)
+    if data and op == 9:
+        i = random.randrange(len(data))
+        tc.assertEqual(data[i], lst[i])
+        lst[i] = data[i] = -1
+tc.assertEqual(len(data), len(lst))
+tc.assertEqual(data, [x for x in lst])
+tc.assertEqual(str(data), str(lst))
+tc.assertEqual(data[10:50:3], [x for x in lst[10:50:3]])
+for i in range(-len(data), len(data)):
+    tc.assertEqual(data[i], lst[i])
+
+lst.insert(5, 'x')
+data.insert(5, 'x')
+plain = ArrayList()
+plain.extend(data)
+tc.assertEqual(plain, lst)
+lst.insert(7, 'y')
+tc.assertEqual(data[:7] + ['y'] + data[7:], [x for x in lst])
+tc.assertNotEqual(plain, lst)
+del lst[7]
+tc.assertEqual(plain, lst)
+tc.assertEqual(lst, plain)
+tc.assertEqual(5, lst.index('x'))
+lst.remove('x')
+del data[5]
+
+lst.extend(range(100))
+data.extend(range(100))
+lst.insert_many(3, [7, 8, 9])
+data[3:3] = [7, 8, 9]
+del lst[10:30]
+del data[10:30]
+del lst[::5]
+del data[::5]
+lst[20:25] = data[20:25] = ['a', 'b']
+lst[1::9] = data[1::9] = range(len(data[1::9]))
+tc.assertEqual(data, [x for x in lst])
+tc.assertEqual(data.count(8), lst.count(8))
+tc.assertIsInstance(lst.copy(), GapArrayList)
+tc.assertEqual(data + data, [x for x in lst + lst])
+
+lst = GapArrayList()
+lst.track_fingerprint()
+lst.extend(range(1000))
+for i in range(500):
+    lst.insert(i, -i)
+    del lst[i+1]
+while len(lst) > 10:
+    lst.pop(len(lst)//2)
+tc.assertLess(lst.capacity, 100)
+expected = ArrayList()
+expected.extend(x for x in lst)
+tc.assertEqual(expected.fingerprint(), lst.fingerprint())
+lst.sort()
+tc.assertEqual(sorted(expected), [x for x in lst])
+
+
+# In[ ]:
+
+
+# test memory-mapped lists
+
+from unittest import TestCase
+import os
+import random
+import tempfile
+
+tc = TestCase()
+with tempfile.TemporaryDirectory() as tmpdir:
+    path = os.path.join(tmpdir, 'points.dat')
+    with tc.assertRaises(ValueError):
+        MmapArrayList(path)
+    with tc.assertRaises(struct.error):
+        MmapArrayList(path, 'not a format')
+    tc.assertFalse(os.path.exists(path))
+
+    data = [(random.randrange(-1000, 1000), random.random()) for _ in range(500)]
+    with MmapArrayList(path, '<qd') as lst:
+        tc.assertEqual(0, len(lst))
+        tc.assertEqual('[]', str(lst))
+        lst.append(data[0])
+        lst.extend(data[1:])
+        tc.assertEqual(500, len(lst))
+        tc.assertEqual(500, lst.capacity)
+        tc.assertEqual(data, [x for x in lst])
+        tc.assertEqual(data[-1], lst[-1])
+        lst.insert(10, (0, 0.0))
+        data.insert(10, (0, 0.0))
+        del lst[100:200]
+        del data[100:200]
+        lst[5] = data[5] = (7, 7.5)
+        tc.assertEqual(data[::7], [x for x in lst[::7]])
+        tc.assertEqual(max(data), lst.max())
+        tc.assertIsInstance(lst.copy(), ArrayList)
+
+    tc.assertEqual(MmapRecords.HEADER.size + 1000 * 16, os.path.getsize(path))
+    with MmapArrayList(path) as lst:
+        tc.assertEqual('<qd', lst.record_format)
+        tc.assertEqual(data, [x for x in lst])
+        while len(lst) > 10:
+            lst.pop()
+        tc.assertLess(lst.capacity, 100)
+        tc.assertEqual(data[:10], [x for x in lst])
+    with tc.assertRaises(ValueError):
+        MmapArrayList(path, 'd')
+
+    path = os.path.join(tmpdir, 'floats.dat')
+    lst = MmapArrayList(path, 'd')
+    lst.extend(range(100))
+    lst.sort(reverse=True)
+    tc.assertEqual(list(map(float, range(99, -1, -1))), [x for x in lst])
+    lst.clear()
+    tc.assertEqual(0, len(lst))
+    tc.assertEqual(MmapRecords.HEADER.size, os.path.getsize(path))
+    lst.append(1.5)
+    lst.close()
+    with MmapArrayList(path, 'd') as lst:
+        tc.assertEqual([1.5], [x for x in lst])
+
+    path = os.path.join(tmpdir, 'bogus.dat')
+    for contents in (b'x' * 100, b'ALMM\x01'):
+        with open(path, 'wb') as f:
+            f.write(contents)
+        with tc.assertRaises(ValueError):
+            MmapArrayList(path)
+        with open(path, 'rb') as f:
+            tc.assertEqual(contents, f.read())
+
+    # (a file truncated after its header, which still counts its records)
+    path = os.path.join(tmpdir, 'floats.dat')
+    with open(path, 'r+b') as f:
+        f.truncate(MmapRecords.HEADER.size)
+    with tc.assertRaisesRegex(ValueError, 'corrupt'):
+        MmapArrayList(path)
+    tc.assertEqual(MmapRecords.HEADER.size, os.path.getsize(path))
+
+
+# In[ ]:
+
+
+# test serialization
 
 from unittest import TestCase
+import io
+import pickle
+import random
+
 tc = TestCase()
+
+def roundtrip(lst, cls=ArrayList):
+    f = io.BytesIO()
+    lst.dump(f)
+    f.seek(0)
+    return cls.load(f)
+
 lst = ArrayList()
-lst2 = ArrayList()
-lst3 = lst+lst2
+lst.extend([1, 'two', 3.0, None, (4, 5), [6]])
+copy = roundtrip(lst)
+tc.assertIs(ArrayList, type(copy))
+tc.assertIsInstance(copy.data, ConstrainedList)
+tc.assertEqual(lst, copy)
+tc.assertEqual(0, len(roundtrip(ArrayList())))
+unsorted = ArrayList()
+unsorted.extend([3, 1, 2, 1])
+copy = roundtrip(unsorted, SortedArrayList)
+tc.assertIs(SortedArrayList, type(copy))
+tc.assertEqual([1, 1, 2, 3], [x for x in copy])
+tc.assertEqual(2, copy.count(1))
+with tc.assertRaises(TypeError):
+    roundtrip(lst[:3].materialize(), SortedArrayList)
+
+data = [random.random() for _ in range(1000)]
+tlst = TypedArrayList('d')
+tlst.extend(data)
+copy = roundtrip(tlst)
+tc.assertIs(TypedArrayList, type(copy))
+tc.assertEqual('d', copy.typecode)
+tc.assertEqual(data, [x for x in copy])
+tc.assertEqual(len(data), copy.capacity)
+copy.append(1.0)
+tc.assertEqual(0, len(roundtrip(TypedArrayList('q'))))
+
+# data written in the other byte order is swapped as it is loaded
+qlst = TypedArrayList('q')
+qlst.extend(range(-50, 50))
+f = io.BytesIO()
+qlst.dump(f)
+header = _DUMP_HEADER.size + _DUMP_TYPED_HEADER.size
+swapped = array.array('q', f.getvalue()[header:])
+swapped.byteswap()
+other = b'>' if sys.byteorder == 'little' else b'<'
+copy = TypedArrayList.load(io.BytesIO(f.getvalue()[:header-6] + other
+                                      + f.getvalue()[header-5:header] + swapped.tobytes()))
+tc.assertIsInstance(copy.data, ConstrainedArray)
+tc.assertEqual(qlst, copy)
+
+f = io.BytesIO()
+tlst.dump(f)
+for bad in (b'XXXX' + f.getvalue()[4:], f.getvalue()[:4] + b'\x09' + f.getvalue()[5:],
+            f.getvalue()[:-1]):
+    with tc.assertRaises(ValueError):
+        ArrayList.load(io.BytesIO(bad))
+f = io.BytesIO()
+lst.dump(f)
+f.seek(0)
+with tc.assertRaises(ValueError):
+    TypedArrayList.load(f)
+
+gap = GapArrayList()
+gap.extend([3, 1, 2])
+gap.insert(1, 0)
+slst = SortedArrayList()
+slst.extend([3, 1, 2])
+for src in (lst, tlst, gap, slst):
+    for protocol in (2, pickle.HIGHEST_PROTOCOL):
+        copy = pickle.loads(pickle.dumps(src, protocol))
+        tc.assertIs(type(src), type(copy))
+        tc.assertEqual([x for x in src], [x for x in copy])
+
+buffers = []
+pickled = pickle.dumps(tlst, protocol=5, buffer_callback=buffers.append)
+tc.assertEqual(1, len(buffers))
+tc.assertLess(len(pickled), 500)
+copy = pickle.loads(pickled, buffers=[b.raw() for b in buffers])
+del buffers
+tc.assertEqual(tlst, copy)
+tlst.append(0.5) # the exported buffer has been released
 
-tc.assertIsInstance(lst3, ArrayList)
-tc.assertEqual([], lst3.data._as_list())
 
+# In[ ]:
+
+
+# test bulk construction
+
+from unittest import TestCase
 import random
-data  = [random.randrange(1000) for _ in range(50)]
-data2 = [random.randrange(1000) for _ in range(50)]
-lst.data = ConstrainedList(data)
-lst2.data = ConstrainedList(data2)
-lst3 = lst + lst2
-tc.assertEqual(100, len(lst3))
-tc.assertEqual(data + data2, lst3.data._as_list())
 
-lst.clear()
-tc.assertEqual([], lst.data._as_list())
+tc = TestCase()
 
-lst.data = ConstrainedList([random.randrange(1000) for _ in range(50)])
+lst = ArrayList.with_capacity(100)
+tc.assertEqual(0, len(lst))
+tc.assertEqual(100, lst.capacity)
+lst.extend(range(100))
+tc.assertEqual(100, lst.capacity)
+tc.assertEqual(list(range(100)), [x for x in lst])
+
+lst = ArrayList()
+lst.extend(x for x in range(10))
+lst.extend(iter(range(10, 1000)))
+tc.assertEqual(1000, lst.capacity)
 lst2 = lst.copy()
-tc.assertIsNot(lst, lst2)
-tc.assertIsNot(lst.data, lst2.data)
-tc.assertEqual(lst.data._as_list(), lst2.data._as_list())
+tc.assertEqual(1000, lst2.capacity)
+tc.assertEqual(lst, lst2)
+lst3 = lst + lst2
+tc.assertEqual(2000, lst3.capacity)
+tc.assertEqual(list(range(1000)) * 2, [x for x in lst3])
+lst.extend(lst)
+tc.assertEqual(lst3, lst)
+
+typed = TypedArrayList.with_capacity(50, 'd')
+tc.assertEqual((0, 50), (len(typed), typed.capacity))
+typed.extend(random.random() for _ in range(50))
+data = [x for x in typed]
+typed.extend(typed)
+tc.assertEqual(data * 2, [x for x in typed])
+tc.assertEqual(data * 4, [x for x in typed + typed.copy()])
+ints = TypedArrayList('q')
+ints.extend(range(5))
+ints.extend(lst[:3].materialize())
+ints.track_fingerprint()
+ints.extend(ints.copy())
+tc.assertEqual([0, 1, 2, 3, 4, 0, 1, 2] * 2, [x for x in ints])
+tc.assertEqual(ints.copy().fingerprint(), ints.fingerprint())
+
+gap = GapArrayList.with_capacity(10)
+gap.extend(range(5))
+gap.insert(2, -1)
+gap.extend(gap)
+tc.assertEqual([0, 1, -1, 2, 3, 4] * 2, [x for x in gap])
+
+slst = SortedArrayList()
+slst.extend(lst)
+tc.assertEqual(sorted(x for x in lst), [x for x in slst])
+tc.assertEqual(sorted([x for x in lst] * 2), [x for x in slst + slst])
+
+
+# In[ ]:
+
+
+# test blocked lists
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+lst = BlockedArrayList()
+tc.assertEqual('[]', str(lst))
+data = []
+for _ in range(3000):
+    op = random.randrange(10)
+    if op < 6:
+        i = random.randrange(len(data)+1)
+        x = random.randrange(1000)
+        lst.insert(i, x)
+        data.insert(i, x)
+    elif op < 8 and data:
+        i = random.randrange(len(data))
+        tc.assertEqual(data.pop(i), lst.pop(i))
+    elif op < 9:
+        lst.append(op)
+        data.append(op)
+    elif data:
+        i = random.randrange(-len(data), len(data))
+        tc.assertEqual(data[i], lst[i])
+        lst[i] = data[i] = -1
+tc.assertEqual(len(data), len(lst))
+tc.assertEqual(data, [x for x in lst])
+tc.assertEqual(str(data), str(lst))
+tc.assertEqual(data[10:50:3], [x for x in lst[10:50:3]])
+tc.assertGreater(lst.chunk_count, 1)
+for i in range(len(data)):
+    tc.assertEqual(data[i], lst[i])
 
+plain = ArrayList()
+plain.extend(data)
+tc.assertEqual(plain, lst)
+tc.assertEqual(lst, plain)
+tc.assertEqual(lst[5:20], plain[5:20])
+lst[3] = 'x'
+tc.assertNotEqual(plain, lst)
+tc.assertNotEqual(lst, plain)
+data[3] = 'x'
+tc.assertEqual(3, lst.index('x'))
+tc.assertIn('x', lst)
+lst.remove('x')
+del data[3]
+tc.assertEqual(data.index(data[-1], 100), lst.index(data[-1], 100))
+tc.assertEqual(data.count(5), lst.count(5))
+tc.assertEqual(min(data), lst.min())
+tc.assertEqual(max(data), lst.max())
+with tc.assertRaises(ValueError):
+    lst.index(-2)
+
+lst.insert_many(100, range(500))
+data[100:100] = range(500)
+del lst[50:900]
+del data[50:900]
+del lst[::7]
+del data[::7]
+lst[20:25] = data[20:25] = ['a', 'b']
+lst[1::9] = data[1::9] = range(len(data[1::9]))
+tc.assertEqual(data, [x for x in lst])
+tc.assertIsInstance(lst.copy(), BlockedArrayList)
+tc.assertEqual(data + data, [x for x in lst + lst])
+lst.sort(key=str)
+tc.assertEqual(sorted(data, key=str), [x for x in lst])
+
+# chunks grow with the list, and shrink again as it does
+lst = BlockedArrayList()
+lst.track_fingerprint()
+lst.extend(range(50000))
+tc.assertLessEqual(lst.chunk_count, 2 * math.isqrt(50000))
+for i in range(500):
+    lst.insert(random.randrange(len(lst)), -i)
+    del lst[random.randrange(len(lst))]
+expected = ArrayList()
+expected.extend(lst)
+tc.assertEqual(expected.fingerprint(), lst.fingerprint())
+tc.assertEqual(expected, lst)
+del lst[100:]
+tc.assertEqual([x for x in expected[:100]], [x for x in lst])
+tc.assertEqual(2, lst.chunk_count)
 lst.clear()
-lst.extend(range(10))
-lst.extend(range(10,0,-1))
-lst.extend(data.copy())
-tc.assertEqual(70, len(lst))
-tc.assertEqual(list(range(10))+list(range(10,0,-1))+data, lst.data._as_list())
+tc.assertEqual(0, len(lst))
+tc.assertEqual(0, lst.chunk_count)
 
 
-# In[194]:
+# In[ ]:
 
 
-# (2 points) test iteration
+# test copy-on-write copies and lazy concatenation
 
 from unittest import TestCase
+import pickle
+
 tc = TestCase()
 lst = ArrayList()
+lst.extend(range(100))
+copy = lst.copy()
+tc.assertTrue(lst.is_shared())
+tc.assertTrue(copy.is_shared())
+tc.assertIs(lst._data, copy._data)
+tc.assertEqual(lst, copy)
+tc.assertEqual(50, copy[50])
+copy[50] = -1
+tc.assertFalse(lst.is_shared())
+tc.assertFalse(copy.is_shared())
+tc.assertEqual(50, lst[50])
+tc.assertEqual(-1, copy[50])
+
+copies = [lst.copy() for _ in range(3)]
+del copies[0][0]
+lst.append(100)
+tc.assertTrue(copies[1].is_shared())
+tc.assertEqual(list(range(1, 100)), [x for x in copies[0]])
+tc.assertEqual(list(range(101)), [x for x in lst])
+tc.assertEqual(list(range(100)), [x for x in copies[2]])
+del copies[1]
+tc.assertFalse(copies[-1].is_shared())
+tc.assertFalse(pickle.loads(pickle.dumps(lst.copy())).is_shared())
+
+for make in (lambda: GapArrayList(), lambda: TypedArrayList('q'), lambda: SortedArrayList()):
+    lst = make()
+    lst.extend(range(0, 200, 2))
+    copy = lst.copy()
+    tc.assertIs(type(lst), type(copy))
+    tc.assertTrue(copy.is_shared())
+    if isinstance(lst, SortedArrayList):
+        copy.add(15)
+    else:
+        copy.insert(8, 15)
+    lst.remove(0)
+    tc.assertEqual([x for x in range(2, 200, 2)], [x for x in lst])
+    tc.assertEqual(sorted(list(range(0, 200, 2)) + [15]), [x for x in copy])
+
+# writing through the buffer of a copy leaves the original as it was
+t = TypedArrayList('q')
+t.extend(range(10))
+c = t.copy()
+with c.buffer() as v:
+    v[0] = 99
+tc.assertEqual(list(range(10)), [x for x in t])
+tc.assertEqual([99] + list(range(1, 10)), [x for x in c])
+
+# but extending from, dumping or pickling a copy leaves it shared
+import io, pickle
+c = t.copy()
+TypedArrayList('q').extend(c)
+c.dump(io.BytesIO())
+for protocol in (4, 5):
+    tc.assertEqual(c, pickle.loads(pickle.dumps(c, protocol=protocol)))
+tc.assertTrue(c.is_shared())
+
+# mutating a copy of a gap list (including where the gap needn't move)
+# leaves the original as it was
+g = GapArrayList()
+g.extend(range(5))
+c = g.copy()
+del c[-1]
+tc.assertEqual([0, 1, 2, 3, 4], [x for x in g])
+tc.assertEqual([0, 1, 2, 3], [x for x in c])
+g.pop()
+c = g.copy()
+g.append('g')
+c.append('c')
+tc.assertEqual([0, 1, 2, 3, 'g'], [x for x in g])
+tc.assertEqual([0, 1, 2, 3, 'c'], [x for x in c])
+c = g.copy()
+c.insert(2, 'x')
+del c[0]
+c[0] = 'y'
+tc.assertEqual([0, 1, 2, 3, 'g'], [x for x in g])
+tc.assertEqual(['y', 'x', 2, 3, 'g'], [x for x in c])
+
+a = ArrayList()
+a.extend(range(10))
+b = ArrayList()
+b.extend(range(10, 15))
+cat = a.concat(b)
+tc.assertIsInstance(cat, ArrayListConcat)
+tc.assertTrue(cat.is_shared())
+tc.assertEqual(15, len(cat))
+tc.assertEqual(list(range(15)), [x for x in cat])
+tc.assertEqual('[0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14]', str(cat))
+tc.assertEqual([12, 10, 8], [x for x in cat[12:7:-2]])
+tc.assertEqual(12, cat.index(12))
+tc.assertEqual(14, cat.max())
+tc.assertIn(11, cat)
+expected = ArrayList()
+expected.extend(range(15))
+tc.assertEqual(expected, cat)
+tc.assertEqual(cat, expected)
+a[0] = b[0] = -1
+tc.assertEqual(list(range(15)), [x for x in cat.concat([])])
+tc.assertIsInstance(cat + [], ArrayList)
+tc.assertEqual(list(range(15)), [x for x in cat + []])
+tc.assertTrue(cat.is_shared())
+
+cat.append(15)
+tc.assertFalse(cat.is_shared())
+tc.assertEqual(list(range(16)), [x for x in cat])
+tc.assertEqual(-1, a[0])
+tc.assertIs(cat.materialize(), cat.materialize())
+tc.assertIsInstance(cat.materialize(), ArrayList)
+
+cat = a.concat(range(3)).concat(b)
+tc.assertEqual([x for x in a] + [0, 1, 2] + [x for x in b], [x for x in cat])
+del cat[0]
+tc.assertEqual(-1, a[0])
+tc.assertEqual(len(a) + len(b) + 2, len(cat))
+tc.assertEqual(0, len(ArrayList().concat(ArrayList())))
+
+# + builds a list right away, of the same kind as its left operand
+tc.assertIsInstance(a + b, ArrayList)
+tc.assertFalse((a + b).is_shared())
+s = SortedArrayList()
+s.extend([3, 1, 2])
+tc.assertIsInstance(s.concat([0]), SortedArrayList)
+tc.assertEqual([0, 1, 2, 3], [x for x in s.concat([0])])
+
 
+# In[ ]:
+
+
+# test sums, reductions and parallel reductions
+
+from unittest import TestCase
+import operator
 import random
-data = [random.randrange(1000) for _ in range(100)]
-lst.data = ConstrainedList(data)
+
+tc = TestCase()
+data = [random.randrange(-1000, 1000) for _ in range(5000)]
+for lst in (ArrayList(), TypedArrayList('q'), GapArrayList(), BlockedArrayList()):
+    lst.extend(data)
+    tc.assertEqual(sum(data), lst.sum())
+    tc.assertEqual(sum(data, 10), lst.sum(10))
+    tc.assertEqual(max(data), lst.reduce(max))
+    tc.assertEqual(sum(data) - 1, lst.reduce(operator.add, -1))
+tc.assertEqual(0, ArrayList().sum())
+tc.assertEqual(5, ArrayList().reduce(operator.mul, 5))
+with tc.assertRaises(TypeError):
+    ArrayList().reduce(operator.mul)
+tc.assertEqual(sum(data), (lst + lst[:0]).sum())
+
+for typecode in ('q', 'd'):
+    lst = TypedArrayList(typecode)
+    lst.extend(data)
+    lst.parallel_workers = 3
+    lst.parallel_min_size = 1000
+    copy = lst.copy()
+    for use_numpy in (True, False):
+        lst.use_numpy = use_numpy
+        tc.assertEqual(min(data), lst.min())
+        tc.assertEqual(max(data), lst.max())
+        tc.assertEqual(data.count(data[7]), lst.count(data[7]))
+        tc.assertEqual(data.count(0.5), lst.count(0.5))
+        tc.assertEqual(sum(data), lst.sum())
+        tc.assertEqual(max(data), lst.reduce(max))
+        tc.assertEqual(sum(data) + 3, lst.reduce(operator.add, 3))
+    tc.assertTrue(lst.is_shared())
+lst.parallel_min_size = 10**4
+tc.assertFalse(lst._parallel())
+
+# an error setting up the workers is raised as it is
+lst.parallel_min_size = 0
+def broken_context():
+    raise RuntimeError('no processes')
+_mp_context, real_context = broken_context, _mp_context
+try:
+    with tc.assertRaises(RuntimeError):
+        lst.sum()
+finally:
+    _mp_context = real_context
+
+
+# In[ ]:
+
+
+# test indexed lists
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+lst = IndexedArrayList()
+data = []
+for _ in range(2000):
+    op = random.randrange(10)
+    x = random.randrange(200)
+    if op < 4:
+        i = random.randrange(len(data)+1)
+        lst.insert(i, x)
+        data.insert(i, x)
+    elif op < 6:
+        lst.append(x)
+        data.append(x)
+    elif op < 7 and data:
+        i = random.randrange(len(data))
+        lst[i] = data[i] = x
+    elif op < 8 and data:
+        i = random.randrange(-len(data), len(data))
+        tc.assertEqual(data.pop(i), lst.pop(i))
+    elif x in data:
+        lst.remove(x)
+        data.remove(x)
+    else:
+        with tc.assertRaises(ValueError):
+            lst.remove(x)
 tc.assertEqual(data, [x for x in lst])
+for x in range(-1, 201):
+    tc.assertEqual(x in data, x in lst)
+    tc.assertEqual(data.count(x), lst.count(x))
+    if x in data:
+        tc.assertEqual(data.index(x), lst.index(x))
+        if x in data[10:]:
+            tc.assertEqual(data.index(x, 10), lst.index(x, 10))
+        with tc.assertRaises(ValueError):
+            lst.index(x, 0, data.index(x))
+
+lst.extend(range(1000, 1100))
+data.extend(range(1000, 1100))
+lst.insert_many(5, [7, 7, 7])
+data[5:5] = [7, 7, 7]
+del lst[10:40]
+del data[10:40]
+del lst[::4]
+del data[::4]
+lst[3:9] = data[3:9] = [-5, -5]
+lst[1::7] = data[1::7] = range(len(data[1::7]))
+tc.assertEqual(data.count(7), lst.count(7))
+tc.assertEqual(data.index(-5), lst.index(-5))
+tc.assertEqual(data.index(data[-1]), lst.index(data[-1]))
+tc.assertNotIn([], lst)
+with tc.assertRaises(TypeError):
+    lst.append([])
+with tc.assertRaises(TypeError):
+    lst[0] = {}
+tc.assertEqual(data, [x for x in lst])
+
+copy = lst.copy()
+copy.sort()
+data.sort()
+tc.assertEqual(data, [x for x in copy])
+tc.assertEqual(0, copy.index(data[0]))
+tc.assertEqual(len(data) - 1, copy.index(data[-1]))
+tc.assertNotEqual(0, lst.index(data[0]))
+
+lst = IndexedArrayList()
+lst.extend(range(1000))
+tc.assertGreater(lst.index_memory(), 1000 * sys.getsizeof(1000))
+lst.extend(range(1000))
+tc.assertEqual(1000, lst.index(0, 1))
+lst.clear()
+tc.assertNotIn(0, lst)
+tc.assertLess(lst.index_memory(), 1000)
+
+# unhashable values are rejected before the index has been built, too
+lst = IndexedArrayList()
+lst.extend([5, 6, 7])
+for mutate in (lambda: lst.insert(0, []), lambda: lst.append([]),
+               lambda: lst.__setitem__(0, {}), lambda: lst.insert_many(1, [8, []])):
+    with tc.assertRaises(TypeError):
+        mutate()
+tc.assertEqual([5, 6, 7], [x for x in lst])
+tc.assertIn(6, lst)
+tc.assertEqual(1, lst.count(7))
+tc.assertEqual(1, lst.index(6))
+
+# if the index can't be built, queries scan the list instead
+lst = IndexedArrayList()
+lst.data = ConstrainedList([5, [], 6, 6])
+tc.assertIn(6, lst)
+tc.assertIn([], lst)
+tc.assertEqual(2, lst.count(6))
+tc.assertEqual(2, lst.index(6))
+lst.remove(6)
+tc.assertEqual([5, [], 6], [x for x in lst])
+
+
+# In[ ]:
+
+
+# test chunked and reversed iteration
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+data = [random.randrange(1000) for _ in range(1000)]
+makers = [lambda: ArrayList(), lambda: ArrayList(storage='unchecked'),
+          lambda: TypedArrayList('q'), lambda: GapArrayList(),
+          lambda: BlockedArrayList(), lambda: IndexedArrayList()]
+for make in makers:
+    lst = make()
+    lst.extend(data)
+    if isinstance(lst, GapArrayList):
+        lst.insert(500, -1)
+        del lst[500]
+    for n in (1, 7, 256, 1000, 5000):
+        chunks = list(lst.iter_chunks(n))
+        tc.assertTrue(all(isinstance(c, tuple) for c in chunks))
+        tc.assertTrue(all(len(c) == n for c in chunks[:-1]))
+        tc.assertEqual(data, [x for c in chunks for x in c])
+    tc.assertEqual(data[::-1], list(reversed(lst)))
+    tc.assertEqual([], list(make().iter_chunks(3)))
+    tc.assertEqual([], list(reversed(make())))
+    with tc.assertRaises(ValueError):
+        lst.iter_chunks(0)
+
+lst = ArrayList()
+lst.extend(range(10))
+cat = lst.concat(lst)
+tc.assertEqual([(0, 1, 2, 3), (4, 5, 6, 7), (8, 9, 0, 1)], list(cat.iter_chunks(4))[:3])
+tc.assertEqual(list(range(9, -1, -1)) * 2, list(reversed(cat)))
+tc.assertTrue(cat.is_shared())
+
+lst = TypedArrayList('d')
+lst.extend([0.5, 1.5])
+tc.assertEqual([(0.5, 1.5)], list(lst.iter_chunks(10)))
+
+
+# In[ ]:
+
+
+# test record lists
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+lst = RecordArrayList([('id', 'q'), 'name', ('price', 'd')])
+tc.assertEqual(('id', 'name', 'price'), lst.fields)
+tc.assertEqual('[]', str(lst))
+rows = []
+for i in range(500):
+    row = (i, 'item' + str(i), random.random() * 100)
+    if i % 2:
+        lst.append(row)
+    else:
+        lst.append(dict(zip(lst.fields, row)))
+    rows.append(row)
+tc.assertEqual(500, len(lst))
+tc.assertEqual(rows, list(lst))
+tc.assertEqual(rows[7], lst[7])
+tc.assertEqual(rows[-1][2], lst[-1].price)
+tc.assertEqual(rows[10:20:3], list(lst[10:20:3]))
+tc.assertIsInstance(lst['price'], TypedArrayList)
+tc.assertIsInstance(lst.column('name'), ArrayList)
+tc.assertEqual([r[1] for r in rows], [x for x in lst['name']])
+tc.assertEqual(min(r[2] for r in rows), lst.min('price'))
+tc.assertEqual(max(r[0] for r in rows), lst.max('id'))
+tc.assertEqual(1, lst.count('name', 'item42'))
+with tc.assertRaises(KeyError):
+    lst.min('nonesuch')
+
+lst.insert(3, (-1, 'new', 0.0))
+rows.insert(3, (-1, 'new', 0.0))
+lst[5] = rows[5] = (-2, 'changed', 1.5)
+del lst[100]
+del rows[100]
+del lst[200:300:2]
+del rows[200:300:2]
+tc.assertEqual(rows.pop(), lst.pop())
+tc.assertEqual(rows, list(lst))
+
+# rows that don't fit leave the list unchanged
+with tc.assertRaises(TypeError):
+    lst.append((1, 'bad', 'not a float'))
+with tc.assertRaises(TypeError):
+    lst.insert(0, (1, 'bad', 'not a float'))
+with tc.assertRaises(TypeError):
+    lst[0] = (1, 'bad', 'not a float')
+with tc.assertRaises(ValueError):
+    lst.append((1, 'short'))
+with tc.assertRaises(KeyError):
+    lst.append({'id': 1})
+with tc.assertRaises(IndexError):
+    lst.insert(len(lst) + 1, rows[0])
+tc.assertEqual(rows, list(lst))
+tc.assertEqual(len(rows), len(lst['id']))
+tc.assertEqual(len(rows), len(lst['name']))
+
+copy = lst[:10].materialize()
+tc.assertIsInstance(copy, RecordArrayList)
+tc.assertEqual(rows[:10], list(copy))
+lst.clear()
+tc.assertEqual([], list(lst))
+
+
+# In[ ]:
+
+
+# test external sorting
+
+from unittest import TestCase
+import os
+import random
+import tempfile
+
+tc = TestCase()
+data = [random.randrange(1000) for _ in range(5000)]
+tc.assertEqual(sorted(data), list(external_sort(data, run_size=100, fan_in=4)))
+tc.assertEqual(sorted(data, reverse=True),
+               list(external_sort(iter(data), reverse=True, run_size=333, fan_in=2)))
+tc.assertEqual(sorted(data), list(external_sort(data)))
+tc.assertEqual([], list(external_sort([], run_size=10)))
+tc.assertEqual([1], list(external_sort([1], run_size=1)))
+
+# the sort is stable, with or without reverse
+pairs = [(random.randrange(20), i) for i in range(3000)]
+first = lambda p: p[0]
+tc.assertEqual(sorted(pairs, key=first), list(external_sort(pairs, key=first, run_size=64, fan_in=3)))
+tc.assertEqual(sorted(pairs, key=first, reverse=True),
+               list(external_sort(pairs, key=first, reverse=True, run_size=64, fan_in=3)))
+
+words = ['w' + str(random.randrange(10**6)) for _ in range(2000)]
+tc.assertEqual(sorted(words, key=len), list(external_sort(words, key=len, run_size=500)))
+
+# temporary files are removed once the iterator is exhausted or closed
+with tempfile.TemporaryDirectory() as tmp:
+    it = external_sort(data, run_size=100, fan_in=8, tmpdir=tmp)
+    tc.assertEqual(sorted(data)[:10], [next(it) for _ in range(10)])
+    tc.assertEqual(1, len(os.listdir(tmp)))
+    # (50 runs, merged 8 at a time into 7)
+    tc.assertEqual(7, len(os.listdir(os.path.join(tmp, os.listdir(tmp)[0]))))
+    it.close()
+    tc.assertEqual([], os.listdir(tmp))
+    tc.assertEqual(sorted(data), list(external_sort(data, run_size=1000, tmpdir=tmp)))
+    tc.assertEqual([], os.listdir(tmp))
+
+with tc.assertRaises(ValueError):
+    external_sort(data, run_size=0)
+with tc.assertRaises(ValueError):
+    external_sort(data, fan_in=1)
+
+
+# In[ ]:
+
+
+# test lazy pipelines
+
+from unittest import TestCase
+import random
+
+tc = TestCase()
+data = [random.randrange(1000) for _ in range(2000)]
+lst = ArrayList()
+lst.extend(data)
+
+square = lambda x: x * x
+even = lambda x: x % 2 == 0
+tc.assertEqual([x * x for x in data], list(lst.lazy().map(square)))
+tc.assertEqual([x * x for x in data if x % 2 == 0],
+               list(lst.lazy().filter(even).map(square)))
+tc.assertEqual(list(enumerate([x for x in data if x > 500], 1))[:10],
+               list(lst.lazy().filter(lambda x: x > 500).enumerate(1).take(10)))
+tc.assertEqual([], list(lst.lazy().take(0)))
+
+# stages return new pipelines, leaving the original as it was
+p = lst.lazy().map(square)
+q = p.filter(even)
+tc.assertEqual(len(data), len(list(p)))
+tc.assertEqual(sum(1 for x in data if x % 2 == 0), len(list(q)))
+
+# nothing runs until the pipeline is iterated over, and take stops early
+seen = []
+p = lst.lazy().map(lambda x: seen.append(x) or x).take(5)
+tc.assertEqual([], seen)
+tc.assertEqual(data[:5], list(p))
+tc.assertEqual(data[:5], seen)
+
+# collect builds a single list, sized up front when the length is known
+out = lst.lazy().map(square).take(100).collect()
+tc.assertIsInstance(out, ArrayList)
+tc.assertEqual([x * x for x in data[:100]], list(out))
+tc.assertEqual(100, len(out.data))
+tc.assertEqual(100, operator.length_hint(lst.lazy().take(100)))
+tc.assertEqual(0, operator.length_hint(lst.lazy().filter(even)))
+out = lst.lazy().map(float).collect(TypedArrayList('d'))
+tc.assertIsInstance(out, TypedArrayList)
+tc.assertEqual([float(x) for x in data], list(out))
+
+# pipelines over other kinds of lists
+blocked = BlockedArrayList()
+blocked.extend(data)
+tc.assertEqual([x for x in data if x % 2 == 0], list(blocked.lazy().filter(even)))
+tc.assertEqual(data[10:20], list(lst[10:30].lazy().take(10)))
+tc.assertEqual([x + 1 for x in data + data], list(lst.concat(lst).lazy().map(lambda x: x + 1)))
+recs = RecordArrayList(['a', 'b'])
+recs.extend([(x, -x) for x in data[:50]])
+tc.assertEqual([-x for x in data[:50]], list(recs.lazy().map(lambda r: r.b)))
+
+with tc.assertRaises(ValueError):
+    lst.lazy().take(-1)
+
+
+# In[ ]:
 
-it1 = iter(lst)
-it2 = iter(lst)
-for x in data:
-    tc.assertEqual(next(it1), x)
-    tc.assertEqual(next(it2), x)
 
+if _storage_env is not None:
+    os.environ['ARRAYLIST_STORAGE'] = _storage_env